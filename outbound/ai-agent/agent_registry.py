@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+import time
+
+from backend_client import backend_client, trpc_result
+
+logger = logging.getLogger("agent-registry")
+
+
+def normalize_definition(raw: dict) -> dict:
+    """Fill defaults so every definition has the fields the worker reads."""
+    return {
+        "id": raw["id"],
+        "name": raw.get("name") or raw["id"],
+        "prompt": raw.get("prompt") or "",
+        "model": raw.get("model") or "gpt-4",
+        "voice": raw.get("voice") or "nova",
+        "temperature": float(raw.get("temperature", 0.7)),
+    }
+
+
+class AgentRegistry:
+    """Agent definitions (prompt, model, voice, temperature) loaded at runtime.
+
+    Definitions come from the backend's agents.getRegistry procedure, or from
+    AGENT_REGISTRY_FILE when set (a JSON list or {"agents": [...]}). They are
+    cached for AGENT_REGISTRY_TTL seconds; a lookup miss forces one refresh so
+    an agent deployed a moment ago is found on its first call.
+    """
+
+    def __init__(self, client=backend_client, path="/api/trpc/agents.getRegistry"):
+        self.client = client
+        self.path = path
+        self.file = os.getenv("AGENT_REGISTRY_FILE")
+        self.ttl = float(os.getenv("AGENT_REGISTRY_TTL", "30"))
+        self.definitions = {}
+        self.loaded_at = 0.0
+
+    async def get(self, agent_id: str):
+        """Return the definition for agent_id, or None if it isn't registered."""
+        if time.monotonic() - self.loaded_at > self.ttl:
+            await self.refresh()
+        definition = self.definitions.get(agent_id)
+        if definition is None and self.loaded_at:
+            await self.refresh()
+            definition = self.definitions.get(agent_id)
+        return definition
+
+    async def refresh(self) -> None:
+        try:
+            raw_agents = self._load_file() if self.file else await self._load_backend()
+        except Exception as e:
+            # Keep serving the last good copy
+            logger.error("Failed to load agent registry: %s", e)
+            return
+        self.definitions = {raw["id"]: normalize_definition(raw) for raw in raw_agents if raw.get("id")}
+        self.loaded_at = time.monotonic()
+        logger.info("Agent registry loaded: %s agents", len(self.definitions))
+
+    def _load_file(self) -> list:
+        with open(self.file) as f:
+            data = json.load(f)
+        return data.get("agents", []) if isinstance(data, dict) else data
+
+    async def _load_backend(self) -> list:
+        async with self.client.session().get(self.client.url(self.path)) as response:
+            body = await response.text()
+            if response.status != 200:
+                raise RuntimeError(f"registry request failed with {response.status}: {body[:200]}")
+        return trpc_result(body).get("agents", [])
+
+
+# Shared by every job in this worker process
+agent_registry = AgentRegistry()
@@ -0,0 +1,198 @@
+"""Multi-tenant LiveKit worker hosting every deployed agent in one process.
+
+Instead of one generated script and Python process per agent, this worker
+looks up the agent for each job in the AgentRegistry and builds the session
+from that definition. Rooms are matched to agents by an "agentId" field in
+room metadata, or by the agent-<id> room naming used by the web UI.
+
+Usage:
+    python agent_worker.py dev
+"""
+from dotenv import load_dotenv
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+
+from livekit import agents
+from livekit.agents import Agent, AgentSession, RunContext, function_tool
+from livekit.plugins import openai
+
+from agent_registry import agent_registry
+from backend_client import backend_client
+from logging_setup import bind_call, configure_logging
+from worker_load import JobLoadReporter, worker_load
+from loop_monitor import start_loop_monitor
+
+load_dotenv()
+
+configure_logging()
+logger = logging.getLogger("agent-worker")
+
+
+class CallState:
+    """Per-call userdata: the agent's definition plus what the call collected."""
+
+    def __init__(self, definition: dict):
+        self.definition = definition
+        self.conversation_data = {}
+
+
+@function_tool()
+async def save_conversation_data(context: RunContext[CallState], key: str, value: str) -> str:
+    """Save important data from the conversation.
+
+    Args:
+        key: The type of information being saved (e.g., "name", "place", "date")
+        value: The value to save
+    """
+    state = context.userdata
+    state.conversation_data[key] = value
+    logger.info("Agent %s - Saved conversation data - %s: %s", state.definition['name'], key, value)
+    return f"Saved {key}: {value}"
+
+
+@function_tool()
+async def book_slot(context: RunContext[CallState], name: str, place: str, date: str) -> str:
+    """Book a slot for the user's vacation visit.
+
+    Args:
+        name: The name of the user booking the slot.
+        place: The vacation place the user wants to visit.
+        date: The date for the booking in format YYYY-MM-DD.
+    """
+    state = context.userdata
+    try:
+        status, body = await backend_client.post(
+            "/api/book-slot",
+            {"name": name, "place": place, "date": date, "agentId": state.definition["id"]},
+        )
+        if status == 200:
+            logger.info("Agent %s - Booking successful: %s", state.definition['name'], body)
+            return f"Booking confirmed! Your slot for {place} on {date} has been booked successfully."
+        logger.error("Agent %s - Booking failed: %s", state.definition['name'], status)
+        return "Sorry, there was an issue with booking your slot. Please try again."
+    except Exception as e:
+        logger.error("Agent %s - Booking error: %s", state.definition['name'], e)
+        return "Sorry, there was an issue with booking your slot. Please try again."
+
+
+# Tools every registered agent gets
+TOOLS = {
+    "save_conversation_data": save_conversation_data,
+    "book_slot": book_slot,
+}
+
+
+def build_agent(definition: dict) -> Agent:
+    return Agent(instructions=definition["prompt"], tools=list(TOOLS.values()))
+
+
+def build_llm(definition: dict):
+    # Agent records default to chat model names (gpt-4, ...); only realtime
+    # models can drive the speech-to-speech session, so others use the default
+    options = {"voice": definition["voice"], "temperature": definition["temperature"]}
+    if "realtime" in definition["model"]:
+        options["model"] = definition["model"]
+    return openai.realtime.RealtimeModel(**options)
+
+
+def resolve_agent_id(ctx: agents.JobContext):
+    try:
+        metadata = json.loads(ctx.room.metadata) if ctx.room.metadata else {}
+    except json.JSONDecodeError:
+        metadata = {}
+    if metadata.get("agentId"):
+        return metadata["agentId"]
+    room_name = ctx.room.name or ""
+    if room_name.startswith("agent-"):
+        return room_name[len("agent-"):]
+    return None
+
+
+def chat_reply(agent_name: str, message: str) -> str:
+    """Canned replies for data-channel chat messages (chat-only mode)."""
+    message_lower = message.lower()
+
+    if any(greeting in message_lower for greeting in ["hello", "hi", "hey", "good morning", "good afternoon", "good evening"]):
+        return f"Hello! I'm {agent_name}, your AI assistant. I'm currently running in chat mode. How can I help you today?"
+    elif "help" in message_lower:
+        return "I can help you with various tasks including: Answering questions, Providing information, Booking appointments, General assistance. What would you like to know?"
+    elif any(word in message_lower for word in ["book", "appointment", "schedule", "reserve"]):
+        return "I can help you book appointments! Please provide: Your name, The place you'd like to visit, Your preferred date and time. What would you like to book?"
+    elif "status" in message_lower or "how are you" in message_lower:
+        return f"I'm {agent_name} and I'm running perfectly! I'm connected to LiveKit and ready to assist you. What can I do for you?"
+    elif "test" in message_lower:
+        return "Test successful! I'm responding to your messages in real-time. The chat system is working properly."
+    elif "time" in message_lower:
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return f"The current time is {current_time}. How else can I assist you?"
+    else:
+        return f"Thank you for your message: '{message}'. I'm {agent_name} and I'm here to help! I can assist with questions, bookings, or general information. What would you like to know?"
+
+
+async def handle_chat(ctx: agents.JobContext, agent_name: str, data: bytes, kind) -> None:
+    try:
+        message = json.loads(data.decode('utf-8'))
+        if message.get('type') != 'chat' or not message.get('text'):
+            return
+        response = chat_reply(agent_name, message['text'])
+        await ctx.room.local_participant.publish_data(
+            json.dumps({'type': 'chat', 'text': response, 'timestamp': datetime.now().isoformat()}).encode('utf-8'),
+            kind=kind
+        )
+        logger.info("Agent %s - Sent chat response: %s", agent_name, response)
+    except Exception as e:
+        logger.error("Agent %s - Error processing chat message: %s", agent_name, e, exc_info=True)
+
+
+async def entrypoint(ctx: agents.JobContext):
+    ctx.add_shutdown_callback(lambda: backend_client.close())
+    loop_monitor = start_loop_monitor()
+    if loop_monitor:
+        ctx.add_shutdown_callback(lambda: loop_monitor.close())
+    load_reporter = JobLoadReporter(loop_monitor)
+    load_reporter.start()
+    ctx.add_shutdown_callback(lambda: load_reporter.close())
+    try:
+        agent_id = resolve_agent_id(ctx)
+        definition = await agent_registry.get(agent_id) if agent_id else None
+        if definition is None:
+            logger.error("No registered agent for room %s (agent id: %s)", ctx.room.name, agent_id)
+            return
+
+        bind_call(agent_id=agent_id, room=ctx.room.name)
+        await ctx.connect()
+        logger.info("Agent %s connected to room: %s", definition['name'], ctx.room.name)
+
+        def handle_data_received(data, participant, kind):
+            asyncio.create_task(handle_chat(ctx, definition["name"], data, kind))
+
+        ctx.room.on("dataReceived", handle_data_received)
+
+        try:
+            session = AgentSession[CallState](
+                llm=build_llm(definition),
+                userdata=CallState(definition),
+            )
+            await session.start(room=ctx.room, agent=build_agent(definition))
+            logger.info("Agent %s session started", definition['name'])
+        except Exception as e:
+            # The job stays in the room, so chat messages are still answered
+            logger.warning("Agent %s - OpenAI not available, running in chat-only mode: %s", definition['name'], e)
+
+    except Exception as e:
+        logger.error("Error in multi-agent worker: %s", e, exc_info=True)
+        raise
+
+
+if __name__ == "__main__":
+    worker_load.reset()
+    agents.cli.run_app(agents.WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        load_fnc=worker_load.load_fnc,
+        load_threshold=float(os.getenv("WORKER_LOAD_THRESHOLD", "0.75")),
+        # Explicit, so it can't collide with a health server on LiveKit's default 8081
+        port=int(os.getenv("AGENT_WORKER_PORT", "8082")),
+    ))
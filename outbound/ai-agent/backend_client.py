@@ -0,0 +1,128 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import aiohttp
+
+from latency_metrics import latency
+from serialization import Codec
+
+logger = logging.getLogger("backend-client")
+
+# Get API URL from environment variable or default to localhost:3025
+API_URL = os.getenv("NEXT_PUBLIC_API_URL", "http://localhost:3025")
+
+
+class BackendClient:
+    """Process-wide pooled HTTP client for agent -> backend calls.
+
+    aiohttp sessions are bound to the event loop they were created on, so the
+    client keeps one pooled session per running loop. Every CampaignAgent on
+    that loop shares it, reusing keep-alive connections instead of paying a
+    new TCP/TLS handshake per request.
+    """
+
+    def __init__(self, base_url=API_URL):
+        self.base_url = base_url.rstrip('/')
+        self.total_timeout = float(os.getenv("BACKEND_HTTP_TIMEOUT", "10"))
+        self.connect_timeout = float(os.getenv("BACKEND_HTTP_CONNECT_TIMEOUT", "3"))
+        self.pool_limit = int(os.getenv("BACKEND_HTTP_POOL_LIMIT", "100"))
+        self.pool_limit_per_host = int(os.getenv("BACKEND_HTTP_POOL_LIMIT_PER_HOST", "50"))
+        self.dns_cache_ttl = int(os.getenv("BACKEND_HTTP_DNS_TTL", "300"))
+        self.keepalive_timeout = float(os.getenv("BACKEND_HTTP_KEEPALIVE", "30"))
+        self._sessions = {}
+        self.codec = Codec()
+
+    def url(self, path: str) -> str:
+        """Resolve a backend path such as /api/trpc/campaign.saveConversation."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the pooled session for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.total_timeout,
+                sock_connect=self.connect_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._sessions[loop] = session
+            logger.info(
+                "Backend HTTP pool created for %s (limit=%s, per_host=%s)",
+                self.base_url, self.pool_limit, self.pool_limit_per_host
+            )
+        return session
+
+    async def post(self, path: str, payload, headers: dict = None):
+        """POST a payload (a dict, or a body from serialization.dumps) and return (status, body_text)."""
+        started = time.perf_counter()
+        try:
+            body, body_headers = self.codec.encode(payload)
+            status, text = await self._post(path, body, {**body_headers, **(headers or {})})
+            if status == 415 and "Content-Encoding" in body_headers:
+                self.codec.rejected()
+                body, body_headers = self.codec.encode(payload)
+                status, text = await self._post(path, body, {**body_headers, **(headers or {})})
+            return status, text
+        finally:
+            latency.observe("backend_write", time.perf_counter() - started)
+
+    async def _post(self, path: str, body: bytes, headers: dict):
+        async with self.session().post(self.url(path), data=body, headers=headers) as response:
+            self.codec.negotiate(response.headers.get("Accept-Encoding"))
+            return response.status, await response.text()
+
+    async def get(self, path: str, params: dict = None):
+        """GET a backend path and return (status, body_text)."""
+        async with self.session().get(self.url(path), params=params) as response:
+            return response.status, await response.text()
+
+    async def close(self) -> None:
+        """Close the pooled session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info("Backend HTTP pool closed")
+
+
+def trpc_input(value: dict) -> dict:
+    """Request body for a tRPC mutation: the router's superjson transformer
+    reads the input from "json", so a bare payload arrives as undefined."""
+    return {"json": value}
+
+
+def trpc_query(value: dict) -> dict:
+    """Query-string parameters for a tRPC query procedure (superjson input)."""
+    return {"input": json.dumps(trpc_input(value))}
+
+
+def trpc_result(body_text: str) -> dict:
+    """Extract the procedure's return value from a tRPC response body."""
+    try:
+        body = json.loads(body_text) if body_text else {}
+    except ValueError:
+        return {}
+    if not isinstance(body, dict):
+        return {}
+    data = body.get("result", {}).get("data", body)
+    # superjson-wrapped responses nest the value under "json"
+    if isinstance(data, dict) and "json" in data:
+        data = data["json"]
+    return data if isinstance(data, dict) else {}
+
+
+# Shared by every CampaignAgent in this worker process
+backend_client = BackendClient()
@@ -0,0 +1,90 @@
+"""Backend traffic per call, and agent behaviour when the backend degrades.
+
+Runs the same scripted conversations (see load_test.py) against the mock
+backend under several scenarios and prints, per scenario: requests and
+bytes per call, errors, peak concurrency per endpoint, turn latency, what
+was left in the outbox after the shutdown drain, and how much of the
+transcript reached the backend.
+
+Usage:
+    python benchmarks/bench_backend.py [--calls 50] [--concurrency 25] [--scenario slow]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+from load_test import configure_environment, free_port, main_async, percentile
+from mock_backend import MockBackend
+
+# name -> MockBackend options
+SCENARIOS = {
+    "healthy": {"latency": "0.005:0.3"},
+    "slow": {"latency": "0.3:0.4"},
+    "flaky": {"latency": "0.01:0.3", "error_rate": 0.1},
+    "transcript_down": {"latency": "0.005:0.3", "endpoint_errors": {"campaign.appendTranscript": 1.0}},
+    "compressed": {"latency": "0.005:0.3", "accept_encoding": "gzip"},
+}
+
+
+def run_scenario(name, options, args, port, workdir):
+    # Fresh outbox file per scenario so leftovers aren't counted twice
+    os.environ["OUTBOX_PATH"] = os.path.join(workdir, f"outbox-{name}.db")
+    backend = MockBackend(port, **options)
+    # Compression is negotiated per backend; start every scenario uncompressed
+    from backend_client import backend_client
+    from serialization import Codec
+    backend_client.codec = Codec()
+    run_args = argparse.Namespace(
+        calls=args.calls,
+        concurrency=args.concurrency,
+        llm_latency=args.llm_latency,
+        tts_latency=args.tts_latency,
+        think_time=args.think_time,
+    )
+    results, elapsed, _, _ = asyncio.run(main_async(run_args, backend))
+
+    stats = backend.snapshot()
+    latencies = sorted(results["turn_latencies"])
+    # Every turn adds one lead and one agent entry
+    expected_entries = 2 * results["turns"]
+    delivered_entries = sum(len(transcript) for transcript in backend.transcripts.values())
+
+    print(f"\n== {name} ({', '.join(f'{k}={v}' for k, v in options.items())})")
+    print(f"  wall {elapsed:.2f}s, turn latency p50={percentile(latencies, 50) * 1000:.0f}ms p95={percentile(latencies, 95) * 1000:.0f}ms")
+    print(f"  requests/call {sum(e['requests'] for e in stats.values()) / args.calls:.2f}, "
+          f"KiB/call {sum(e['bytes_in'] for e in stats.values()) / args.calls / 1024:.1f}, "
+          f"errors {sum(e['errors'] for e in stats.values())}")
+    for endpoint, counters in sorted(stats.items(), key=lambda item: -item[1]["requests"]):
+        print(f"    {endpoint:<35} req={counters['requests']:<5} err={counters['errors']:<4} "
+              f"peak_in_flight={counters['max_in_flight']:<3} dup_keys={counters['duplicate_keys']}")
+    print(f"  outbox pending after drain: {results['outbox_pending']}")
+    print(f"  transcript delivered: {delivered_entries}/{expected_entries} entries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--llm-latency", default="0.1:0.3")
+    parser.add_argument("--tts-latency", default="0.05:0.3")
+    parser.add_argument("--think-time", default="0.05:0.5")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="agent-backend-bench-") as workdir:
+        port = free_port()
+        configure_environment(port, workdir)
+        # Retry/failure warnings are the expected outcome of the degraded scenarios
+        os.environ["LOG_LEVEL"] = "CRITICAL"
+
+        for name in args.scenario or SCENARIOS:
+            run_scenario(name, SCENARIOS[name], args, port, workdir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
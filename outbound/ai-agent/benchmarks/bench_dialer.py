@@ -0,0 +1,233 @@
+"""Campaign dialer throughput against a simulated LiveKit SIP service.
+
+Runs dialer.CampaignDialer over a campaign served by the mock backend,
+with a fake LiveKit API standing in for the room and SIP services: each
+call rings for a lognormal time and is answered with probability
+--answer-rate, then the lead talks for a lognormal handle time before the
+room empties. Answered calls need one of --agent-slots simulated agents;
+a lead answered while every agent is busy waits --patience seconds in a
+room with no agent and hangs up (an abandoned call). Every duration is multiplied by --time-scale (and the call
+rate divided by it) so a campaign's worth of calls runs in seconds; the
+report scales wall time back up and compares it with dialing the same
+leads one at a time, as campaign.startCampaign does. --pacing runs with
+the PacingController instead of fixed concurrency alone; --retries redials
+unanswered and abandoned leads through a RetryQueue, every retry policy
+waiting a flat --retry-delay between attempts.
+
+Usage:
+    python benchmarks/bench_dialer.py --leads 2000 --concurrency 100 --calls-per-second 5
+    python benchmarks/bench_dialer.py --concurrency 100 --agent-slots 20 --pacing
+    python benchmarks/bench_dialer.py --trunks trunk-a=60,trunk-b=20 --answer-rate 0.3
+    python benchmarks/bench_dialer.py --pacing --retries --retry-delay 600
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from load_test import configure_environment, free_port
+from mock_backend import LatencyDistribution, MockBackend
+
+
+class FakeRoomService:
+    def __init__(self, sip):
+        self.sip = sip
+
+    async def create_room(self, request):
+        from livekit import api
+        self.sip.rooms[request.name] = 0
+        return api.Room(name=request.name)
+
+    async def delete_room(self, request):
+        self.sip.rooms.pop(request.room, None)
+
+    async def list_rooms(self, request):
+        from livekit import api
+        self.sip.list_calls += 1
+        return api.ListRoomsResponse(rooms=[
+            api.Room(name=name, num_participants=self.sip.rooms[name])
+            for name in request.names if name in self.sip.rooms
+        ])
+
+
+class FakeSipService:
+    """Rings, then answers (and later hangs up) or fails with a SIP status."""
+
+    def __init__(self, args):
+        self.ring = LatencyDistribution(args.ring_time)
+        self.handle = LatencyDistribution(args.handle_time)
+        self.answer_rate = args.answer_rate
+        self.agent_slots = args.agent_slots
+        self.patience = args.patience
+        self.scale = args.time_scale
+        self.agents_busy = 0
+        self.agent_seconds = 0.0
+        self.agents_changed = time.perf_counter()
+        self.answered = 0
+        self.abandoned = 0
+        self.rooms = {}
+        self.list_calls = 0
+        self.in_flight = {}
+        self.peak_in_flight = {}
+        self.dialed = 0
+        self.sequential_seconds = 0.0
+
+    async def create_sip_participant(self, request):
+        from livekit import api
+        trunk = request.sip_trunk_id
+        self.dialed += 1
+        self.in_flight[trunk] = self.in_flight.get(trunk, 0) + 1
+        self.peak_in_flight[trunk] = max(self.peak_in_flight.get(trunk, 0), self.in_flight[trunk])
+        answered = random.random() < self.answer_rate
+        ring = min(self.ring.sample(), request.ringing_timeout.seconds) if answered else request.ringing_timeout.seconds
+        self.sequential_seconds += ring
+        try:
+            await asyncio.sleep(ring * self.scale)
+        except asyncio.CancelledError:
+            self.in_flight[trunk] -= 1
+            raise
+        if not answered:
+            self.in_flight[trunk] -= 1
+            raise api.TwirpError("unavailable", "no answer", status=480, metadata={"sip_status_code": "480"})
+        self.answered += 1
+        loop = asyncio.get_running_loop()
+        if self.agents_busy < self.agent_slots:
+            self._set_agents_busy(self.agents_busy + 1)
+            self.rooms[request.room_name] = 2
+            handle = self.handle.sample()
+            self.sequential_seconds += handle
+            loop.call_later(handle * self.scale, self._hang_up, request.room_name, trunk, True)
+        else:
+            self.abandoned += 1
+            self.rooms[request.room_name] = 1
+            loop.call_later(self.patience * self.scale, self._hang_up, request.room_name, trunk, False)
+        return api.SIPParticipantInfo(room_name=request.room_name)
+
+    def _set_agents_busy(self, busy):
+        now = time.perf_counter()
+        self.agent_seconds += self.agents_busy * (now - self.agents_changed)
+        self.agents_changed = now
+        self.agents_busy = busy
+
+    def _hang_up(self, room, trunk, had_agent):
+        if room in self.rooms:
+            self.rooms[room] = 0
+        self.in_flight[trunk] -= 1
+        if had_agent:
+            self._set_agents_busy(self.agents_busy - 1)
+
+
+class FakeLiveKitAPI:
+    def __init__(self, args):
+        self.sip = FakeSipService(args)
+        self.room = FakeRoomService(self.sip)
+
+
+async def main_async(args, backend):
+    from backend_client import backend_client
+    from dialer import CampaignDialer, parse_trunks
+    from logging_setup import configure_logging
+    from outbox import close_outbox
+    from pacing import PacingController
+    from retry_queue import DEFAULT_POLICIES, RetryPolicy, RetryQueue
+
+    configure_logging()
+    leads = [{"id": f"lead-{i}", "phoneNumber": f"+1555{i:07d}", "name": f"Lead {i}"} for i in range(args.leads)]
+    backend.add_campaign("bench", "You are calling about personal loan options.", leads)
+    await backend.start()
+    lkapi = FakeLiveKitAPI(args)
+    pacing = None
+    if args.pacing:
+        # The controller's windows and thresholds run on the same compressed clock
+        os.environ["PACING_WINDOW"] = str(300 * args.time_scale)
+        os.environ["PACING_ABANDON_SECONDS"] = str(args.abandon_seconds * args.time_scale)
+        pacing = PacingController("bench", agent_slots=args.agent_slots, state_dir=os.environ["PACING_STATE_DIR"])
+    retries = None
+    if args.retries:
+        delay = args.retry_delay * args.time_scale
+        policies = {
+            outcome: RetryPolicy(delay=delay, factor=1, max_attempts=policy.max_attempts)
+            for outcome, policy in DEFAULT_POLICIES.items()
+        }
+        retries = RetryQueue(os.environ["RETRY_QUEUE_PATH"], policies)
+        retries.jitter = 0
+        retries.sync_interval = args.poll_interval * args.time_scale
+    dialer = CampaignDialer(
+        "bench",
+        lkapi,
+        concurrency=args.concurrency,
+        calls_per_second=args.calls_per_second / args.time_scale,
+        trunks=parse_trunks(args.trunks, args.concurrency),
+        pacing=pacing,
+        retries=retries,
+    )
+    dialer.ring_timeout = args.ring_timeout
+    dialer.poll_interval = args.poll_interval * args.time_scale
+
+    started = time.perf_counter()
+    outcomes = await dialer.run()
+    elapsed = time.perf_counter() - started
+    lkapi.sip._set_agents_busy(lkapi.sip.agents_busy)
+    await close_outbox()
+    await backend_client.close()
+    await backend.stop()
+    if retries:
+        retries.close()
+    return outcomes, elapsed, lkapi.sip, dialer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--calls-per-second", type=float, default=5)
+    parser.add_argument("--trunks", default="trunk-a", help="trunk_id=limit,... (no limit: --concurrency)")
+    parser.add_argument("--answer-rate", type=float, default=0.35)
+    parser.add_argument("--ring-time", default="8:0.5", help="time to answer, median:sigma seconds")
+    parser.add_argument("--ring-timeout", type=int, default=30)
+    parser.add_argument("--agent-slots", type=int, default=20, help="simulated agents (concurrent answered calls)")
+    parser.add_argument("--patience", type=float, default=5, help="seconds an answered lead waits for an agent")
+    parser.add_argument("--abandon-seconds", type=float, default=3, help="PACING_ABANDON_SECONDS")
+    parser.add_argument("--pacing", action="store_true", help="pace with PacingController")
+    parser.add_argument("--retries", action="store_true", help="redial through a RetryQueue")
+    parser.add_argument("--retry-delay", type=float, default=600, help="seconds between attempts with --retries")
+    parser.add_argument("--handle-time", default="90:0.6", help="answered call length, median:sigma seconds")
+    parser.add_argument("--poll-interval", type=float, default=2)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="multiplier applied to every duration")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="agent-dialer-bench-") as workdir:
+        port = free_port()
+        configure_environment(port, workdir)
+        os.environ["LOG_LEVEL"] = "ERROR"
+        os.environ["PACING_STATE_DIR"] = os.path.join(workdir, "pacing")
+        os.environ["RETRY_QUEUE_PATH"] = os.path.join(workdir, "retries.db")
+        os.environ["RETRY_CALL_HOURS"] = "0-24"
+        backend = MockBackend(port)
+        outcomes, elapsed, sip, dialer = asyncio.run(main_async(args, backend))
+
+    simulated = elapsed / args.time_scale
+    print(f"leads:               {args.leads} (concurrency {args.concurrency}, {args.calls_per_second} cps, trunks {dialer.trunks.limits})")
+    print(f"outcomes:            {outcomes}")
+    print(f"agents:              {args.agent_slots}, utilization {sip.agent_seconds / (args.agent_slots * elapsed):.1%}, "
+          f"abandoned {sip.abandoned}/{sip.answered} answered ({sip.abandoned / max(1, sip.answered):.1%})")
+    if dialer.pacing:
+        state = dialer.pacing.snapshot()
+        print(f"pacing:              answer rate {state['answer_rate']:.2f}, over-dial {state['overdial']}, "
+              f"measured abandon rate {state['abandon_rate']:.1%}")
+    print(f"dial attempts:       {sip.dialed} for {args.leads} leads")
+    print(f"simulated wall time: {simulated / 3600:.2f} h ({args.leads / simulated:.2f} calls/s)")
+    print(f"one at a time:       {sip.sequential_seconds / 3600:.2f} h ({sip.sequential_seconds / simulated:.1f}x slower)")
+    print(f"peak calls by trunk: {sip.peak_in_flight}")
+    print(f"room list requests:  {sip.list_calls}")
+    print(f"backend requests:    {sum(e['requests'] for e in backend.snapshot().values())}")
+    print(f"10k leads, projected: {10000 / args.leads * simulated / 3600:.1f} h")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Accuracy and speed of the compiled intent matcher vs the old substring scan.
+
+Usage:
+    python benchmarks/bench_intent_matcher.py [--iterations 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_matcher import get_intent_matcher
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "intent_labels.jsonl")
+
+
+def legacy_classify(transcript: str):
+    """The substring scan analyze_loan_interest used before the compiled matcher."""
+    transcript_lower = transcript.lower()
+    interested_keywords = [
+        "yes", "interested", "need money", "need loan", "want loan",
+        "looking for", "definitely", "absolutely", "tell me more",
+        "how much", "what rates", "when can", "sign me up"
+    ]
+    not_interested_keywords = [
+        "no", "not interested", "don't need", "no thanks",
+        "not looking", "already have", "not right now", "remove me",
+        "don't call", "not a good time", "hang up"
+    ]
+    callback_keywords = [
+        "call back", "call later", "not a good time", "busy right now",
+        "try again", "different time", "later today", "tomorrow"
+    ]
+    if any(keyword in transcript_lower for keyword in interested_keywords):
+        return "INTERESTED"
+    elif any(keyword in transcript_lower for keyword in not_interested_keywords):
+        return "NOT_INTERESTED"
+    elif any(keyword in transcript_lower for keyword in callback_keywords):
+        return "CALLBACK_REQUESTED"
+    return None
+
+
+def load_fixture():
+    with open(FIXTURE) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def accuracy(classify, samples):
+    misses = []
+    for sample in samples:
+        predicted = classify(sample["text"]) or "UNKNOWN"
+        if predicted != sample["label"]:
+            misses.append((sample["text"], sample["label"], predicted))
+    return 1 - len(misses) / len(samples), misses
+
+
+def time_per_call(classify, samples, iterations):
+    texts = [sample["text"] for sample in samples]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            classify(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    samples = load_fixture()
+    matcher = get_intent_matcher()
+
+    for name, classify in (("legacy substring", legacy_classify), ("compiled matcher", matcher.classify)):
+        acc, misses = accuracy(classify, samples)
+        micros = time_per_call(classify, samples, args.iterations)
+        print(f"{name:18s} accuracy {acc:6.1%} ({len(samples) - len(misses)}/{len(samples)})  {micros:6.2f} us/utterance")
+        if args.show_misses:
+            for text, label, predicted in misses:
+                print(f"    {text!r}: expected {label}, got {predicted}")
+
+
+if __name__ == "__main__":
+    main()
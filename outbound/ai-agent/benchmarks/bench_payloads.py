@@ -0,0 +1,147 @@
+"""Bytes and encode time of the end-of-call payloads, per call.
+
+Replays the scripted conversations in fixtures/call_scripts.jsonl (each
+repeated --repeat times, to stand in for longer calls) into a CallRecord,
+then builds the three end-of-call writes (the call_completed realtime
+event, the lead status update and saveConversation) two ways:
+
+- legacy: the payloads as sent before serialization.py, embedding the full
+  transcript and lead_data, encoded with stdlib json (json.dumps with
+  default separators, as aiohttp's json= did; outbox writes also
+  round-tripped through json.loads before sending)
+- compact: the current payloads (no transcript, no lead_data), encoded
+  with serialization.dumps, plain and with each available codec (applied
+  here whatever the body size; the client skips bodies under
+  BACKEND_COMPRESSION_MIN_BYTES)
+
+Usage:
+    python benchmarks/bench_payloads.py --repeat 1
+    python benchmarks/bench_payloads.py --repeat 20 --rounds 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "call_scripts.jsonl")
+
+LEAD_DATA = {"name": "Jordan Example", "email": "jordan@example.com", "phone": "+15550000000",
+             "call_count": 2, "source": "spring_campaign"}
+
+
+def build_record(script, repeat, workdir):
+    from call_record import CallRecord
+    record = CallRecord("bench-campaign", f"lead-{script['name']}", workdir)
+    # Keep the whole call in memory so spilling doesn't skew encode times
+    record.transcript.limit = 1_000_000
+    for _ in range(repeat):
+        for text in script["turns"]:
+            record.transcript.append("Customer", text)
+            record.transcript.append("Agent", f"Thanks for letting me know. You said: {text[:40]}. Could you tell me a bit more?")
+    record.set_status("COMPLETED", 25 * len(script["turns"]) * repeat, f"Call ended: {script['outcome']}")
+    record.set_interest(script["outcome"], "Scripted outcome")
+    record.add_note("loan_amount", "15000")
+    return record
+
+
+def end_of_call(record, script, legacy):
+    """The end-of-call writes as (name, payload, via_outbox)."""
+    outcome = script["outcome"]
+    summary = f"Scripted call ({script['name']})"
+    final_results = {
+        "outcome": outcome,
+        "summary": summary,
+        "call_status": record.call_status,
+        "interest_status": record.interest_level,
+        "call_duration": record.call_duration,
+        "conversation_data": record.to_dict(transcript=legacy),
+    }
+    if legacy:
+        final_results["lead_data"] = LEAD_DATA
+    results = {"outcome": outcome, "summary": summary, "data": record.to_dict(transcript=legacy),
+               "final_state": "qualification"}
+    event = {"event_type": "call_completed", "campaign_id": "bench-campaign", "lead_id": "lead-1",
+             "timestamp": "2024-01-15T10:00:00", "data": final_results}
+    return [
+        ("realtime call_completed", {"events": [event]}, False),
+        ("updateLeadStatus", {"leadId": "lead-1", "campaignId": "bench-campaign", "status": outcome,
+                              "data": final_results}, True),
+        ("saveConversation", {"campaignId": "bench-campaign", "leadId": "lead-1", "status": "COMPLETED",
+                              "results": results}, True),
+    ]
+
+
+def encode_legacy(payloads):
+    total = 0
+    for _, payload, via_outbox in payloads:
+        body = json.dumps(payload)
+        if via_outbox:
+            body = json.dumps(json.loads(body))
+        total += len(body.encode("utf-8"))
+    return total
+
+
+def encode_compact(payloads, codec=None):
+    from serialization import compress, dumps
+    total = 0
+    for _, payload, _ in payloads:
+        body = dumps(payload)
+        if codec:
+            body = compress(body, codec)
+        total += len(body)
+    return total
+
+
+def timed(fn, rounds):
+    """Median seconds per call of fn() over `rounds` runs, and its result."""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1, help="times each script's turns are replayed")
+    parser.add_argument("--rounds", type=int, default=100, help="encode runs per call for timing")
+    args = parser.parse_args()
+
+    import serialization
+    codecs = ["gzip"] + (["zstd"] if serialization.zstandard is not None else [])
+    encoder = "orjson" if serialization.orjson is not None else "stdlib json"
+    with open(FIXTURE) as f:
+        scripts = [json.loads(line) for line in f if line.strip()]
+
+    rows = {"legacy (json)": [], f"compact ({encoder})": []}
+    rows.update({f"compact + {codec}": [] for codec in codecs})
+    with tempfile.TemporaryDirectory(prefix="agent-payload-bench-") as workdir:
+        for script in scripts:
+            record = build_record(script, args.repeat, workdir)
+            # Building the payloads (to_dict) is part of the per-call cost
+            rows["legacy (json)"].append(timed(lambda: encode_legacy(end_of_call(record, script, True)), args.rounds))
+            rows[f"compact ({encoder})"].append(
+                timed(lambda: encode_compact(end_of_call(record, script, False)), args.rounds))
+            for codec in codecs:
+                rows[f"compact + {codec}"].append(
+                    timed(lambda: encode_compact(end_of_call(record, script, False), codec), args.rounds))
+
+    turns = statistics.mean(len(script["turns"]) * args.repeat for script in scripts)
+    print(f"calls: {len(scripts)} scripts, {turns:.0f} lead turns per call on average (--repeat {args.repeat})")
+    print(f"{'encoding':<22} {'bytes/call':>11} {'vs legacy':>10} {'encode µs/call':>15}")
+    legacy_bytes = statistics.mean(size for _, size in rows["legacy (json)"])
+    for name, results in rows.items():
+        size = statistics.mean(size for _, size in results)
+        seconds = statistics.mean(seconds for seconds, _ in results)
+        print(f"{name:<22} {size:>11.0f} {size / legacy_bytes:>9.1%} {seconds * 1e6:>15.0f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
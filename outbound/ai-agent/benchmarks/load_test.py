@@ -0,0 +1,226 @@
+"""Offline concurrent-call load test for CampaignAgent.
+
+Drives N simulated calls through CampaignAgent with no LiveKit server, no
+OpenAI and no web UI: each call gets a fake room carrying the usual
+campaign metadata, a scripted transcript from fixtures/call_scripts.jsonl,
+and stub LLM/TTS stages whose latencies are drawn from lognormal
+distributions. Backend writes go to the local mock backend
+(benchmarks/mock_backend.py) on 127.0.0.1, which counts them.
+
+Per turn the harness does what the session does around the model: save the
+lead's transcript, run interest analysis, wait for the stub LLM and the
+stub TTS's first audio (the turn latency), then save the agent's reply.
+Calls end through end_call, or a lead hang-up (raising both disconnect events)
+for scripts marked so.
+
+Usage:
+    python benchmarks/load_test.py --calls 200 --concurrency 50
+    python benchmarks/load_test.py --llm-latency 0.8:0.5 --tts-latency 0.2:0.3 --think-time 0.2:0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+import psutil
+
+from mock_backend import LatencyDistribution, MockBackend
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "call_scripts.jsonl")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def configure_environment(port: int, workdir: str) -> None:
+    """Point the agent's backend, outbox and metrics at local throwaway locations.
+
+    Must run before the agent modules are imported: they read these at import.
+    """
+    os.environ["NEXT_PUBLIC_API_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["OUTBOX_PATH"] = os.path.join(workdir, "outbox.db")
+    os.environ["LATENCY_METRICS_DIR"] = os.path.join(workdir, "metrics")
+    os.environ["WORKER_LOAD_DIR"] = os.path.join(workdir, "load")
+    os.environ["TTS_CACHE_DIR"] = os.path.join(workdir, "tts_cache")
+    # Retry failed outbox writes quickly so the end-of-run drain can finish them
+    os.environ.setdefault("OUTBOX_BACKOFF_BASE", "0.05")
+    os.environ.setdefault("OUTBOX_BACKOFF_MAX", "0.5")
+
+
+class StubLLM:
+    def __init__(self, latency: LatencyDistribution):
+        self.latency = latency
+
+    async def reply(self, user_text: str) -> str:
+        await asyncio.sleep(self.latency.sample())
+        return f"Thanks for letting me know. You said: {user_text[:40]}. Could you tell me a bit more?"
+
+
+class StubTTS:
+    def __init__(self, latency: LatencyDistribution):
+        self.latency = latency
+
+    async def first_audio(self, text: str) -> None:
+        await asyncio.sleep(self.latency.sample())
+
+
+class FakeRoom:
+    """The parts of rtc.Room the call setup reads: name and JSON metadata."""
+
+    def __init__(self, index: int, script: dict):
+        self.name = f"campaign-loadtest-{index}"
+        self.metadata = json.dumps({
+            "campaignId": "loadtest",
+            "leadId": f"lead-{index}",
+            "script": "You are calling about personal loan options.",
+            "leadData": {"name": f"Lead {index}", "phone": f"+1555{index:07d}", "scenario": script["name"]},
+        })
+
+
+async def run_call(index, script, llm, tts, think_time, results):
+    from campaign_agent import CampaignAgent
+
+    room = FakeRoom(index, script)
+    metadata = json.loads(room.metadata)
+    agent = CampaignAgent(metadata["campaignId"], metadata["leadId"], metadata["script"], metadata["leadData"])
+
+    started = time.perf_counter()
+    # Tools take the RunContext first, as the session passes it
+    await agent.update_call_status(None, "ANSWERED", "Call was answered by lead")
+    for text in script["turns"]:
+        await asyncio.sleep(think_time.sample())
+        turn_started = time.perf_counter()
+        await agent.save_conversation_transcript("Customer", text)
+        await agent.analyze_loan_interest(text)
+        reply = await llm.reply(text)
+        await tts.first_audio(reply)
+        results["turn_latencies"].append(time.perf_counter() - turn_started)
+        await agent.save_agent_response(reply)
+
+    if script["hangup"]:
+        # A hang-up raises both the participant and the room disconnect event
+        await asyncio.gather(
+            agent.handle_participant_disconnect(f"sip-lead-{index}", "participant_left"),
+            agent.handle_participant_disconnect("unknown_participant", "room_disconnected: hangup"),
+        )
+    else:
+        await agent.end_call(None, script["outcome"], f"Load test call ({script['name']})")
+    results["call_seconds"].append(time.perf_counter() - started)
+    results["turns"] += len(script["turns"])
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def sample_memory(process, state, stop):
+    while not stop.is_set():
+        state["peak_rss"] = max(state["peak_rss"], process.memory_info().rss)
+        state["peak_calls"] = max(state["peak_calls"], state["active_calls"])
+        try:
+            await asyncio.wait_for(stop.wait(), 0.05)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main_async(args, backend):
+    from campaign_agent import shutdown_backend
+    from outbox import Outbox
+
+    with open(FIXTURE) as f:
+        scripts = [json.loads(line) for line in f if line.strip()]
+
+    llm = StubLLM(LatencyDistribution(args.llm_latency))
+    tts = StubTTS(LatencyDistribution(args.tts_latency))
+    think_time = LatencyDistribution(args.think_time)
+    results = {"turn_latencies": [], "call_seconds": [], "turns": 0}
+
+    await backend.start()
+    process = psutil.Process()
+    memory = {"peak_rss": 0, "peak_calls": 0, "active_calls": 0}
+    baseline_rss = process.memory_info().rss
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_memory(process, memory, stop))
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(index):
+        async with semaphore:
+            memory["active_calls"] += 1
+            try:
+                await run_call(index, scripts[index % len(scripts)], llm, tts, think_time, results)
+            finally:
+                memory["active_calls"] -= 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(args.calls)))
+    elapsed = time.perf_counter() - started
+
+    # Deliver everything still queued in the event bus and outbox before counting
+    await shutdown_backend()
+    results["outbox_pending"] = Outbox().pending_count()
+    stop.set()
+    await sampler
+    await backend.stop()
+    return results, elapsed, memory, baseline_rss
+
+
+def report(args, results, elapsed, memory, baseline_rss, backend):
+    latencies = sorted(results["turn_latencies"])
+    stats = backend.snapshot()
+    total_requests = sum(endpoint["requests"] for endpoint in stats.values())
+    total_bytes = sum(endpoint["bytes_in"] for endpoint in stats.values())
+    print(f"calls:               {args.calls} (concurrency {args.concurrency})")
+    print(f"wall time:           {elapsed:.2f} s")
+    print(f"throughput:          {args.calls / elapsed:.2f} calls/s, {results['turns'] / elapsed:.1f} turns/s")
+    print("turn latency:        " + ", ".join(
+        f"p{p}={percentile(latencies, p) * 1000:.0f}ms" for p in (50, 90, 95, 99)
+    ) + f", max={latencies[-1] * 1000:.0f}ms")
+    if memory["peak_calls"]:
+        per_call = (memory["peak_rss"] - baseline_rss) / memory["peak_calls"]
+        print(f"memory per call:     {per_call / 1024:.0f} KiB (peak RSS {memory['peak_rss'] / 1024 / 1024:.1f} MiB, {memory['peak_calls']} concurrent)")
+    print(f"backend requests:    {total_requests / args.calls:.2f} per call, {total_bytes / args.calls / 1024:.1f} KiB per call")
+    for name, endpoint in sorted(stats.items(), key=lambda item: -item[1]["requests"]):
+        print(f"  {name:<35} {endpoint['requests'] / args.calls:.2f}/call, {endpoint['errors']} errors, peak {endpoint['max_in_flight']} in flight")
+    print(f"outbox pending:      {results['outbox_pending']} after drain")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", default="0.5:0.35", help="median:sigma seconds")
+    parser.add_argument("--tts-latency", default="0.15:0.3", help="median:sigma seconds")
+    parser.add_argument("--think-time", default="0.3:0.5", help="lead pause before each turn, median:sigma seconds")
+    parser.add_argument("--backend-latency", default="0.005:0.3", help="mock backend latency, median:sigma seconds")
+    parser.add_argument("--backend-error-rate", type=float, default=0.0, help="fraction of backend requests failed with a 5xx")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="keep the agent's INFO logs")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="agent-loadtest-") as workdir:
+        port = free_port()
+        configure_environment(port, workdir)
+        os.environ["LOG_LEVEL"] = "INFO" if args.verbose else "WARNING"
+
+        backend = MockBackend(port, latency=args.backend_latency, error_rate=args.backend_error_rate)
+        results, elapsed, memory, baseline_rss = asyncio.run(main_async(args, backend))
+        report(args, results, elapsed, memory, baseline_rss, backend)
+
+
+if __name__ == "__main__":
+    main()
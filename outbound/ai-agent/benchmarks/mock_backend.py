@@ -0,0 +1,279 @@
+"""Local stand-in for the web UI's tRPC/REST endpoints the agent calls.
+
+Implements the agent-facing procedures with the same response shapes as
+web-ui/src/server/api/routers/campaign.ts (appendTranscript keeps a real
+per-lead transcript tail). Like the real superjson router, tRPC inputs
+must be wrapped in {"json": ...}; a bare payload gets a 400. Plus:
+
+- latency per endpoint, lognormal "median:sigma" seconds
+- error injection: a fraction of requests answered with a 5xx
+- per-endpoint counters: requests, errors, bytes in/out, in-flight and
+  peak concurrency, duplicate Idempotency-Key deliveries
+
+campaign.getDetails and campaign.getScript serve campaigns loaded with
+add_campaign(), and campaign.updateLeadStatus updates their leads, so the
+dialer and the script registry can run against it.
+
+With accept_encoding (--accept-encoding gzip,zstd) every response
+advertises those request body encodings, as RFC 7694 allows (aiohttp
+decodes the bodies); bodies in any other encoding are refused with a 415.
+bytes_in counts bytes on the wire.
+
+GET /__stats returns the counters as JSON, POST /__reset clears them.
+
+Usage:
+    python benchmarks/mock_backend.py --port 3025 --latency 0.05:0.5 --error-rate 0.02
+    python benchmarks/mock_backend.py --endpoint-latency campaign.appendTranscript=0.4:0.3 \\
+        --endpoint-errors campaign.realtimeUpdate=0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+from collections import defaultdict
+
+from aiohttp import web
+
+class LatencyDistribution:
+    """Lognormal latency given as "median:sigma" seconds (e.g. "0.6:0.4")."""
+
+    def __init__(self, spec: str = "0"):
+        median, _, sigma = spec.partition(":")
+        self.median = float(median)
+        self.sigma = float(sigma or 0)
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return random.lognormvariate(0, self.sigma) * self.median if self.sigma else self.median
+
+
+class EndpointStats:
+    __slots__ = ("requests", "errors", "bytes_in", "bytes_out", "in_flight", "max_in_flight", "duplicate_keys")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.duplicate_keys = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def endpoint_name(path: str) -> str:
+    """Counter name for a path: the procedure name for tRPC, else the path."""
+    return path.rsplit("/", 1)[-1] if path.startswith("/api/trpc/") else path
+
+
+class MockBackend:
+    """In-process mock of the agent-facing backend, served with aiohttp."""
+
+    def __init__(self, port: int, latency: str = "0", error_rate: float = 0.0,
+                 endpoint_latency: dict = None, endpoint_errors: dict = None, error_status: int = 503,
+                 accept_encoding: str = None):
+        self.port = port
+        self.latency = LatencyDistribution(latency)
+        self.error_rate = error_rate
+        self.endpoint_latency = {name: LatencyDistribution(spec) for name, spec in (endpoint_latency or {}).items()}
+        self.endpoint_errors = endpoint_errors or {}
+        self.error_status = error_status
+        self.accept_encoding = accept_encoding
+        self.stats = defaultdict(EndpointStats)
+        self.transcripts = defaultdict(list)
+        self.idempotency_keys = set()
+        self.campaigns = {}
+        self.runner = None
+
+        self.app = web.Application(client_max_size=16 * 1024 * 1024)
+        self.app.router.add_get("/__stats", self.stats_view)
+        self.app.router.add_post("/__reset", self.reset_view)
+        self.app.router.add_post("/api/trpc/campaign.appendTranscript", self.endpoint(self.append_transcript))
+        self.app.router.add_post("/api/trpc/campaign.saveConversation", self.endpoint(self.success))
+        self.app.router.add_post("/api/trpc/campaign.realtimeUpdate", self.endpoint(self.realtime_update))
+        self.app.router.add_post("/api/trpc/campaign.updateLeadStatus", self.endpoint(self.update_lead_status))
+        self.app.router.add_get("/api/trpc/campaign.getDetails", self.endpoint(self.get_details))
+        self.app.router.add_get("/api/trpc/campaign.getScript", self.endpoint(self.get_script))
+        self.app.router.add_post("/api/trpc/campaign.handleCallHangup", self.endpoint(self.success))
+        self.app.router.add_post("/api/campaign/updateLeadStatus", self.endpoint(self.rest_success))
+        self.app.router.add_route("*", "/{tail:.*}", self.endpoint(self.not_found))
+
+    def endpoint(self, handler):
+        """Wrap a handler with accounting, latency and error injection."""
+        async def wrapped(request):
+            name = endpoint_name(request.path)
+            stats = self.stats[name]
+            body = await request.read()
+            stats.requests += 1
+            stats.bytes_in += request.content_length or len(body)
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            key = request.headers.get("Idempotency-Key")
+            if key:
+                if key in self.idempotency_keys:
+                    stats.duplicate_keys += 1
+                self.idempotency_keys.add(key)
+            try:
+                await asyncio.sleep(self.endpoint_latency.get(name, self.latency).sample())
+                if random.random() < self.endpoint_errors.get(name, self.error_rate):
+                    stats.errors += 1
+                    response = web.json_response({"error": {"message": "injected failure"}}, status=self.error_status)
+                else:
+                    encoding = request.headers.get("Content-Encoding")
+                    if encoding and encoding not in (self.accept_encoding or "").split(","):
+                        response = web.json_response({"error": {"message": f"Unsupported encoding {encoding}"}}, status=415)
+                    else:
+                        if body:
+                            payload = json.loads(body)
+                        else:
+                            # tRPC queries carry superjson input in the query string
+                            payload = {"json": json.loads(request.query.get("input", "{}")).get("json", {})}
+                        if request.path.startswith("/api/trpc/"):
+                            # superjson reads the input from "json"; without it the
+                            # real router sees undefined and zod rejects it
+                            if not isinstance(payload, dict) or not isinstance(payload.get("json"), dict):
+                                response = web.json_response({"error": {"message": "Invalid input"}}, status=400)
+                            else:
+                                response = handler(payload["json"])
+                        else:
+                            response = handler(payload)
+                    if response.status >= 400:
+                        stats.errors += 1
+                if self.accept_encoding:
+                    response.headers["Accept-Encoding"] = self.accept_encoding
+                stats.bytes_out += len(response.body or b"")
+                return response
+            finally:
+                stats.in_flight -= 1
+        return wrapped
+
+    @staticmethod
+    def trpc(result: dict) -> web.Response:
+        return web.json_response({"result": {"data": {"json": result}}})
+
+    def success(self, payload: dict) -> web.Response:
+        return self.trpc({"success": True})
+
+    def rest_success(self, payload: dict) -> web.Response:
+        return web.json_response({"success": True})
+
+    def not_found(self, payload: dict) -> web.Response:
+        return web.json_response({"error": {"message": "No procedure found"}}, status=404)
+
+    def realtime_update(self, payload: dict) -> web.Response:
+        events = payload.get("events") or [payload]
+        return self.trpc({"success": True, "processed": len(events)})
+
+    def add_campaign(self, campaign_id: str, script: str, leads: list) -> None:
+        """Serve a campaign; leads are dicts with id and phoneNumber (status defaults to PENDING)."""
+        self.campaigns[campaign_id] = {
+            "id": campaign_id,
+            "script": script,
+            "leads": {lead["id"]: {"status": "PENDING", **lead} for lead in leads},
+        }
+
+    def get_details(self, payload: dict) -> web.Response:
+        campaign = self.campaigns.get(payload.get("id"))
+        if campaign is None:
+            return self.trpc(None)
+        status = payload.get("status")
+        leads = [lead for lead in campaign["leads"].values() if status is None or lead["status"] == status]
+        return self.trpc({"id": campaign["id"], "script": campaign["script"], "leads": leads})
+
+    def get_script(self, payload: dict) -> web.Response:
+        campaign = self.campaigns.get(payload.get("id"))
+        if campaign is None:
+            return self.trpc(None)
+        return self.trpc({"id": campaign["id"], "script": campaign["script"]})
+
+    def update_lead_status(self, payload: dict) -> web.Response:
+        for campaign in self.campaigns.values():
+            lead = campaign["leads"].get(payload.get("id"))
+            if lead is not None:
+                lead["status"] = payload["status"]
+                lead["errorReason"] = payload.get("errorReason")
+        return self.trpc({"success": True})
+
+    def append_transcript(self, payload: dict) -> web.Response:
+        """Same sequencing rules as the real procedure: dedupe overlap, reject gaps."""
+        transcript = self.transcripts[(payload["campaignId"], payload["leadId"])]
+        from_seq = payload["fromSeq"]
+        if from_seq > len(transcript):
+            return self.trpc({"success": False, "nextSeq": len(transcript)})
+        transcript.extend(payload["entries"][len(transcript) - from_seq:])
+        return self.trpc({"success": True, "nextSeq": len(transcript)})
+
+    def snapshot(self) -> dict:
+        return {name: stats.as_dict() for name, stats in sorted(self.stats.items())}
+
+    def reset(self) -> None:
+        self.stats.clear()
+        self.transcripts.clear()
+        self.idempotency_keys.clear()
+        self.campaigns.clear()
+
+    async def stats_view(self, request):
+        return web.json_response(self.snapshot())
+
+    async def reset_view(self, request):
+        self.reset()
+        return web.json_response({"success": True})
+
+    async def start(self) -> None:
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", self.port).start()
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+
+
+def parse_overrides(values) -> dict:
+    overrides = {}
+    for value in values or []:
+        name, _, setting = value.partition("=")
+        overrides[name] = setting
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock tRPC backend for agent benchmarks")
+    parser.add_argument("--port", type=int, default=3025)
+    parser.add_argument("--latency", default="0", help="median:sigma seconds for every endpoint")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--endpoint-latency", action="append", help="name=median:sigma, e.g. campaign.appendTranscript=0.3:0.2")
+    parser.add_argument("--endpoint-errors", action="append", help="name=rate, e.g. campaign.realtimeUpdate=0.1")
+    parser.add_argument("--accept-encoding", help="request body encodings to accept, e.g. gzip,zstd")
+    args = parser.parse_args()
+
+    backend = MockBackend(
+        args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        endpoint_latency=parse_overrides(args.endpoint_latency),
+        endpoint_errors={name: float(rate) for name, rate in parse_overrides(args.endpoint_errors).items()},
+        error_status=args.error_status,
+        accept_encoding=args.accept_encoding,
+    )
+
+    async def serve():
+        await backend.start()
+        print(f"Mock backend listening on http://127.0.0.1:{args.port} (stats at /__stats)")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await backend.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(json.dumps(backend.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
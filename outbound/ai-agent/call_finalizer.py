@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import time
+
+from latency_metrics import latency
+
+logger = logging.getLogger("call-finalizer")
+
+# Finalizations still running in this process, awaited before the backend closes
+_running = set()
+
+
+class FinalWrite:
+    """Progress of one end-of-call write."""
+
+    __slots__ = ("name", "state", "seconds", "error")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "pending"  # pending, done, failed, timed_out
+        self.seconds = None
+        self.error = None
+
+    def as_dict(self) -> dict:
+        return {"state": self.state, "seconds": self.seconds, "error": self.error}
+
+
+class CallFinalizer:
+    """Finalizes a call exactly once, running its end-of-call writes concurrently.
+
+    A call moves open -> finalizing -> finalized. The first begin() claims
+    finalization; any later attempt (a second disconnect event for the same
+    hang-up, end_call racing the hang-up) gets False and does nothing. `key`
+    identifies the finalization to the backend alongside the per-write
+    idempotency keys, so repeats from another worker can be dropped too.
+
+    The writes are independent (dashboard event, lead status, conversation
+    results, hang-up notice, transcript tail), so they start together
+    instead of one after another. Whatever hasn't finished when
+    CALL_FINALIZE_DEADLINE seconds are up is cancelled and marked timed_out;
+    outbox-backed writes are already durable by then and are delivered by
+    the outbox. Progress per write is kept in `writes`.
+    """
+
+    def __init__(self, call: str, key: str, deadline: float = None):
+        self.call = call
+        self.key = key
+        self.deadline = deadline or float(os.getenv("CALL_FINALIZE_DEADLINE", "5"))
+        self.state = "open"  # open, finalizing, finalized
+        self.trigger = None
+        self.duplicates = 0
+        self.writes = {}
+
+    def begin(self, trigger: str) -> bool:
+        """Claim finalization for `trigger`. False if the call is already finalizing or finalized."""
+        if self.state != "open":
+            self.duplicates += 1
+            logger.info("Call %s already %s (%s), ignoring %s", self.call, self.state, self.trigger, trigger)
+            return False
+        self.state = "finalizing"
+        self.trigger = trigger
+        return True
+
+    async def run(self, writes: dict) -> dict:
+        """Run {name: coroutine} concurrently after begin(); returns {name: FinalWrite}.
+
+        Cancelling the caller doesn't cancel the writes.
+        """
+        runner = asyncio.ensure_future(self._run(writes))
+        _running.add(runner)
+        runner.add_done_callback(_running.discard)
+        return await asyncio.shield(runner)
+
+    async def _run(self, writes: dict) -> dict:
+        started = time.perf_counter()
+        tasks = {}
+        for name, coro in writes.items():
+            self.writes[name] = FinalWrite(name)
+            tasks[asyncio.create_task(self._track(self.writes[name], coro, started), name=f"finalize:{name}")] = name
+        if tasks:
+            _, late = await asyncio.wait(tasks, timeout=self.deadline)
+            for task in late:
+                task.cancel()
+                write = self.writes[tasks[task]]
+                write.state = "timed_out"
+                write.seconds = time.perf_counter() - started
+            if late:
+                await asyncio.gather(*late, return_exceptions=True)
+        self.state = "finalized"
+        elapsed = time.perf_counter() - started
+        latency.observe("call_finalize", elapsed)
+        summary = ", ".join(f"{name}={write.state}" for name, write in self.writes.items())
+        log = logger.warning if any(write.state != "done" for write in self.writes.values()) else logger.info
+        log("Call %s finalized (%s) in %.0f ms: %s", self.call, self.trigger, elapsed * 1000, summary)
+        return self.writes
+
+    async def _track(self, write: FinalWrite, coro, started: float) -> None:
+        try:
+            await coro
+            write.state = "done"
+            write.seconds = time.perf_counter() - started
+        except Exception as e:
+            write.state = "failed"
+            write.error = str(e)
+            write.seconds = time.perf_counter() - started
+            logger.error("End-of-call write %s for call %s failed: %s", write.name, self.call, e, exc_info=True)
+
+    def progress(self) -> dict:
+        return {name: write.as_dict() for name, write in self.writes.items()}
+
+
+async def wait_for_finalizers() -> None:
+    """Wait for this process's running finalizations; each is bounded by its own deadline."""
+    if _running:
+        await asyncio.gather(*list(_running), return_exceptions=True)
@@ -0,0 +1,230 @@
+import array
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+from serialization import dumps, loads
+
+logger = logging.getLogger("call-record")
+
+CALL_RECORD_DIR = os.getenv("CALL_RECORD_DIR", "/tmp/livekit_call_records")
+
+# Speaker codes stored per transcript entry; new speakers are interned on first use
+SPEAKERS = ["Customer", "Agent"]
+_speaker_codes = {name: code for code, name in enumerate(SPEAKERS)}
+
+# Phases whose lead responses are counted (the text is already in the transcript)
+PHASES = ("discovery", "qualification", "general")
+
+
+def speaker_code(speaker: str) -> int:
+    code = _speaker_codes.get(speaker)
+    if code is None:
+        if len(SPEAKERS) >= 255:
+            raise ValueError(f"Too many distinct transcript speakers (adding {speaker!r})")
+        code = len(SPEAKERS)
+        SPEAKERS.append(sys.intern(speaker))
+        _speaker_codes[speaker] = code
+    return code
+
+
+def entry_type(speaker: str) -> str:
+    return "customer_message" if speaker == "Customer" else "agent_message"
+
+
+class CallClock:
+    """Monotonic seconds since the call started, rendered as wall-clock ISO strings on output."""
+
+    __slots__ = ("wall", "mono")
+
+    def __init__(self):
+        self.wall = time.time()
+        self.mono = time.monotonic()
+
+    def now(self) -> float:
+        return time.monotonic() - self.mono
+
+    def isoformat(self, offset: float) -> str:
+        return datetime.fromtimestamp(self.wall + offset).isoformat()
+
+
+class Transcript:
+    """Append-only call transcript held in parallel arrays.
+
+    Each entry costs a float offset, a speaker code byte and its text. At
+    most CALL_RECORD_TRANSCRIPT_LIMIT entries stay in memory; beyond that the
+    oldest half is written to a JSON-lines file under CALL_RECORD_DIR and
+    read back only when asked for (a resend of unacknowledged entries, or the
+    full transcript at the end of the call). Sequence numbers count every
+    entry of the call, spilled or not.
+    """
+
+    def __init__(self, clock: CallClock, spill_path: str, limit: int = None):
+        self.clock = clock
+        self.spill_path = spill_path
+        self.limit = max(2, limit or int(os.getenv("CALL_RECORD_TRANSCRIPT_LIMIT", "200")))
+        # Sequence number of the first entry still in memory
+        self.base = 0
+        self.offsets = array.array("d")
+        self.speakers = array.array("B")
+        self.texts = []
+
+    def __len__(self) -> int:
+        return self.base + len(self.texts)
+
+    def append(self, speaker: str, text: str) -> int:
+        """Add an entry and return its sequence number."""
+        self.offsets.append(self.clock.now())
+        self.speakers.append(speaker_code(speaker))
+        self.texts.append(text)
+        if len(self.texts) > self.limit:
+            self._spill(self.limit // 2)
+        return len(self) - 1
+
+    def _entry(self, index: int) -> dict:
+        speaker = SPEAKERS[self.speakers[index]]
+        return {
+            "timestamp": self.clock.isoformat(self.offsets[index]),
+            "speaker": speaker,
+            "text": self.texts[index],
+            "type": entry_type(speaker),
+        }
+
+    def _spill(self, count: int) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            with open(self.spill_path, "ab") as f:
+                for index in range(count):
+                    f.write(dumps(self._entry(index)) + b"\n")
+        except OSError as e:
+            # Keep everything in memory rather than lose entries
+            logger.error("Failed to spill transcript to %s: %s", self.spill_path, e)
+            return
+        del self.offsets[:count]
+        del self.speakers[:count]
+        del self.texts[:count]
+        self.base += count
+
+    def entries(self, from_seq: int = 0) -> list:
+        """Entries from sequence number `from_seq` on, as the dicts the backend stores."""
+        spilled = []
+        if from_seq < self.base:
+            with open(self.spill_path, "rb") as f:
+                for seq, line in enumerate(f):
+                    if seq >= self.base:
+                        break
+                    if seq >= from_seq:
+                        spilled.append(loads(line))
+        start = max(0, from_seq - self.base)
+        return spilled + [self._entry(index) for index in range(start, len(self.texts))]
+
+    def close(self) -> None:
+        """Remove the spill file; in-memory entries stay readable."""
+        if self.base:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+
+
+class CallRecord:
+    """What a campaign call has collected, in fixed fields instead of an open dict.
+
+    Timestamps are CallClock offsets, status strings are interned, lead
+    responses per phase are counted rather than copied (their text is in the
+    transcript), and free-form notes saved by the model are capped at
+    CALL_RECORD_MAX_NOTES keys, dropping the oldest. to_dict() renders the
+    same shape the backend received as conversation_data before.
+    """
+
+    __slots__ = (
+        "clock", "transcript", "notes", "max_notes", "phase_responses",
+        "call_status", "call_duration", "status_notes", "status_at",
+        "interest_level", "interest_notes", "loan_interest_level", "loan_interest_notes", "interest_at",
+        "transfer_reason", "transfer_at", "callback_scheduled",
+    )
+
+    def __init__(self, campaign_id: str, lead_id: str, record_dir: str = CALL_RECORD_DIR):
+        self.clock = CallClock()
+        spill_path = os.path.join(record_dir, f"{campaign_id}_{lead_id}_{int(self.clock.wall * 1000)}.jsonl")
+        self.transcript = Transcript(self.clock, spill_path)
+        self.notes = {}
+        self.max_notes = int(os.getenv("CALL_RECORD_MAX_NOTES", "50"))
+        self.phase_responses = array.array("I", bytes(4 * len(PHASES)))
+        self.call_status = None
+        self.call_duration = None
+        self.status_notes = None
+        self.status_at = None
+        self.interest_level = None
+        self.interest_notes = None
+        self.loan_interest_level = None
+        self.loan_interest_notes = None
+        self.interest_at = None
+        self.transfer_reason = None
+        self.transfer_at = None
+        self.callback_scheduled = None
+
+    def set_status(self, status: str, duration: int, notes: str) -> None:
+        self.call_status = sys.intern(status)
+        self.call_duration = duration
+        self.status_notes = notes
+        self.status_at = self.clock.now()
+
+    def set_interest(self, level: str, notes: str) -> None:
+        self.interest_level = sys.intern(level)
+        self.interest_notes = notes
+        self.interest_at = self.clock.now()
+
+    def set_loan_interest(self, level: str, notes: str) -> None:
+        self.loan_interest_level = sys.intern(level)
+        self.loan_interest_notes = notes
+        self.interest_at = self.clock.now()
+
+    def set_transfer(self, reason: str) -> None:
+        self.transfer_reason = reason
+        self.transfer_at = self.clock.now()
+
+    def add_note(self, key: str, value: str) -> None:
+        self.notes.pop(key, None)
+        if len(self.notes) >= self.max_notes:
+            self.notes.pop(next(iter(self.notes)))
+        self.notes[key] = value
+
+    def count_response(self, phase: str) -> int:
+        """Count a lead response in `phase` and return the phase's total."""
+        index = PHASES.index(phase)
+        self.phase_responses[index] += 1
+        return self.phase_responses[index]
+
+    def to_dict(self, transcript: bool = True) -> dict:
+        """Render the record; without the transcript, only its entry count is included."""
+        if transcript:
+            data = {"transcript": self.transcript.entries()}
+        else:
+            data = {"transcript_entries": len(self.transcript)}
+        data.update(self.notes)
+        fields = {
+            "call_status": self.call_status,
+            "call_duration": self.call_duration,
+            "status_notes": self.status_notes,
+            "interest_level": self.interest_level,
+            "interest_notes": self.interest_notes,
+            "loan_interest_level": self.loan_interest_level,
+            "loan_interest_notes": self.loan_interest_notes,
+            "transfer_reason": self.transfer_reason,
+            "callback_scheduled": self.callback_scheduled,
+        }
+        data.update((key, value) for key, value in fields.items() if value is not None)
+        for key, offset in (("status_timestamp", self.status_at), ("interest_timestamp", self.interest_at),
+                            ("transfer_timestamp", self.transfer_at)):
+            if offset is not None:
+                data[key] = self.clock.isoformat(offset)
+        responses = {phase: count for phase, count in zip(PHASES, self.phase_responses) if count}
+        if responses:
+            data["phase_responses"] = responses
+        return data
+
+    def close(self) -> None:
+        self.transcript.close()
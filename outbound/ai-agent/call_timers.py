@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger("call-timers")
+
+
+class SilenceMonitor:
+    """Per-call dead-air detection driven by speech events.
+
+    Deadlines are loop.call_later() timers, i.e. entries in the event loop's
+    own timer heap that every call in the worker shares, and are re-armed on
+    speech activity instead of being polled:
+
+    - silence: the floor has been open (nobody speaking) for silence_timeout
+      seconds. Re-armed whenever the agent or the lead stops speaking.
+    - stall: the lead hasn't spoken for stall_timeout seconds, however much
+      the agent has talked. Re-armed only when the lead stops speaking.
+    """
+
+    def __init__(self, on_silence, on_stall, silence_timeout=None, stall_timeout=None):
+        self.on_silence = on_silence
+        self.on_stall = on_stall
+        self.silence_timeout = silence_timeout or float(os.getenv("SILENCE_TIMEOUT", "10"))
+        self.stall_timeout = stall_timeout or float(os.getenv("STALL_TIMEOUT", "45"))
+        self._silence_timer = None
+        self._stall_timer = None
+        self._tasks = set()
+        self._stopped = False
+
+    def start(self) -> None:
+        """Arm both deadlines, e.g. once the greeting has been spoken."""
+        self._arm_silence()
+        self._arm_stall()
+
+    def user_speaking(self) -> None:
+        self._cancel_silence()
+        self._cancel_stall()
+
+    def user_stopped(self) -> None:
+        self._arm_silence()
+        self._arm_stall()
+
+    def agent_speaking(self) -> None:
+        self._cancel_silence()
+
+    def agent_stopped(self) -> None:
+        self._arm_silence()
+
+    def stop(self) -> None:
+        """Cancel all deadlines and any callback still running."""
+        self._stopped = True
+        self._cancel_silence()
+        self._cancel_stall()
+        for task in self._tasks:
+            task.cancel()
+
+    def _arm_silence(self) -> None:
+        self._cancel_silence()
+        if not self._stopped:
+            self._silence_timer = asyncio.get_running_loop().call_later(
+                self.silence_timeout, self._fire, self.on_silence, "silence"
+            )
+
+    def _arm_stall(self) -> None:
+        self._cancel_stall()
+        if not self._stopped:
+            self._stall_timer = asyncio.get_running_loop().call_later(
+                self.stall_timeout, self._fire, self.on_stall, "stall"
+            )
+
+    def _cancel_silence(self) -> None:
+        if self._silence_timer is not None:
+            self._silence_timer.cancel()
+            self._silence_timer = None
+
+    def _cancel_stall(self) -> None:
+        if self._stall_timer is not None:
+            self._stall_timer.cancel()
+            self._stall_timer = None
+
+    def _fire(self, callback, kind: str) -> None:
+        if self._stopped:
+            return
+        logger.info("Call %s deadline reached", kind)
+        task = asyncio.create_task(callback())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+class ActionScheduler:
+    """Per-call follow-up actions, run after a delay outside the turn pipeline.
+
+    schedule() arms a loop.call_later() timer and returns immediately, so a
+    turn handler never sleeps before acting. Actions are named: scheduling
+    a name that is already pending or has already fired is a no-op, so e.g.
+    a transfer fires at most once per call. Pending actions are cancelled
+    when the lead speaks again, leaving the next turn to decide afresh; an
+    action that has fired runs to completion in its own task.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._fired = set()
+        self._tasks = set()
+        self._stopped = False
+
+    def schedule(self, name: str, delay: float, action) -> bool:
+        """Run `action()` (a coroutine function) in `delay` seconds. Returns False if deduplicated."""
+        if self._stopped or name in self._pending or name in self._fired:
+            return False
+        self._pending[name] = asyncio.get_running_loop().call_later(delay, self._fire, name, action)
+        logger.info("Scheduled %s in %.1fs", name, delay)
+        return True
+
+    def cancel_pending(self, reason: str) -> None:
+        """Cancel every action that hasn't fired yet."""
+        for name, timer in self._pending.items():
+            timer.cancel()
+            logger.info("Cancelled scheduled %s: %s", name, reason)
+        self._pending.clear()
+
+    def stop(self) -> None:
+        """Cancel pending actions and refuse new ones; actions already running finish."""
+        self._stopped = True
+        self.cancel_pending("call ended")
+
+    def _fire(self, name: str, action) -> None:
+        self._pending.pop(name, None)
+        if self._stopped:
+            return
+        self._fired.add(name)
+        task = asyncio.create_task(self._run(name, action))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, name: str, action) -> None:
+        try:
+            await action()
+        except Exception as e:
+            logger.error("Scheduled %s failed: %s", name, e, exc_info=True)
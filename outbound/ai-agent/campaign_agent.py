@@ -1,5 +1,4 @@
 from dotenv import load_dotenv
-import aiohttp
 import json
 import logging
 import os
@@ -9,40 +8,32 @@ from openai import AsyncOpenAI
 from livekit.api import AccessToken, VideoGrants
 from livekit import agents
 from livekit.agents import Agent, RoomInputOptions, function_tool, RunContext, AgentSession
+from livekit.agents import metrics as agent_metrics
 from livekit.plugins import openai
 import asyncio
+import threading
+import time
 from health_server import HealthCheckServer
+from backend_client import backend_client, trpc_input, trpc_result
+from realtime_events import get_event_bus, close_event_bus, spool_only, start_worker_event_bus
+from outbox import get_outbox, close_outbox, enqueue_only, start_worker_flusher
+from call_finalizer import CallFinalizer, wait_for_finalizers
+from retry_queue import get_retry_queue
+from script_registry import ScriptRegistry
+from intent_matcher import get_intent_matcher
+from openai_health import OpenAIHealthProber, read_cached_verdict
+from call_timers import ActionScheduler, SilenceMonitor
+from call_record import CallRecord
+from logging_setup import bind_call, configure_logging
+from tts_cache import tts_cache
+from latency_metrics import latency
+from worker_load import JobLoadReporter, worker_load
+from loop_monitor import start_loop_monitor
 load_dotenv()
 
-# Custom formatter for colored logs
-class ColoredFormatter(logging.Formatter):
-    """Custom formatter to add colors to log levels"""
-    green = '\033[92m'
-    red = '\033[91m'
-    yellow = '\033[93m'
-    reset = '\033[0m'
-    
-    def format(self, record):
-        if record.levelno == logging.INFO:
-            record.msg = f"{self.green}{record.msg}{self.reset}"
-        elif record.levelno == logging.WARNING:
-            record.msg = f"{self.yellow}{record.msg}{self.reset}"
-        elif record.levelno >= logging.ERROR:
-            record.msg = f"{self.red}{record.msg}{self.reset}"
-        return super().format(record)
-
-# Set up logging with custom formatter
+# Formatting and output happen on a background thread, see logging_setup
+configure_logging()
 logger = logging.getLogger("campaign-agent")
-handler = logging.StreamHandler()
-handler.setFormatter(ColoredFormatter('%(message)s'))
-logger.addHandler(handler)
-logger.setLevel(logging.INFO)
-
-# Get API URL from environment variable or default to localhost:3010
-API_URL = os.getenv("NEXT_PUBLIC_API_URL", "http://localhost:3025")
-
-# Initialize AsyncOpenAI client
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 def create_token(room_name: str, identity: str) -> str:
     """Create a token with the necessary permissions."""
@@ -65,58 +56,126 @@ def create_token(room_name: str, identity: str) -> str:
     
     return at.to_jwt()
 
-async def check_openai_credits():
-    """Check OpenAI API key and credits."""
-    logger.info("Checking OpenAI API key and credits...")
-    try:
-        # Try a simple API call to check if the key is valid and has credits
-        await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": "test"}],
-            max_tokens=1
-        )
-        logger.info("OpenAI API check successful - key is valid and has credits")
-        return True, None
-    except Exception as e:
-        error_msg = str(e)
-        if "authentication" in error_msg.lower():
-            logger.error(f"OpenAI Authentication Error: {error_msg}")
-            return False, "OpenAI API key is invalid or not set"
-        elif "rate limit" in error_msg.lower():
-            logger.error(f"OpenAI Rate Limit Error (possible insufficient funds): {error_msg}")
-            return False, "OpenAI rate limit exceeded - possible insufficient funds"
-        else:
-            logger.error(f"Unexpected OpenAI API Error: {error_msg}", exc_info=True)
-            return False, f"OpenAI API error: {error_msg}"
+# Static part of every campaign agent's instructions; the campaign script is prepended
+CAMPAIGN_INSTRUCTIONS = (
+    "You are a loan qualification agent for a campaign. Your objectives are:\n"
+    "1. Determine call outcome: ANSWERED, VOICEMAIL, BUSY, NO_ANSWER\n"
+    "2. If answered, qualify loan interest: INTERESTED, NOT_INTERESTED, CALLBACK_REQUESTED\n"
+    "3. Gather lead information and update campaign status\n"
+    "4. Handle different scenarios professionally\n\n"
+    "Call Handling Guidelines:\n"
+    "- If call is answered: Proceed with loan qualification\n"
+    "- If voicemail: Leave professional message and mark as VOICEMAIL\n"
+    "- If busy/no answer: Mark appropriately for retry\n"
+    "- Track all interactions for campaign dashboard\n"
+    "- Be professional and courteous\n"
+    "- Ask about their current financial needs\n"
+    "- Listen for loan interest indicators\n"
+    "- Use update_call_status to track progress\n"
+    "- Use mark_lead_interest to flag interest level\n"
+    "- If interested, use transfer_to_agent to connect with human\n"
+    "- Always acknowledge what the user says before proceeding"
+)
+
+def build_instructions(script: str) -> str:
+    return f"{script}\n\n{CAMPAIGN_INSTRUCTIONS}"
+
+# Built once per script and shared by every call of the campaign on this worker
+script_registry = ScriptRegistry(build_instructions)
+
+# First turn of every call; {lead_name} is filled per call
+INITIAL_GREETING_TEMPLATE = (
+    "You are starting a new conversation with {lead_name} for a loan qualification campaign. "
+    "1. Introduce yourself as a loan specialist from your company\n"
+    "2. Address them by name if available\n"
+    "3. Explain that you're calling to see if they're interested in loan options\n"
+    "4. Ask directly if they're currently looking for any type of loan or financial assistance\n"
+    "5. Keep it brief and professional\n\n"
+    "Your goal is to quickly determine their call outcome and interest level. "
+    "Be direct but friendly about the loan purpose of your call. "
+    "Use update_call_status to track that the call was answered."
+)
+
+# Voice used for every campaign call; cached phrase audio is keyed by it
+TTS_MODEL = "tts-1-hd"
+TTS_VOICE = "nova"
+
+# Fixed lines spoken verbatim on every call, played from the TTS audio cache
+TRANSFER_MESSAGE = (
+    "Great! I can see you're interested in a loan. "
+    "I'm now connecting you with one of our loan specialists who can help you with the details. "
+    "Please hold for just a moment."
+)
+VOICEMAIL_MESSAGE = (
+    "Hello, this is a loan specialist calling to follow up on your interest in our loan options. "
+    "Please give us a call back at your convenience and we'll be happy to help. "
+    "Thank you, and have a great day."
+)
+NO_RESPONSE_MESSAGE = (
+    "It seems we may have lost the connection. "
+    "We'll try to reach you another time. Thank you, goodbye."
+)
+FIXED_PHRASES = [TRANSFER_MESSAGE, VOICEMAIL_MESSAGE, NO_RESPONSE_MESSAGE]
+
+def build_tts(client: AsyncOpenAI):
+    return openai.TTS(client=client, model=TTS_MODEL, voice=TTS_VOICE)
+
+def record_session_metrics(event) -> None:
+    """Feed the framework's per-turn STT/LLM/TTS metrics into the latency histograms."""
+    m = event.metrics
+    if isinstance(m, agent_metrics.EOUMetrics):
+        latency.observe("transcript", m.transcription_delay)
+        latency.observe("end_of_turn", m.end_of_utterance_delay)
+    elif isinstance(m, (agent_metrics.LLMMetrics, agent_metrics.RealtimeModelMetrics)):
+        # ttft is -1 when the response produced no tokens
+        if m.ttft >= 0:
+            latency.observe("llm_first_token", m.ttft)
+    elif isinstance(m, agent_metrics.TTSMetrics):
+        latency.observe("tts_first_audio", m.ttfb)
+
+def prewarm(proc: agents.JobProcess):
+    """Build the heavy per-process clients once, before the process accepts jobs."""
+    started = time.perf_counter()
+    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    proc.userdata["openai_client"] = openai_client
+    proc.userdata["realtime_model"] = openai.realtime.RealtimeModel()
+    tts = build_tts(openai_client)
+    proc.userdata["tts"] = tts
+    # Load pre-rendered phrase audio from disk into memory
+    for text in FIXED_PHRASES:
+        tts_cache.get(tts_cache.key(text, TTS_VOICE, TTS_MODEL, tts.sample_rate, tts.num_channels), tts.sample_rate, tts.num_channels)
+    # Compile the default intent matcher so the first utterance doesn't pay for it
+    get_intent_matcher()
+    proc.userdata["prewarm_seconds"] = time.perf_counter() - started
+    logger.info("Worker prewarm finished in %.0f ms", proc.userdata['prewarm_seconds'] * 1000)
+
+def prewarmed(ctx: agents.JobContext, key: str, factory):
+    """Return a resource built by prewarm(), or build it now if prewarm didn't run."""
+    value = ctx.proc.userdata.get(key)
+    if value is None:
+        logger.warning("No prewarmed %s, building it on the call path", key)
+        value = factory()
+    return value
+
+def outcome_key(campaign_id: str, lead_id: str, attempt_id: str, kind: str) -> str:
+    """Idempotency key for an outcome-bearing write of one call attempt."""
+    if attempt_id:
+        return f"{campaign_id}:{lead_id}:{attempt_id}:{kind}"
+    return f"{campaign_id}:{lead_id}:{kind}"
 
 class CampaignAgent(agents.Agent):
-    def __init__(self, campaign_id: str, lead_id: str, script: str, lead_data: dict = None) -> None:
+    def __init__(self, campaign_id: str, lead_id: str, script: str, lead_data: dict = None, intent_keywords: dict = None,
+                 instructions: str = None, attempt_id: str = None) -> None:
         super().__init__(
-            instructions=(
-                f"{script}\n\n"
-                "You are a loan qualification agent for a campaign. Your objectives are:\n"
-                "1. Determine call outcome: ANSWERED, VOICEMAIL, BUSY, NO_ANSWER\n"
-                "2. If answered, qualify loan interest: INTERESTED, NOT_INTERESTED, CALLBACK_REQUESTED\n"
-                "3. Gather lead information and update campaign status\n"
-                "4. Handle different scenarios professionally\n\n"
-                "Call Handling Guidelines:\n"
-                "- If call is answered: Proceed with loan qualification\n"
-                "- If voicemail: Leave professional message and mark as VOICEMAIL\n"
-                "- If busy/no answer: Mark appropriately for retry\n"
-                "- Track all interactions for campaign dashboard\n"
-                "- Be professional and courteous\n"
-                "- Ask about their current financial needs\n"
-                "- Listen for loan interest indicators\n"
-                "- Use update_call_status to track progress\n"
-                "- Use mark_lead_interest to flag interest level\n"
-                "- If interested, use transfer_to_agent to connect with human\n"
-                "- Always acknowledge what the user says before proceeding"
-            )
+            instructions=instructions or build_instructions(script)
         )
         self.campaign_id = campaign_id
         self.lead_id = lead_id
+        # Distinguishes redials of the same lead in idempotency keys
+        self.attempt_id = attempt_id
         self.lead_data = lead_data or {}
-        self.conversation_data = {}
+        # Transcript and collected data, bounded in memory however long the call runs
+        self.call_record = CallRecord(campaign_id, lead_id)
         self.call_status = "INITIATED"  # INITIATED, ANSWERED, VOICEMAIL, BUSY, NO_ANSWER, COMPLETED
         self.interest_status = "UNKNOWN"  # INTERESTED, NOT_INTERESTED, CALLBACK_REQUESTED, UNKNOWN
         self.conversation_state = "greeting"
@@ -124,18 +183,31 @@ class CampaignAgent(agents.Agent):
         self.call_start_time = datetime.now()
         self.qualification_complete = False
         self.last_response_time = datetime.now()
+        # Number of transcript entries the backend has acknowledged
+        self.transcript_acked_seq = 0
+        self.transcript_sync_lock = asyncio.Lock()
+        # Compiled once per worker for each distinct keyword set
+        self.intent_matcher = get_intent_matcher(intent_keywords)
+        # Follow-up actions (transfer, end call, callback) decided by a turn
+        self.actions = ActionScheduler()
+        # Runs the end-of-call writes once, whichever of end_call and the disconnect events comes first
+        self.finalizer = CallFinalizer(f"{campaign_id}:{lead_id}", self.outcome_key("finalize"))
+        # Set by the first customer disconnect event; the hang-up is reported once per call
+        self.hangup_seen = False
         
-        logger.info(f"[AGENT INIT] Project/Campaign: {campaign_id}, Lead: {lead_id}, Lead Data: {self.lead_data}")
+        logger.info("[AGENT INIT] Project/Campaign: %s, Lead: %s, Lead Data: %s", campaign_id, lead_id, self.lead_data)
 
     async def on_transcript(self, transcript: str) -> None:
         """Handle incoming transcripts from the user."""
         try:
-            logger.info(f"\033[92mReceived transcript: {transcript}\033[0m")
+            logger.info("Received transcript: %s", transcript)
             self.last_response_time = datetime.now()
+            # The lead said something new, so earlier follow-ups are decided again
+            self.actions.cancel_pending("lead spoke")
             
             # Mark call as answered if we receive a transcript
             if self.call_status == "INITIATED":
-                await self.update_call_status("ANSWERED", "Call was answered by lead")
+                await self.update_call_status(None, "ANSWERED", "Call was answered by lead")
             
             # Save the user's transcript to conversation data
             await self.save_conversation_transcript("Customer", transcript)
@@ -149,116 +221,102 @@ class CampaignAgent(agents.Agent):
                 logger.info("Moving to loan inquiry phase")
             elif self.conversation_state == "loan_inquiry" and self.interest_status != "UNKNOWN":
                 self.conversation_state = "qualification"
-                logger.info(f"Moving to qualification phase - Interest: {self.interest_status}")
+                logger.info("Moving to qualification phase - Interest: %s", self.interest_status)
             
             # Log the current state
-            logger.info(f"Current conversation state: {self.conversation_state}")
-            logger.info(f"Interest status: {self.interest_status}")
-            logger.info(f"Call status: {self.call_status}")
+            logger.info("Current conversation state: %s", self.conversation_state)
+            logger.info("Interest status: %s", self.interest_status)
+            logger.info("Call status: %s", self.call_status)
 
             # Ensure we respond to the user
             await self.respond_to_user(transcript)
             
         except Exception as e:
-            logger.error(f"\033[91mError processing transcript: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error processing transcript: %s", e, exc_info=True)
 
     async def save_conversation_transcript(self, speaker: str, text: str) -> None:
         """Save transcript entry to the conversation data."""
         try:
-            # Initialize transcript list if it doesn't exist
-            if 'transcript' not in self.conversation_data:
-                self.conversation_data['transcript'] = []
-            
-            # Create transcript entry
-            transcript_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "speaker": speaker,
-                "text": text,
-                "type": "customer_message" if speaker == "Customer" else "agent_message"
-            }
-            
-            # Add to transcript list
-            self.conversation_data['transcript'].append(transcript_entry)
+            self.call_record.transcript.append(speaker, text)
             
             # Also save the latest transcript to database in real-time
             await self.save_transcript_to_database()
             
-            logger.info(f"\033[92mSaved transcript entry - {speaker}: {text[:50]}...\033[0m")
+            logger.info("Saved transcript entry - %s: %s...", speaker, text[:50])
             
         except Exception as e:
-            logger.error(f"\033[91mError saving transcript: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error saving transcript: %s", e, exc_info=True)
 
     async def save_agent_response(self, response_text: str) -> None:
         """Save agent response to transcript."""
         try:
             await self.save_conversation_transcript("Agent", response_text)
         except Exception as e:
-            logger.error(f"\033[91mError saving agent response: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error saving agent response: %s", e, exc_info=True)
 
     async def save_transcript_to_database(self) -> None:
-        """Save the current transcript to the database in real-time."""
+        """Append transcript entries the backend hasn't acknowledged yet.
+
+        Only the delta since the last acknowledged sequence number is sent. A
+        failed send leaves the sequence untouched so the next call resends the
+        gap, and if the backend reports a different tail we resync from it.
+        """
         try:
-            # Update conversation with latest transcript data
-            transcript_data = {
-                "transcript": self.conversation_data.get('transcript', []),
-                "last_updated": datetime.now().isoformat(),
-                "conversation_state": self.conversation_state,
-                "interest_status": self.interest_status,
-                "call_status": self.call_status
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                url = f"{API_URL}/api/trpc/campaign.saveConversation"
-                payload = {
-                    "campaignId": self.campaign_id,
-                    "leadId": self.lead_id,
-                    "status": "IN_PROGRESS",  # Keep as in progress until call ends
-                    "results": transcript_data,
-                }
-                
-                async with session.post(url, json=payload) as response:
-                    if response.status != 200:
-                        logger.warning(f"\033[93mFailed to save transcript to DB: {response.status}\033[0m")
+            async with self.transcript_sync_lock:
+                # One resync attempt if the backend's tail disagrees with ours
+                for _ in range(2):
+                    transcript = self.call_record.transcript
+                    from_seq = self.transcript_acked_seq
+                    entries = transcript.entries(from_seq)
+                    if not entries:
+                        return
+                    
+                    payload = {
+                        "campaignId": self.campaign_id,
+                        "leadId": self.lead_id,
+                        "fromSeq": from_seq,
+                        "entries": entries,
+                        "state": {
+                            "conversation_state": self.conversation_state,
+                            "interest_status": self.interest_status,
+                            "call_status": self.call_status
+                        },
+                    }
+                    
+                    status, body = await backend_client.post("/api/trpc/campaign.appendTranscript", trpc_input(payload))
+                    if status != 200:
+                        logger.warning("Failed to save transcript to DB: %s (will resend from seq %s)", status, from_seq)
+                        return
+                    
+                    expected_seq = from_seq + len(entries)
+                    next_seq = trpc_result(body).get("nextSeq", expected_seq)
+                    self.transcript_acked_seq = max(0, min(next_seq, len(transcript)))
+                    if next_seq == expected_seq:
+                        return
+                    logger.warning("Transcript out of sync (sent up to %s, backend at %s), resyncing", expected_seq, next_seq)
                         
         except Exception as e:
-            logger.error(f"\033[91mError saving transcript to database: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error saving transcript to database: %s", e, exc_info=True)
 
     async def analyze_loan_interest(self, transcript: str) -> None:
         """Analyze the transcript to determine loan interest level."""
+        started = time.perf_counter()
         try:
-            transcript_lower = transcript.lower()
-            
-            # Interested indicators
-            interested_keywords = [
-                "yes", "interested", "need money", "need loan", "want loan", 
-                "looking for", "definitely", "absolutely", "tell me more",
-                "how much", "what rates", "when can", "sign me up"
-            ]
+            intent = self.intent_matcher.classify(transcript)
             
-            # Not interested indicators
-            not_interested_keywords = [
-                "no", "not interested", "don't need", "no thanks", 
-                "not looking", "already have", "not right now", "remove me",
-                "don't call", "not a good time", "hang up"
-            ]
+            if intent == "INTERESTED":
+                await self.mark_lead_interest(None, "INTERESTED", f"Expressed interest: {transcript}")
+            elif intent == "NOT_INTERESTED":
+                await self.mark_lead_interest(None, "NOT_INTERESTED", f"Expressed no interest: {transcript}")
+            elif intent == "CALLBACK_REQUESTED":
+                await self.mark_lead_interest(None, "CALLBACK_REQUESTED", f"Requested callback: {transcript}")
             
-            # Callback requested indicators
-            callback_keywords = [
-                "call back", "call later", "not a good time", "busy right now",
-                "try again", "different time", "later today", "tomorrow"
-            ]
-            
-            if any(keyword in transcript_lower for keyword in interested_keywords):
-                await self.mark_lead_interest("INTERESTED", f"Expressed interest: {transcript}")
-            elif any(keyword in transcript_lower for keyword in not_interested_keywords):
-                await self.mark_lead_interest("NOT_INTERESTED", f"Expressed no interest: {transcript}")
-            elif any(keyword in transcript_lower for keyword in callback_keywords):
-                await self.mark_lead_interest("CALLBACK_REQUESTED", f"Requested callback: {transcript}")
-            
-            logger.info(f"\033[92mAnalyzed interest status: {self.interest_status}\033[0m")
+            logger.info("Analyzed interest status: %s", self.interest_status)
             
         except Exception as e:
-            logger.error(f"\033[91mError analyzing loan interest: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error analyzing loan interest: %s", e, exc_info=True)
+        finally:
+            latency.observe("interest_analysis", time.perf_counter() - started)
 
     async def respond_to_user(self, user_input: str) -> None:
         """Generate and send a response to the user."""
@@ -300,39 +358,46 @@ class CampaignAgent(agents.Agent):
                 )
 
             # Generate and send the response
-            logger.info(f"\033[92mGenerating response for interest level: {self.interest_status}\033[0m")
+            logger.info("Generating response for interest level: %s", self.interest_status)
             
             # Save the instruction/response to transcript (this will be the agent's response)
             # We'll capture the actual generated response in the reply method
             await self.reply(response_instruction)
-            logger.info("\033[92mResponse sent successfully\033[0m")
+            logger.info("Response sent successfully")
 
             # Handle next steps based on interest status
             await self.handle_next_steps()
 
         except Exception as e:
-            logger.error(f"\033[91mError generating response: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error generating response: %s", e, exc_info=True)
 
     async def handle_next_steps(self) -> None:
-        """Handle next steps based on current interest status."""
+        """Schedule next steps based on current interest status.
+
+        The short pauses before acting run on the call's action scheduler, not
+        in the turn, and are cancelled if the lead speaks again first.
+        """
         try:
             if self.interest_status == "INTERESTED" and not self.qualification_complete:
                 # Wait a moment then transfer to human agent
-                await asyncio.sleep(2)
-                await self.transfer_to_agent("Lead expressed interest in loan")
+                self.actions.schedule(
+                    "transfer", 2, lambda: self.transfer_to_agent(None, "Lead expressed interest in loan")
+                )
                 
             elif self.interest_status == "NOT_INTERESTED":
                 # End call professionally
-                await asyncio.sleep(1)
-                await self.end_call("NOT_INTERESTED", "Lead not interested in loan services")
+                self.actions.schedule(
+                    "end_call", 1, lambda: self.end_call(None, "NOT_INTERESTED", "Lead not interested in loan services")
+                )
                 
             elif self.interest_status == "CALLBACK_REQUESTED":
                 # Schedule callback
-                await asyncio.sleep(1)
-                await self.schedule_callback("Lead requested callback")
+                self.actions.schedule(
+                    "callback", 1, lambda: self.schedule_callback(None, "Lead requested callback")
+                )
                 
         except Exception as e:
-            logger.error(f"\033[91mError handling next steps: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error handling next steps: %s", e, exc_info=True)
 
     async def reply(self, instruction: str) -> None:
         """Send a reply using the agent's context and save it to transcript."""
@@ -345,9 +410,29 @@ class CampaignAgent(agents.Agent):
             response_placeholder = f"[Agent responding to: {instruction[:100]}...]"
             await self.save_agent_response(response_placeholder)
             
-            logger.info("\033[92mReply processed and saved to transcript\033[0m")
+            logger.info("Reply processed and saved to transcript")
         except Exception as e:
-            logger.error(f"\033[91mError in reply: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error in reply: %s", e, exc_info=True)
+
+    async def say_cached(self, text: str) -> None:
+        """Speak a fixed line from the TTS audio cache and save it to transcript.
+
+        The line is synthesized once per voice and then streamed to the room
+        as cached frames; if the cache can't produce audio the session's TTS
+        speaks it instead.
+        """
+        try:
+            audio = None
+            try:
+                audio = await tts_cache.get_or_render(self.session.tts, text, TTS_VOICE, TTS_MODEL)
+            except Exception as e:
+                logger.warning("TTS cache unavailable, synthesizing live: %s", e)
+
+            handle = self.session.say(text, audio=audio.frames() if audio else None)
+            await handle.wait_for_playout()
+            await self.save_agent_response(text)
+        except Exception as e:
+            logger.error("Error speaking cached phrase: %s", e, exc_info=True)
 
     async def generate_response(self, user_input: str) -> None:
         """Generate an appropriate response based on the conversation state."""
@@ -359,44 +444,42 @@ class CampaignAgent(agents.Agent):
             else:
                 response = await self.handle_general_conversation(user_input)
 
-            logger.info(f"\033[92mGenerated response for state {self.conversation_state}\033[0m")
+            logger.info("Generated response for state %s", self.conversation_state)
             
         except Exception as e:
-            logger.error(f"\033[91mError generating response: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error generating response: %s", e, exc_info=True)
 
     async def handle_discovery_phase(self, user_input: str) -> str:
         """Handle the discovery phase of the conversation."""
         try:
-            # Save important information from user input
-            await self.save_conversation_data(f"discovery_response_{datetime.now().timestamp()}", user_input)
-            
-            # Move to qualification phase if we have enough information
-            if len(self.conversation_data) >= 3:
-                self.conversation_state = "qualification"
-                logger.info("Moving to qualification phase")
+            # The response itself is in the transcript; once the lead has
+            # answered a discovery question, move on to qualification
+            self.call_record.count_response("discovery")
+            self.conversation_state = "qualification"
+            logger.info("Moving to qualification phase")
                 
             return "Continue gathering information and asking relevant questions"
         except Exception as e:
-            logger.error(f"\033[91mError in discovery phase: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error in discovery phase: %s", e, exc_info=True)
             return "Continue with general conversation"
 
     async def handle_qualification_phase(self, user_input: str) -> str:
         """Handle the qualification phase of the conversation."""
         try:
             # Save qualification information
-            await self.save_conversation_data(f"qualification_response_{datetime.now().timestamp()}", user_input)
+            self.call_record.count_response("qualification")
             return "Assess interest level and determine next steps"
         except Exception as e:
-            logger.error(f"\033[91mError in qualification phase: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error in qualification phase: %s", e, exc_info=True)
             return "Continue with general conversation"
 
     async def handle_general_conversation(self, user_input: str) -> str:
         """Handle general conversation flow."""
         try:
-            await self.save_conversation_data(f"general_response_{datetime.now().timestamp()}", user_input)
+            self.call_record.count_response("general")
             return "Maintain conversation and gather information"
         except Exception as e:
-            logger.error(f"\033[91mError in general conversation: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error in general conversation: %s", e, exc_info=True)
             return "Continue conversation naturally"
 
     @function_tool()
@@ -408,11 +491,11 @@ class CampaignAgent(agents.Agent):
         try:
             time_since_last_response = (datetime.now() - self.last_response_time).seconds
             if time_since_last_response > 5:
-                logger.info(f"\033[93mNo response for {time_since_last_response} seconds\033[0m")
+                logger.info("No response for %s seconds", time_since_last_response)
                 return "Ask an open-ended question to encourage response"
             return "Continue with current conversation flow"
         except Exception as e:
-            logger.error(f"\033[91mError checking conversation flow: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error checking conversation flow: %s", e, exc_info=True)
             return "Continue conversation naturally"
 
     @function_tool()
@@ -431,8 +514,8 @@ class CampaignAgent(agents.Agent):
         Returns:
             Confirmation message
         """
-        self.conversation_data[key] = value
-        logger.info(f"\033[92mSaved conversation data - {key}: {value}\033[0m")
+        self.call_record.add_note(key, value)
+        logger.info("Saved conversation data - %s: %s", key, value)
         return f"Saved {key}: {value}"
 
     @function_tool()
@@ -450,7 +533,7 @@ class CampaignAgent(agents.Agent):
             Instructions on how to proceed
         """
         if duration > 10:  # If silence for more than 10 seconds
-            logger.info(f"\033[93mSilence detected for {duration} seconds\033[0m")
+            logger.info("Silence detected for %s seconds", duration)
             return "Ask if the person is still there and if they have any questions."
         return "Continue with the current conversation flow."
 
@@ -470,40 +553,47 @@ class CampaignAgent(agents.Agent):
         Returns:
             Confirmation message
         """
-        results = {
-            "outcome": outcome,
-            "summary": summary,
-            "data": self.conversation_data,
-            "final_state": self.conversation_state
-        }
+        results = self.conversation_results(outcome, summary, self.call_record.to_dict(transcript=False))
 
-        logger.info(f"\033[92mEnding conversation with results: {results}\033[0m")
+        logger.info("Ending conversation with outcome: %s - %s", outcome, summary)
+        logger.debug("Conversation results: %s", results)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{API_URL}/api/trpc/campaign.saveConversation"
-                logger.info(f"Sending results to {url}")
-                
-                async with session.post(
-                    url,
-                    json={
-                        "campaignId": self.campaign_id,
-                        "leadId": self.lead_id,
-                        "status": "COMPLETED",
-                        "results": results,
-                    }
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"\033[92mConversation saved successfully: {results}\033[0m")
-                        return "Conversation ended and data saved successfully."
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"\033[91mFailed to save conversation with status {response.status}: {error_text}\033[0m")
-                        return f"Error saving conversation data: {error_text}"
+            # Recorded durably first; the outbox delivers it off the call path
+            get_outbox().enqueue(
+                "/api/trpc/campaign.saveConversation",
+                trpc_input({
+                    "campaignId": self.campaign_id,
+                    "leadId": self.lead_id,
+                    "status": "COMPLETED",
+                    "results": results,
+                }),
+                self.outcome_key("saveConversation:COMPLETED")
+            )
+            logger.info("Conversation results queued for delivery: %s", outcome)
+            return "Conversation ended and data saved successfully."
         except Exception as e:
-            logger.error(f"\033[91mException while saving conversation: {str(e)}\033[0m", exc_info=True)
+            logger.error("Exception while saving conversation: %s", e, exc_info=True)
             return f"Error saving conversation data: {str(e)}"
 
+    def conversation_results(self, outcome: str, summary: str, data: dict) -> dict:
+        """saveConversation results for the call.
+
+        The backend already holds the transcript appendTranscript acknowledged,
+        so only the unacknowledged tail rides along.
+        """
+        results = {
+            "outcome": outcome,
+            "summary": summary,
+            "data": data,
+            "final_state": self.conversation_state
+        }
+        transcript_tail = self.call_record.transcript.entries(self.transcript_acked_seq)
+        if transcript_tail:
+            results["transcriptFromSeq"] = self.transcript_acked_seq
+            results["transcriptTail"] = transcript_tail
+        return results
+
     @function_tool()
     async def save_loan_interest(
         self,
@@ -520,11 +610,9 @@ class CampaignAgent(agents.Agent):
         Returns:
             Confirmation message
         """
-        self.conversation_data["loan_interest_level"] = interest_level
-        self.conversation_data["loan_interest_notes"] = notes
-        self.conversation_data["interest_timestamp"] = datetime.now().isoformat()
+        self.call_record.set_loan_interest(interest_level, notes)
         
-        logger.info(f"\033[92mSaved loan interest - Level: {interest_level}, Notes: {notes}\033[0m")
+        logger.info("Saved loan interest - Level: %s, Notes: %s", interest_level, notes)
         return f"Saved loan interest: {interest_level} - {notes}"
 
     @function_tool()
@@ -543,37 +631,30 @@ class CampaignAgent(agents.Agent):
         """
         try:
             self.qualification_complete = True
-            self.conversation_data["transfer_reason"] = reason
-            self.conversation_data["transfer_timestamp"] = datetime.now().isoformat()
+            self.call_record.set_transfer(reason)
             
-            logger.info(f"\033[92mTransferring call to human agent. Reason: {reason}\033[0m")
+            logger.info("Transferring call to human agent. Reason: %s", reason)
             
             # For now, just call a Python method to simulate transfer
             await self.simulate_agent_transfer(reason)
             
             # Inform the caller about the transfer
-            await self.reply(
-                "Great! I can see you're interested in a loan. "
-                "I'm now connecting you with one of our loan specialists who can help you with the details. "
-                "Please hold for just a moment."
-            )
+            await self.say_cached(TRANSFER_MESSAGE)
             
             return f"Call transferred to human agent: {reason}"
             
         except Exception as e:
-            logger.error(f"\033[91mError transferring to agent: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error transferring to agent: %s", e, exc_info=True)
             return f"Error during transfer: {str(e)}"
 
     async def simulate_agent_transfer(self, reason: str) -> None:
         """Simulate transferring the call to a human agent (Python method for now)."""
         try:
-            logger.info(f"\033[96m=== SIMULATING AGENT TRANSFER ===\033[0m")
-            logger.info(f"\033[96mReason: {reason}\033[0m")
-            logger.info(f"\033[96mLead ID: {self.lead_id}\033[0m")
-            logger.info(f"\033[96mCampaign ID: {self.campaign_id}\033[0m")
-            logger.info(f"\033[96mInterest Level: {self.interest_status}\033[0m")
-            logger.info(f"\033[96mConversation Data: {self.conversation_data}\033[0m")
-            logger.info(f"\033[96m================================\033[0m")
+            logger.info(
+                "Simulating agent transfer - reason: %s, lead: %s, campaign: %s, interest: %s",
+                reason, self.lead_id, self.campaign_id, self.interest_status
+            )
+            logger.debug("Conversation data at transfer: %s", self.call_record.to_dict(transcript=False))
             
             # Here you would implement actual transfer logic:
             # - Save lead status as "TRANSFERRED"
@@ -585,29 +666,27 @@ class CampaignAgent(agents.Agent):
             await self.update_lead_status_for_transfer()
             
         except Exception as e:
-            logger.error(f"\033[91mError in simulated transfer: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error in simulated transfer: %s", e, exc_info=True)
 
     async def update_lead_status_for_transfer(self) -> None:
         """Update the lead status to indicate transfer to human agent."""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{API_URL}/api/trpc/campaign.updateLeadStatus"
-                payload = {
-                    "id": self.lead_id,
-                    "status": "TRANSFERRED_TO_AGENT",
-                    "notes": f"Interest level: {self.interest_status}",
-                    "conversationData": self.conversation_data
-                }
-                
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        logger.info(f"\033[92mLead {self.lead_id} status updated to TRANSFERRED_TO_AGENT\033[0m")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"\033[91mFailed to update lead status: {error_text}\033[0m")
+            payload = {
+                "id": self.lead_id,
+                "status": "TRANSFERRED_TO_AGENT",
+                "notes": f"Interest level: {self.interest_status}",
+                "conversationData": self.call_record.to_dict(transcript=False)
+            }
+            
+            get_outbox().enqueue(
+                "/api/trpc/campaign.updateLeadStatus",
+                trpc_input(payload),
+                self.outcome_key("updateLeadStatus:TRANSFERRED_TO_AGENT")
+            )
+            logger.info("Lead %s status TRANSFERRED_TO_AGENT queued for delivery", self.lead_id)
                         
         except Exception as e:
-            logger.error(f"\033[91mError updating lead status: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error updating lead status: %s", e, exc_info=True)
 
     @function_tool()
     async def update_call_status(
@@ -630,12 +709,9 @@ class CampaignAgent(agents.Agent):
             self.call_duration = (datetime.now() - self.call_start_time).seconds
             
             # Save to conversation data
-            self.conversation_data["call_status"] = status
-            self.conversation_data["call_duration"] = self.call_duration
-            self.conversation_data["status_notes"] = notes
-            self.conversation_data["status_timestamp"] = datetime.now().isoformat()
+            self.call_record.set_status(status, self.call_duration, notes)
             
-            logger.info(f"\033[92mUpdated call status: {status} - {notes}\033[0m")
+            logger.info("Updated call status: %s - %s", status, notes)
             
             # Send real-time update to dashboard
             await self.send_realtime_update("call_status", {
@@ -647,7 +723,7 @@ class CampaignAgent(agents.Agent):
             return f"Call status updated: {status}"
             
         except Exception as e:
-            logger.error(f"\033[91mError updating call status: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error updating call status: %s", e, exc_info=True)
             return f"Error updating call status: {str(e)}"
 
     @function_tool()
@@ -668,11 +744,9 @@ class CampaignAgent(agents.Agent):
         """
         try:
             self.interest_status = interest_level
-            self.conversation_data["interest_level"] = interest_level
-            self.conversation_data["interest_notes"] = notes
-            self.conversation_data["interest_timestamp"] = datetime.now().isoformat()
+            self.call_record.set_interest(interest_level, notes)
             
-            logger.info(f"\033[92mMarked lead interest: {interest_level} - {notes}\033[0m")
+            logger.info("Marked lead interest: %s - %s", interest_level, notes)
             
             # Send real-time update to dashboard
             await self.send_realtime_update("lead_interest", {
@@ -683,9 +757,27 @@ class CampaignAgent(agents.Agent):
             return f"Lead interest marked: {interest_level}"
             
         except Exception as e:
-            logger.error(f"\033[91mError marking lead interest: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error marking lead interest: %s", e, exc_info=True)
             return f"Error marking interest: {str(e)}"
 
+    def schedule_retry(self, outcome: str, reason: str, preferred_time: str = None):
+        """Queue a redial of this lead for the campaign dialer. Returns the epoch time, or None."""
+        phone = self.lead_data.get("phone") or self.lead_data.get("phoneNumber")
+        if not phone:
+            logger.warning("No phone number for lead %s, not scheduling a retry", self.lead_id)
+            return None
+        lead = {
+            "id": self.lead_id,
+            "phoneNumber": phone,
+            "name": self.lead_data.get("name"),
+            "email": self.lead_data.get("email"),
+        }
+        try:
+            return get_retry_queue().schedule(self.campaign_id, lead, outcome, reason, preferred_time or None)
+        except Exception as e:
+            logger.error("Error scheduling retry: %s", e, exc_info=True)
+            return None
+
     @function_tool()
     async def handle_voicemail(
         self,
@@ -701,21 +793,18 @@ class CampaignAgent(agents.Agent):
             Confirmation message
         """
         try:
-            await self.update_call_status("VOICEMAIL", "Reached voicemail")
+            await self.update_call_status(None, "VOICEMAIL", "Reached voicemail")
+            self.schedule_retry("VOICEMAIL", "Reached voicemail")
             
             if action == "leave_message":
                 # Leave a professional voicemail message
-                voicemail_message = (
-                    "Please leave a professional voicemail message about loan services. "
-                    "Include callback information and keep it brief and professional."
-                )
-                await self.reply(voicemail_message)
+                await self.say_cached(VOICEMAIL_MESSAGE)
                 
-            await self.end_call("VOICEMAIL", "Voicemail message left")
+            await self.end_call(None, "VOICEMAIL", "Voicemail message left")
             return "Voicemail handled successfully"
             
         except Exception as e:
-            logger.error(f"\033[91mError handling voicemail: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error handling voicemail: %s", e, exc_info=True)
             return f"Error handling voicemail: {str(e)}"
 
     @function_tool()
@@ -741,10 +830,13 @@ class CampaignAgent(agents.Agent):
                 "scheduled_timestamp": datetime.now().isoformat(),
                 "lead_data": self.lead_data
             }
+            next_attempt_at = self.schedule_retry("CALLBACK_SCHEDULED", reason, preferred_time)
+            if next_attempt_at:
+                callback_data["next_attempt_at"] = datetime.fromtimestamp(next_attempt_at).isoformat()
             
-            self.conversation_data["callback_scheduled"] = callback_data
+            self.call_record.callback_scheduled = callback_data
             
-            logger.info(f"\033[94mCallback scheduled: {reason}\033[0m")
+            logger.info("Callback scheduled: %s", reason)
             
             # Send to campaign system
             await self.send_realtime_update("callback_scheduled", callback_data)
@@ -755,7 +847,7 @@ class CampaignAgent(agents.Agent):
             return f"Callback scheduled: {reason}"
             
         except Exception as e:
-            logger.error(f"\033[91mError scheduling callback: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error scheduling callback: %s", e, exc_info=True)
             return f"Error scheduling callback: {str(e)}"
 
     @function_tool()
@@ -775,58 +867,103 @@ class CampaignAgent(agents.Agent):
             Confirmation message
         """
         try:
-            await self.update_call_status("COMPLETED", f"Call ended: {outcome}")
+            logger.info("Ending call with outcome: %s", outcome)
+            if not await self.finalize("COMPLETED", f"Call ended: {outcome}", outcome, summary):
+                return f"Call already ended ({self.call_status})"
+            return f"Call ended successfully: {outcome}"
             
+        except Exception as e:
+            logger.error("Error ending call: %s", e, exc_info=True)
+            return f"Error ending call: {str(e)}"
+
+    async def finalize(self, status: str, notes: str, outcome: str, summary: str, hangup: dict = None) -> bool:
+        """Record the end of the call and run its end-of-call writes concurrently.
+
+        Only the first call finalizes; later ones return False at once. The
+        call is snapshotted once, up front, so every write carries the same
+        status, duration and data. Every call saves the conversation and
+        flushes the transcript tail; an ended call also updates the dashboard
+        and the lead's campaign status, a hang-up (`hangup` holds the
+        participant and reason) notifies the backend of it.
+        """
+        if not self.finalizer.begin(status):
+            return False
+        # No follow-up may start once the call is over
+        self.actions.stop()
+        self.call_status = status
+        self.call_duration = (datetime.now() - self.call_start_time).seconds
+        self.call_record.set_status(status, self.call_duration, notes)
+        # Transcript and lead details are already on the backend
+        data = self.call_record.to_dict(transcript=False)
+        logger.info("Finalizing call: %s - %s", status, notes)
+
+        async def publish(event_type: str, payload: dict) -> None:
+            get_event_bus().publish(event_type, self.campaign_id, self.lead_id, payload)
+
+        # Final writes get their own ":final" kinds: an earlier write of the same
+        # kind (schedule_callback's lead status, end_conversation's results)
+        # would otherwise make the outbox drop them as duplicates
+        async def enqueue(path: str, payload: dict, kind: str) -> None:
+            get_outbox().enqueue(path, payload, self.outcome_key(kind))
+
+        writes = {
+            "call_status": publish("call_status", {
+                "status": status,
+                "duration": self.call_duration,
+                "notes": notes
+            }),
+        }
+        if hangup is None:
             final_results = {
                 "outcome": outcome,
                 "summary": summary,
-                "call_status": self.call_status,
+                "call_status": status,
                 "interest_status": self.interest_status,
                 "call_duration": self.call_duration,
-                "conversation_data": self.conversation_data,
-                "lead_data": self.lead_data
+                "conversation_data": data,
+                "finalization_key": self.finalizer.key,
             }
+            writes["call_completed"] = publish("call_completed", final_results)
+            writes["lead_status"] = enqueue("/api/campaign/updateLeadStatus", {
+                "leadId": self.lead_id,
+                "campaignId": self.campaign_id,
+                "status": outcome,
+                "data": final_results
+            }, "campaignLeadStatus:final")
+        else:
+            writes["hangup"] = enqueue(
+                "/api/trpc/campaign.handleCallHangup",
+                trpc_input(self.hangup_payload(hangup["participant"], hangup["reason"], self.call_duration)),
+                "handleCallHangup"
+            )
+        writes["save_conversation"] = enqueue("/api/trpc/campaign.saveConversation", trpc_input({
+            "campaignId": self.campaign_id,
+            "leadId": self.lead_id,
+            "status": "COMPLETED",
+            "results": self.conversation_results(outcome, summary, data),
+        }), "saveConversation:final")
+        writes["transcript"] = self.save_transcript_to_database()
 
-            logger.info(f"\033[92mEnding call with outcome: {outcome}\033[0m")
-
-            # Update campaign dashboard
-            await self.send_realtime_update("call_completed", final_results)
-            
-            # Update lead in campaign
-            await self.update_lead_in_campaign(outcome, final_results)
-
-            return f"Call ended successfully: {outcome}"
-            
-        except Exception as e:
-            logger.error(f"\033[91mError ending call: {str(e)}\033[0m", exc_info=True)
-            return f"Error ending call: {str(e)}"
+        await self.finalizer.run(writes)
+        return True
 
     async def send_realtime_update(self, event_type: str, data: dict) -> None:
-        """Send real-time updates to campaign dashboard."""
+        """Queue a real-time update for the campaign dashboard.
+
+        Updates are coalesced and batched by the worker's event bus, so this
+        returns immediately instead of waiting on an HTTP round trip.
+        """
         try:
-            update_payload = {
-                "event_type": event_type,
-                "campaign_id": self.campaign_id,
-                "lead_id": self.lead_id,
-                "timestamp": datetime.now().isoformat(),
-                "data": data
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                url = f"{API_URL}/api/trpc/campaign.realtimeUpdate"
-                async with session.post(url, json=update_payload) as response:
-                    if response.status == 200:
-                        logger.info(f"\033[96mReal-time update sent: {event_type}\033[0m")
-                    else:
-                        logger.warning(f"\033[93mFailed to send real-time update: {response.status}\033[0m")
+            get_event_bus().publish(event_type, self.campaign_id, self.lead_id, data)
+            logger.info("Real-time update queued: %s", event_type)
                         
         except Exception as e:
-            logger.error(f"\033[91mError sending real-time update: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error sending real-time update: %s", e, exc_info=True)
 
     async def update_lead_in_campaign(self, status: str, data: dict) -> None:
         """Update lead status in the campaign system."""
         try:
-            logger.info(f"\033[92mUpdating lead in campaign: {status}\033[0m")
+            logger.info("Updating lead in campaign: %s", status)
             
             update_data = {
                 "leadId": self.lead_id,
@@ -835,85 +972,105 @@ class CampaignAgent(agents.Agent):
                 "data": data
             }
             
-            async with aiohttp.ClientSession() as session:
-                url = f"{API_URL}/api/campaign/updateLeadStatus"
-                async with session.post(url, json=update_data) as response:
-                    if response.status == 200:
-                        logger.info("Lead status updated successfully")
-                    else:
-                        logger.error(f"Failed to update lead status: {response.status}")
+            get_outbox().enqueue(
+                "/api/campaign/updateLeadStatus",
+                update_data,
+                self.outcome_key(f"campaignLeadStatus:{status}")
+            )
+            logger.info("Lead status update queued for delivery")
                         
         except Exception as e:
-            logger.error(f"\033[91mError updating lead status: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error updating lead status: %s", e, exc_info=True)
 
     async def handle_participant_disconnect(self, participant_identity: str, reason: str = "unknown") -> None:
         """Handle when a participant disconnects (hang-up detection)."""
         try:
-            logger.info(f"\033[93mParticipant disconnected: {participant_identity} (reason: {reason})\033[0m")
+            logger.info("Participant disconnected: %s (reason: %s)", participant_identity, reason)
+            
+            # A repeat event for a hang-up already handled is a no-op
+            if self.hangup_seen:
+                return
             
             # Check if it's the customer who hung up (not the agent)
             if not participant_identity.startswith('agent-') and not participant_identity.startswith('listener-'):
-                logger.info(f"\033[91mCustomer hang-up detected: {participant_identity}\033[0m")
+                logger.info("Customer hang-up detected: %s", participant_identity)
+                self.hangup_seen = True
                 
-                # Calculate call duration
                 call_duration = (datetime.now() - self.call_start_time).seconds
-                
-                # Mark call as hung up
-                await self.update_call_status("HUNG_UP", f"Customer {participant_identity} hung up after {call_duration} seconds")
-                
-                # Send hang-up notification to API
-                await self.notify_call_hangup(participant_identity, reason, call_duration)
-                
-                # End the conversation with hang-up status
-                await self.end_conversation(
+                finalized = await self.finalize(
+                    "HUNG_UP",
+                    f"Customer {participant_identity} hung up after {call_duration} seconds",
                     "hung_up",
-                    f"Customer hung up after {call_duration} seconds. Conversation state: {self.conversation_state}, Interest: {self.interest_status}"
+                    f"Customer hung up after {call_duration} seconds. Conversation state: {self.conversation_state}, Interest: {self.interest_status}",
+                    hangup={"participant": participant_identity, "reason": reason},
                 )
+                if not finalized:
+                    # Already finalized (e.g. by end_call); the backend still needs the hang-up
+                    await self.notify_call_hangup(participant_identity, reason, call_duration)
             
         except Exception as e:
-            logger.error(f"\033[91mError handling participant disconnect: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error handling participant disconnect: %s", e, exc_info=True)
 
     async def notify_call_hangup(self, participant_identity: str, reason: str, duration: int) -> None:
         """Notify the API about a call hang-up."""
         try:
-            # Find the conversation ID from the room context
-            conversation_id = f"{self.campaign_id}-{self.lead_id}"  # This should match your room naming convention
-            
-            hangup_data = {
-                "callId": conversation_id,
-                "hangupReason": reason,
-                "participantIdentity": participant_identity,
-                "callDuration": duration,
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                url = f"{API_URL}/api/trpc/campaign.handleCallHangup"
-                logger.info(f"Sending hang-up notification to {url}")
-                
-                async with session.post(url, json=hangup_data) as response:
-                    if response.status == 200:
-                        logger.info(f"\033[92mHang-up notification sent successfully\033[0m")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"\033[91mFailed to send hang-up notification: {response.status} - {error_text}\033[0m")
+            get_outbox().enqueue(
+                "/api/trpc/campaign.handleCallHangup",
+                trpc_input(self.hangup_payload(participant_identity, reason, duration)),
+                self.outcome_key("handleCallHangup")
+            )
+            logger.info("Hang-up notification queued for delivery")
                         
         except Exception as e:
-            logger.error(f"\033[91mError sending hang-up notification: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error sending hang-up notification: %s", e, exc_info=True)
+
+    def hangup_payload(self, participant_identity: str, reason: str, duration: int) -> dict:
+        # The conversation ID should match your room naming convention
+        return {
+            "callId": f"{self.campaign_id}-{self.lead_id}",
+            "hangupReason": reason,
+            "participantIdentity": participant_identity,
+            "callDuration": duration,
+            "finalizationKey": self.finalizer.key,
+        }
+
+    def outcome_key(self, kind: str) -> str:
+        """Idempotency key for an outcome-bearing write of this call."""
+        return outcome_key(self.campaign_id, self.lead_id, self.attempt_id, kind)
+
+async def shutdown_backend() -> None:
+    """Flush and close this job's backend resources on shutdown."""
+    # Let end-of-call writes still running land in the event bus and outbox first
+    await wait_for_finalizers()
+    await close_event_bus()
+    await close_outbox()
+    await backend_client.close()
 
 async def entrypoint(ctx: agents.JobContext):
+    campaign_id = None
     lead_id = None
+    attempt_id = None
+    # Flush queued dashboard events and outcome writes, then release this job's pooled backend connections
+    ctx.add_shutdown_callback(shutdown_backend)
+    # Watch this job's loop for stalls and report it to the worker's load calculation
+    loop_monitor = start_loop_monitor()
+    if loop_monitor:
+        ctx.add_shutdown_callback(lambda: loop_monitor.close())
+    load_reporter = JobLoadReporter(loop_monitor)
+    load_reporter.start()
+    ctx.add_shutdown_callback(lambda: load_reporter.close())
     try:
         logger.info("Entrypoint Called")
         livekit_url = os.getenv("LIVEKIT_URL", "NOT SET")
-        logger.info(f"[LIVEKIT] Server URL: {livekit_url}")
-        logger.info(f"[ENTRYPOINT] Room: {getattr(ctx.room, 'name', None)} | Room Metadata: {getattr(ctx.room, 'metadata', None)}")
+        logger.info("[LIVEKIT] Server URL: %s", livekit_url)
+        logger.info("[ENTRYPOINT] Room: %s | Room Metadata: %s", getattr(ctx.room, 'name', None), getattr(ctx.room, 'metadata', None))
         
-        # Initialize the OpenAI client inside the entrypoint
-        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        logger.info("OpenAI client initialized")
+        # Reuse the OpenAI client built by prewarm()
+        client = prewarmed(ctx, "openai_client", lambda: AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+        logger.info("OpenAI client ready")
 
-        # Check OpenAI credits first
-        is_api_valid, api_error = await check_openai_credits()
+        # Read the worker's cached OpenAI verdict instead of probing per call
+        is_api_valid, api_error = read_cached_verdict()
         if not is_api_valid:
             raise ValueError(f"OpenAI API issue: {api_error}")
         
@@ -922,26 +1079,23 @@ async def entrypoint(ctx: agents.JobContext):
         logger.info("Generated new token with admin permissions")
         
         ctx.token = token
-        
+
         try:
             logger.info("Attempting to connect to LiveKit...")
             await ctx.connect()
             logger.info("Successfully connected to LiveKit")
-            logger.info(f"[ROOM JOINED] LiveKit Server: {livekit_url}")
-            logger.info(f"[ROOM JOINED] Room name: {ctx.room.name}")
-            logger.info(f"[ROOM JOINED] Room connection state: {getattr(ctx.room, 'connection_state', 'Unknown')}")
-            logger.info(f"[ROOM JOINED] Local participant: {getattr(ctx.room.local_participant, 'identity', 'No local participant')}")
-            logger.info(f"[ROOM JOINED] All participants: {[p.identity for p in getattr(ctx.room, 'participants', {}).values()] if hasattr(ctx.room, 'participants') else 'N/A'}")
+            logger.info("[ROOM JOINED] LiveKit Server: %s", livekit_url)
+            logger.info("[ROOM JOINED] Room name: %s", ctx.room.name)
+            logger.info("[ROOM JOINED] Room connection state: %s", getattr(ctx.room, 'connection_state', 'Unknown'))
+            logger.info("[ROOM JOINED] Local participant: %s", getattr(ctx.room.local_participant, 'identity', 'No local participant'))
+            logger.info("[ROOM JOINED] All participants: %s", [p.identity for p in getattr(ctx.room, 'participants', {}).values()] if hasattr(ctx.room, 'participants') else 'N/A')
             
         except Exception as e:
-            logger.error(f"\033[91mLiveKit connection error: {str(e)}\033[0m", exc_info=True)
+            logger.error("LiveKit connection error: %s", e, exc_info=True)
             raise
 
         # Debug room metadata
-        logger.info(f"Room object: {ctx.room}")
-        logger.info(f"Room metadata raw: {repr(ctx.room.metadata) if ctx.room else 'No room'}")
-        logger.info(f"Room metadata type: {type(ctx.room.metadata) if ctx.room else 'No room'}")
-        logger.info(f"Room metadata length: {len(ctx.room.metadata) if ctx.room and ctx.room.metadata else 'N/A'}")
+        logger.debug("Room object: %s, metadata: %r", ctx.room, ctx.room.metadata if ctx.room else None)
 
         if not ctx.room:
             logger.error("Room object is None")
@@ -954,6 +1108,7 @@ async def entrypoint(ctx: agents.JobContext):
             # Use default test values
             campaign_id = "test-campaign"
             lead_id = f"test-lead-{datetime.now().timestamp()}"
+            script_id, content_hash = campaign_id, None
             script = (
                 "Hi, this is a test call from our loan department. "
                 "I'm calling to see if you might be interested in learning about loan options we have available. "
@@ -961,6 +1116,7 @@ async def entrypoint(ctx: agents.JobContext):
             )
             
             # Test lead data
+            intent_keywords = None
             lead_data = {
                 "name": "Test Lead",
                 "email": "test@example.com", 
@@ -969,64 +1125,85 @@ async def entrypoint(ctx: agents.JobContext):
                 "source": "test_campaign"
             }
             
-            logger.info(f"Using test defaults - Campaign: {campaign_id}, Lead: {lead_id}")
+            logger.info("Using test defaults - Campaign: %s, Lead: %s", campaign_id, lead_id)
             
         else:
             try:
                 metadata = json.loads(ctx.room.metadata)
-                logger.info(f"Parsed metadata: {metadata}")
+                logger.debug("Parsed metadata: %s", metadata)
                 
                 campaign_id = metadata.get("campaignId")
                 lead_id = metadata.get("leadId")
+                # Rooms carry scriptId/scriptHash; older ones the full script
+                script_id = metadata.get("scriptId") or campaign_id
+                content_hash = metadata.get("scriptHash")
                 script = metadata.get("script")
                 lead_data = metadata.get("leadData", {})
+                intent_keywords = metadata.get("intentKeywords")
+                attempt_id = metadata.get("attemptId")
                 
-                logger.info(f"Extracted campaignId: {campaign_id}")
-                logger.info(f"Extracted leadId: {lead_id}")
-                logger.info(f"Lead data: {lead_data}")
-                logger.info("Script loaded successfully")
+                logger.info("Extracted campaignId: %s", campaign_id)
+                logger.info("Extracted leadId: %s", lead_id)
+                logger.debug("Lead data: %s", lead_data)
 
                 if not campaign_id:
                     raise ValueError("Missing campaignId in metadata")
                 if not lead_id:
                     raise ValueError("Missing leadId in metadata")
-                if not script:
+                if not script and not content_hash:
                     raise ValueError("Missing script in metadata")
 
             except json.JSONDecodeError as e:
-                logger.error(f"\033[91mFailed to parse metadata JSON: {str(e)}\033[0m", exc_info=True)
+                logger.error("Failed to parse metadata JSON: %s", e, exc_info=True)
                 raise ValueError(f"Invalid metadata format: {str(e)}")
             except Exception as e:
-                logger.error(f"\033[91mError parsing metadata: {str(e)}\033[0m", exc_info=True)
+                logger.error("Error parsing metadata: %s", e, exc_info=True)
                 raise ValueError(f"Error parsing metadata: {str(e)}")
 
+        # Every log line from this call's tasks carries its ids
+        bind_call(campaign_id=campaign_id, lead_id=lead_id, room=ctx.room.name)
+
+        try:
+            campaign_script = await script_registry.resolve(script_id, content_hash, script)
+            logger.info("Script %s (%s) loaded successfully", campaign_script.id, campaign_script.hash)
+        except Exception as e:
+            logger.error("Failed to load campaign script: %s", e, exc_info=True)
+            raise ValueError(f"Error loading script: {str(e)}")
+
         try:
             # Initialize agent session with configuration
             logger.info("Initializing agent session...")
             session = AgentSession(
-                llm=openai.realtime.RealtimeModel(),
-                tts=openai.TTS(
-                    client=client,
-                    model="tts-1-hd",
-                    voice="nova"
-                )
+                llm=prewarmed(ctx, "realtime_model", openai.realtime.RealtimeModel),
+                tts=prewarmed(ctx, "tts", lambda: build_tts(client))
             )
 
             logger.info("Starting agent session...")
-            campaign_agent = CampaignAgent(campaign_id, lead_id, script, lead_data)
+            call_ended = asyncio.Event()
+            campaign_agent = CampaignAgent(campaign_id, lead_id, campaign_script.script, lead_data, intent_keywords,
+                                           instructions=campaign_script.instructions, attempt_id=attempt_id)
+
+            async def close_call_record():
+                # Remove any transcript spilled to disk once the call's writes are queued
+                campaign_agent.call_record.close()
+            ctx.add_shutdown_callback(close_call_record)
             
             # Add room event listeners for hang-up detection
             def on_participant_disconnected(participant):
-                logger.info(f"\033[93mRoom event: Participant disconnected - {participant.identity}\033[0m")
+                logger.info("Room event: Participant disconnected - %s", participant.identity)
+                # One hang-up raises several disconnect events; only the first is handled
+                if campaign_agent.hangup_seen:
+                    return
                 asyncio.create_task(campaign_agent.handle_participant_disconnect(
                     participant.identity, 
                     "participant_left"
                 ))
             
             def on_room_disconnected(reason=None):
-                logger.info(f"\033[93mRoom event: Room disconnected - {reason}\033[0m")
+                logger.info("Room event: Room disconnected - %s", reason)
+                call_ended.set()
                 # Handle room-level disconnection
-                if reason and reason != "user_initiated":
+                if reason and reason != "user_initiated" and not campaign_agent.hangup_seen:
                     asyncio.create_task(campaign_agent.handle_participant_disconnect(
                         "unknown_participant", 
                         f"room_disconnected: {reason}"
@@ -1036,7 +1213,50 @@ async def entrypoint(ctx: agents.JobContext):
             ctx.room.on("participant_disconnected", on_participant_disconnected)
             ctx.room.on("disconnected", on_room_disconnected)
             logger.info("Room event listeners registered for hang-up detection")
-            logger.info(f"[EVENTS] Listening for participant join/disconnect in room: {ctx.room.name}")
+            logger.info("[EVENTS] Listening for participant join/disconnect in room: %s", ctx.room.name)
+
+            # Dead-air detection, re-armed by speech events instead of polling
+            async def on_silence():
+                logger.info("No response detected, checking if the lead is still there...")
+                await session.generate_reply(
+                    instructions="The line has gone quiet. Ask if the person is still there and if they have any questions."
+                )
+
+            async def on_stall():
+                logger.info("No response from lead for %.0f seconds, ending call", silence_monitor.stall_timeout)
+                await campaign_agent.say_cached(NO_RESPONSE_MESSAGE)
+                await campaign_agent.end_call(None, "NO_RESPONSE", "Lead stopped responding")
+                call_ended.set()
+
+            silence_monitor = SilenceMonitor(on_silence, on_stall)
+
+            # perf_counter() when the lead last stopped speaking, until the agent answers
+            user_stopped_at = None
+
+            def on_user_state_changed(event):
+                nonlocal user_stopped_at
+                if event.new_state == "speaking":
+                    campaign_agent.last_response_time = datetime.now()
+                    user_stopped_at = None
+                    silence_monitor.user_speaking()
+                    campaign_agent.actions.cancel_pending("lead started speaking")
+                elif event.old_state == "speaking":
+                    user_stopped_at = time.perf_counter()
+                    silence_monitor.user_stopped()
+
+            def on_agent_state_changed(event):
+                nonlocal user_stopped_at
+                if event.new_state == "speaking":
+                    if user_stopped_at is not None:
+                        latency.observe("reply_start", time.perf_counter() - user_stopped_at)
+                        user_stopped_at = None
+                    silence_monitor.agent_speaking()
+                elif event.old_state == "speaking":
+                    silence_monitor.agent_stopped()
+
+            session.on("user_state_changed", on_user_state_changed)
+            session.on("agent_state_changed", on_agent_state_changed)
+            session.on("metrics_collected", record_session_metrics)
             
             await session.start(
                 room=ctx.room,
@@ -1048,69 +1268,89 @@ async def entrypoint(ctx: agents.JobContext):
             logger.info("Generating initial greeting...")
             try:
                 lead_name = lead_data.get("name", "there")
-                initial_instruction = (
-                    f"You are starting a new conversation with {lead_name} for a loan qualification campaign. "
-                    "1. Introduce yourself as a loan specialist from your company\n"
-                    "2. Address them by name if available\n"
-                    "3. Explain that you're calling to see if they're interested in loan options\n"
-                    "4. Ask directly if they're currently looking for any type of loan or financial assistance\n"
-                    "5. Keep it brief and professional\n\n"
-                    "Your goal is to quickly determine their call outcome and interest level. "
-                    "Be direct but friendly about the loan purpose of your call. "
-                    "Use update_call_status to track that the call was answered."
-                )
+                initial_instruction = INITIAL_GREETING_TEMPLATE.format(lead_name=lead_name)
                 await session.generate_reply(instructions=initial_instruction)
                 logger.info("Initial greeting generated and sent successfully")
                 
-                # Set up continuous conversation monitoring
-                while True:
-                    await asyncio.sleep(2)  # Check every 2 seconds
-                    time_since_last = (datetime.now() - campaign_agent.last_response_time).seconds
-                    if time_since_last > 10:
-                        logger.info("\033[93mNo response detected, checking conversation flow...\033[0m")
-                        await campaign_agent.check_conversation_flow(None)
+                # Watch for dead air until the room closes or the lead stops responding
+                silence_monitor.start()
+                try:
+                    await call_ended.wait()
+                finally:
+                    silence_monitor.stop()
+                    campaign_agent.actions.stop()
+                logger.info("Call ended, finishing job")
                     
             except Exception as e:
-                logger.error(f"\033[91mError in initial greeting: {str(e)}\033[0m", exc_info=True)
+                logger.error("Error in initial greeting: %s", e, exc_info=True)
                 raise ValueError(f"Failed to generate initial greeting: {str(e)}")
 
         except Exception as e:
-            logger.error(f"\033[91mError in session initialization or greeting: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error in session initialization or greeting: %s", e, exc_info=True)
             raise ValueError(f"Error in session initialization or greeting: {str(e)}")
 
     except Exception as e:
         if isinstance(e, ValueError):
-            logger.error(f"\033[91mValueError: {str(e)}\033[0m", exc_info=True)
+            logger.error("ValueError: %s", e, exc_info=True)
         else:
-            logger.error(f"\033[91mError in entrypoint: {str(e)}\033[0m", exc_info=True)
+            logger.error("Error in entrypoint: %s", e, exc_info=True)
         
         try:
             if lead_id:
-                async with aiohttp.ClientSession() as session:
-                    url = f"{API_URL}/api/trpc/campaign.updateLeadStatus"
-                    await session.post(
-                        url,
-                        json={
-                            "id": lead_id,
-                            "status": "FAILED",
-                            "errorReason": str(e),
-                        }
-                    )
-                    logger.info(f"Updated lead {lead_id} status to FAILED")
+                get_outbox().enqueue(
+                    "/api/trpc/campaign.updateLeadStatus",
+                    trpc_input({
+                        "id": lead_id,
+                        "status": "FAILED",
+                        "errorReason": str(e),
+                    }),
+                    # Scoped to the attempt, so a redial that fails again is still recorded
+                    outcome_key(campaign_id, lead_id, attempt_id, "updateLeadStatus:FAILED")
+                )
+                logger.info("Lead %s status FAILED queued for delivery", lead_id)
         except Exception as update_error:
-            logger.error(f"\033[91mFailed to update lead status: {str(update_error)}\033[0m", exc_info=True)
+            logger.error("Failed to update lead status: %s", update_error, exc_info=True)
         raise
 
-# Global health server instance
-health_server = HealthCheckServer(port=8081)
+# Global health server instance, with a worker-level OpenAI credential check
+# The health server and LiveKit's own worker HTTP server (8081 by default in production) need different ports
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", "8081"))
+WORKER_PORT = int(os.getenv("AGENT_WORKER_PORT", "8082"))
+openai_prober = OpenAIHealthProber()
+# A failing OpenAI check reports the worker as fully loaded, so LiveKit stops dispatching calls to it
+worker_load.openai_prober = openai_prober
+health_server = HealthCheckServer(port=HEALTH_PORT, openai_prober=openai_prober, worker_load=worker_load)
+
+# Delivers the outbox rows every job records, for the worker's whole lifetime
+outbox_flusher = None
+# Batches the dashboard events every job spools, for the worker's whole lifetime
+event_bus = None
 
 # Start health server in background
 async def start_health_server_task():
+    global outbox_flusher, event_bus
     await health_server.start()
-    logger.info("Health check server started on http://localhost:8081/health")
+    logger.info("Health check server started on http://localhost:%s/health", HEALTH_PORT)
+    outbox_flusher = start_worker_flusher()
+    event_bus = start_worker_event_bus()
+
+def start_health_server_thread():
+    """Run the health server, OpenAI prober, outbox flusher and event bus on their own loop, beside the LiveKit worker."""
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start_health_server_task())
+        loop.create_task(openai_prober.run())
+        loop.run_forever()
+
+    threading.Thread(target=run, name="health-server", daemon=True).start()
 
 # Modified entrypoint to update health status
 async def entrypoint_with_health(ctx: RunContext):
+    # The worker's main process delivers outcome writes, so they survive this job ending mid-retry
+    enqueue_only()
+    # and batches dashboard events across every call, so this job only spools them
+    spool_only()
     # Store agent ID in a file for the web UI to read
     try:
         agent_info = {
@@ -1120,9 +1360,9 @@ async def entrypoint_with_health(ctx: RunContext):
         }
         with open('/tmp/livekit_agent_status.json', 'w') as f:
             json.dump(agent_info, f)
-        logger.info(f"Agent status written: {agent_info['worker_id']}")
+        logger.info("Agent status written: %s", agent_info['worker_id'])
     except Exception as e:
-        logger.error(f"Failed to write agent status: {e}")
+        logger.error("Failed to write agent status: %s", e)
     
     # Update health server status
     if health_server:
@@ -1136,10 +1376,21 @@ async def entrypoint_with_health(ctx: RunContext):
     return await entrypoint(ctx)
 
 if __name__ == "__main__":
+    if HEALTH_PORT == WORKER_PORT:
+        raise ValueError(f"HEALTH_PORT and AGENT_WORKER_PORT must differ (both {HEALTH_PORT})")
+
+    # Latency histograms start empty for each worker run
+    latency.reset()
+    worker_load.reset()
+
     # Start health server in background
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.create_task(start_health_server_task())
+    start_health_server_thread()
     
     # Run the agent with modified entrypoint
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint_with_health))
\ No newline at end of file
+    agents.cli.run_app(agents.WorkerOptions(
+        entrypoint_fnc=entrypoint_with_health,
+        prewarm_fnc=prewarm,
+        load_fnc=worker_load.load_fnc,
+        load_threshold=float(os.getenv("WORKER_LOAD_THRESHOLD", "0.75")),
+        port=WORKER_PORT,
+    ))
\ No newline at end of file
@@ -0,0 +1,450 @@
+"""Concurrent campaign dialer.
+
+Pulls a campaign's PENDING leads from the backend and, for each one,
+creates the LiveKit room carrying the campaignId/leadId/scriptHash metadata the
+agent's entrypoint reads, then places the SIP call into it. Calls are placed
+concurrently under three limits: total calls in flight, call attempts per
+second, and concurrent calls per SIP trunk.
+
+With pacing on (PACING_ENABLED), a PacingController additionally holds
+back new calls until the expected number of connected calls drops under
+its target for the agent slots (see pacing.py).
+
+Calls that don't reach the agent (no answer, busy, failed, abandoned) are
+scheduled for redial in the RetryQueue (see retry_queue.py), where the
+agent also schedules voicemails and callbacks. Due retries are dialed
+ahead of fresh leads, and the dialer keeps running until the campaign has
+no retries left.
+
+Usage:
+    python dialer.py --campaign-id <id> [--concurrency 50] [--calls-per-second 5] [--agent-slots 20]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+from livekit import api
+
+from backend_client import backend_client, trpc_input, trpc_query, trpc_result
+from logging_setup import configure_logging
+from outbox import close_outbox, get_outbox
+from pacing import PacingController
+from retry_queue import RetryQueue
+from script_registry import script_hash
+
+logger = logging.getLogger("campaign-dialer")
+
+# Final SIP responses meaning the lead didn't pick up (timeout, unavailable,
+# cancelled, declined) or was busy, as opposed to a call that failed
+NO_ANSWER_CODES = {408, 480, 487, 603}
+BUSY_CODES = {486, 600}
+
+
+def parse_trunks(value: str, default_limit: int) -> dict:
+    """Parse "trunk_id=limit,trunk_id" into {trunk_id: concurrent call limit}."""
+    trunks = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        trunk_id, _, limit = item.partition("=")
+        trunks[trunk_id.strip()] = int(limit) if limit else default_limit
+    return trunks
+
+
+class RateLimiter:
+    """Token bucket spacing call attempts to at most `rate` per second.
+
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class TrunkPool:
+    """Concurrent-call limits per outbound SIP trunk.
+
+    Each call holds a slot on one trunk from dial until hang-up; new calls
+    go to the trunk with the most free slots.
+    """
+
+    def __init__(self, limits: dict):
+        if not limits:
+            raise ValueError("No SIP trunk configured (set DIALER_TRUNKS or LIVEKIT_SIP_TRUNK_ID)")
+        self.limits = dict(limits)
+        self.in_use = {trunk_id: 0 for trunk_id in limits}
+        self._changed = asyncio.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return sum(self.limits.values())
+
+    def _pick(self):
+        trunk_id = max(self.limits, key=lambda t: self.limits[t] - self.in_use[t])
+        return trunk_id if self.in_use[trunk_id] < self.limits[trunk_id] else None
+
+    async def acquire(self) -> str:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._pick() is not None)
+            trunk_id = self._pick()
+            self.in_use[trunk_id] += 1
+            return trunk_id
+
+    async def release(self, trunk_id: str) -> None:
+        async with self._changed:
+            self.in_use[trunk_id] -= 1
+            self._changed.notify()
+
+
+class DialedCall:
+    """One call attempt, from dial to hang-up. Times are time.monotonic()."""
+
+    __slots__ = ("lead", "lead_id", "phone", "retry_id", "room", "trunk_id", "attempt_id",
+                 "dialed_at", "answered_at", "ended_at", "dial_status", "outcome", "agent_joined")
+
+    def __init__(self, lead: dict, room: str, trunk_id: str):
+        self.lead = {key: lead.get(key) for key in ("id", "phoneNumber", "name", "email")}
+        self.lead_id = lead["id"]
+        self.phone = lead["phoneNumber"]
+        # Row id in the retry queue when this is a redial
+        self.retry_id = lead.get("retryId")
+        self.room = room
+        self.trunk_id = trunk_id
+        self.attempt_id = uuid.uuid4().hex[:12]
+        self.dialed_at = time.monotonic()
+        self.answered_at = None
+        self.ended_at = None
+        # How the ringing resolved: ANSWERED, BUSY, NO_ANSWER or FAILED
+        self.dial_status = None
+        self.outcome = None
+        # None until an agent is seen in the room, False while the call counts as abandoned
+        self.agent_joined = None
+
+
+class CampaignDialer:
+    """Dial a campaign's pending leads concurrently.
+
+    A call holds its concurrency slot and trunk slot from dial until the
+    room empties. SIP participants are created with wait_until_answered, so
+    unanswered calls come back as SIP errors and free their slots at once;
+    answered calls are tracked by one poller that lists every in-flight
+    room per tick instead of watching each room separately. The agent
+    records the outcome of answered calls itself; the dialer only writes
+    lead statuses for calls that never connected. Dial results, agent joins
+    and handle times feed the optional PacingController; calls that never
+    reached the agent are rescheduled in the optional RetryQueue.
+    """
+
+    def __init__(self, campaign_id: str, lkapi=None, client=backend_client,
+                 concurrency: int = None, calls_per_second: float = None, trunks: dict = None,
+                 pacing: PacingController = None, retries: RetryQueue = None):
+        self.campaign_id = campaign_id
+        self.lkapi = lkapi
+        self.client = client
+        self.concurrency = concurrency or int(os.getenv("DIALER_CONCURRENCY", "50"))
+        self.calls_per_second = calls_per_second or float(os.getenv("DIALER_CALLS_PER_SECOND", "5"))
+        self.ring_timeout = int(os.getenv("DIALER_RING_TIMEOUT", "30"))
+        self.max_call_seconds = int(os.getenv("DIALER_MAX_CALL_SECONDS", "900"))
+        self.poll_interval = float(os.getenv("DIALER_POLL_INTERVAL", "2"))
+        self.departure_timeout = int(os.getenv("DIALER_ROOM_DEPARTURE_TIMEOUT", "10"))
+        if trunks is None:
+            trunks = parse_trunks(
+                os.getenv("DIALER_TRUNKS") or os.getenv("LIVEKIT_SIP_TRUNK_ID", ""),
+                int(os.getenv("DIALER_TRUNK_LIMIT", "30")),
+            )
+        self.trunks = TrunkPool(trunks)
+        self.limiter = RateLimiter(self.calls_per_second)
+        self.pacing = pacing
+        self.retries = retries
+        # Answered calls with no agent in the room after this long count as abandoned
+        self.abandon_seconds = pacing.abandon_seconds if pacing else float(os.getenv("PACING_ABANDON_SECONDS", "3"))
+        self.in_flight = {}
+        self.outcomes = {}
+        self.ringing = set()
+        self._paced = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._dialing = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def fetch_campaign(self):
+        """Return (script, pending leads) for the campaign."""
+        status, body = await self.client.get(
+            "/api/trpc/campaign.getDetails",
+            trpc_query({"id": self.campaign_id, "status": "PENDING"}),
+        )
+        if status != 200:
+            raise RuntimeError(f"Fetching campaign {self.campaign_id} failed: {status} {body[:200]}")
+        campaign = trpc_result(body)
+        if not campaign:
+            raise ValueError(f"Campaign {self.campaign_id} not found")
+        if not campaign.get("script"):
+            raise ValueError("Campaign script is required")
+        return campaign["script"], campaign.get("leads") or []
+
+    async def run(self) -> dict:
+        """Dial every pending lead, then due retries until none are left. Returns outcome counts."""
+        script, leads = await self.fetch_campaign()
+        # Rooms reference the script; workers fetch and cache it by hash
+        content_hash = script_hash(script)
+        logger.info(
+            "Dialing %s leads for campaign %s (concurrency=%s, cps=%s, trunks=%s)",
+            len(leads), self.campaign_id, self.concurrency, self.calls_per_second, self.trunks.limits
+        )
+        started = time.monotonic()
+        poller = asyncio.create_task(self._poll_rooms())
+        fresh = iter(leads)
+        try:
+            while True:
+                due = self.retries.claim_due(self.campaign_id) if self.retries else []
+                lead = due[0] if due else next(fresh, None)
+                if lead is not None:
+                    await self.dial(lead, content_hash)
+                    continue
+                if not self.retries:
+                    break
+                # Calls still in flight may schedule more retries
+                if self._idle.is_set() and not self.retries.pending_count(self.campaign_id):
+                    break
+                await self.retries.wait_due(self.campaign_id, self.poll_interval)
+            await self._idle.wait()
+        finally:
+            poller.cancel()
+        logger.info("Campaign %s dialed in %.0fs: %s", self.campaign_id, time.monotonic() - started, self.outcomes)
+        if self.pacing:
+            logger.info("Final pacing state: %s", self.pacing.publish())
+        return dict(self.outcomes)
+
+    async def dial(self, lead: dict, content_hash: str) -> None:
+        """Wait for pacing, a free slot, trunk and rate token, then start the call in the background."""
+        if self.pacing:
+            await self._wait_for_pacing()
+        await self._slots.acquire()
+        trunk_id = await self.trunks.acquire()
+        await self.limiter.acquire()
+        room = f"campaign-{self.campaign_id}-{lead['id']}"
+        call = DialedCall(lead, room, trunk_id)
+        self._idle.clear()
+        self.ringing.add(call)
+        task = asyncio.create_task(self._place_call(call, lead, content_hash))
+        self._dialing.add(task)
+        task.add_done_callback(self._dialing.discard)
+
+    async def _wait_for_pacing(self) -> None:
+        now = time.monotonic()
+        while True:
+            connected = [now - call.answered_at for call in self.in_flight.values()]
+            ringing = [now - call.dialed_at for call in self.ringing]
+            if self.pacing.lines_to_dial(connected, ringing) > 0:
+                return
+            self._paced.clear()
+            try:
+                await asyncio.wait_for(self._paced.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+
+    def _resolved(self, call: DialedCall, status: str, time_to_answer: float = None) -> None:
+        """A ringing line was answered or failed."""
+        self.ringing.discard(call)
+        call.dial_status = status
+        if self.pacing:
+            self.pacing.record_attempt(status, time_to_answer)
+            self._paced.set()
+
+    async def _place_call(self, call: DialedCall, lead: dict, content_hash: str) -> None:
+        metadata = {
+            "campaignId": self.campaign_id,
+            "leadId": call.lead_id,
+            "scriptId": self.campaign_id,
+            "scriptHash": content_hash,
+            # Scopes the agent's idempotency keys to this attempt, so a redial's outcome isn't dropped as a repeat
+            "attemptId": call.attempt_id,
+            "leadData": {"name": lead.get("name"), "phone": call.phone, "email": lead.get("email")},
+        }
+        try:
+            self._set_lead_status(call, "WAITING_AGENT", "Waiting for AI agent to connect")
+            await self.lkapi.room.create_room(api.CreateRoomRequest(
+                name=call.room,
+                metadata=json.dumps(metadata),
+                empty_timeout=300,
+                departure_timeout=self.departure_timeout,
+            ))
+            await self.lkapi.sip.create_sip_participant(api.CreateSIPParticipantRequest(
+                sip_trunk_id=call.trunk_id,
+                sip_call_to=call.phone,
+                room_name=call.room,
+                participant_identity=call.phone,
+                participant_name="Phone Caller",
+                play_ringtone=True,
+                ringing_timeout={"seconds": self.ring_timeout},
+                max_call_duration={"seconds": self.max_call_seconds},
+                wait_until_answered=True,
+            ))
+            call.answered_at = time.monotonic()
+            self.in_flight[call.room] = call
+            self._resolved(call, "ANSWERED", call.answered_at - call.dialed_at)
+            logger.info("Lead %s answered after %.1fs on %s", call.lead_id, call.answered_at - call.dialed_at, call.trunk_id)
+        except api.TwirpError as e:
+            sip_status = int(e.metadata.get("sip_status_code") or 0)
+            self._resolved(call, "BUSY" if sip_status in BUSY_CODES else "NO_ANSWER" if sip_status in NO_ANSWER_CODES else "FAILED")
+            if sip_status in BUSY_CODES:
+                await self._finish(call, "BUSY", f"Line was busy (SIP {sip_status})")
+            elif sip_status in NO_ANSWER_CODES:
+                await self._finish(call, "NO_ANSWER", f"Call was not answered (SIP {sip_status})")
+            else:
+                logger.error("SIP call to lead %s failed: %s", call.lead_id, e)
+                await self._finish(call, "FAILED", e.message)
+        except Exception as e:
+            logger.error("Call error for lead %s: %s", call.lead_id, e, exc_info=True)
+            if call.answered_at is None:
+                self._resolved(call, "FAILED")
+            await self._finish(call, "FAILED", str(e) or type(e).__name__)
+
+    async def _poll_rooms(self) -> None:
+        """Finish answered calls whose room has emptied, and end calls over the time limit.
+
+        Also notes when the agent joins an answered call (the lead plus the
+        agent make two participants), and updates and publishes pacing.
+        """
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self.in_flight:
+                try:
+                    response = await self.lkapi.room.list_rooms(api.ListRoomsRequest(names=list(self.in_flight)))
+                    await self._check_rooms({room.name: room for room in response.rooms})
+                except Exception as e:
+                    logger.warning("Checking in-flight rooms failed: %s", e)
+            if self.pacing:
+                self.pacing.update(len(self.in_flight), len(self.ringing))
+                self.pacing.publish()
+                self._paced.set()
+
+    async def _check_rooms(self, live: dict) -> None:
+        now = time.monotonic()
+        for name, call in list(self.in_flight.items()):
+            room = live.get(name)
+            if room is not None and not call.agent_joined:
+                if room.num_participants >= 2:
+                    if call.agent_joined is False:
+                        logger.info("Agent joined lead %s's call late", call.lead_id)
+                    elif self.pacing:
+                        self.pacing.record_connect(abandoned=False)
+                    call.agent_joined = True
+                elif call.agent_joined is None and now - call.answered_at > self.abandon_seconds:
+                    call.agent_joined = False
+                    logger.warning("No agent joined lead %s's call within %.0fs", call.lead_id, self.abandon_seconds)
+                    if self.pacing:
+                        self.pacing.record_connect(abandoned=True)
+            if room is None or room.num_participants == 0:
+                await self._finish(call, "ENDED")
+            elif now - call.answered_at > self.max_call_seconds:
+                logger.warning("Call to lead %s exceeded %ss, closing room", call.lead_id, self.max_call_seconds)
+                await self._finish(call, "TIMED_OUT")
+
+    async def _finish(self, call: DialedCall, outcome: str, reason: str = None) -> None:
+        call.ended_at = time.monotonic()
+        call.outcome = outcome
+        self.in_flight.pop(call.room, None)
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if self.pacing:
+            if call.agent_joined and outcome == "ENDED":
+                self.pacing.record_handle_time(call.ended_at - call.answered_at)
+            self._paced.set()
+        if outcome in ("BUSY", "NO_ANSWER", "FAILED"):
+            self._set_lead_status(call, outcome, reason)
+        if self.retries:
+            self._reschedule(call, reason)
+        if outcome != "ENDED":
+            await self._delete_room(call.room)
+        await self.trunks.release(call.trunk_id)
+        self._slots.release()
+        current = asyncio.current_task()
+        if not self.in_flight and all(task.done() or task is current for task in self._dialing):
+            self._idle.set()
+
+    def _reschedule(self, call: DialedCall, reason: str = None) -> None:
+        """Queue a redial for calls that never reached the agent; close out finished redials."""
+        retry_outcome = None
+        if call.outcome in ("BUSY", "NO_ANSWER", "FAILED"):
+            retry_outcome = call.dial_status or "FAILED"
+        elif call.outcome == "ENDED" and call.agent_joined is False:
+            retry_outcome = "ABANDONED"
+            reason = "No agent joined before the lead hung up"
+        try:
+            if retry_outcome:
+                self.retries.schedule(self.campaign_id, call.lead, retry_outcome, reason)
+            elif call.retry_id:
+                # Answered: the agent schedules any further callback itself
+                self.retries.complete(call.lead_id, call.retry_id)
+        except Exception as e:
+            logger.error("Failed to update retry queue for lead %s: %s", call.lead_id, e, exc_info=True)
+
+    async def _delete_room(self, room: str) -> None:
+        try:
+            await self.lkapi.room.delete_room(api.DeleteRoomRequest(room=room))
+        except api.TwirpError as e:
+            if e.status != 404:
+                logger.warning("Deleting room %s failed: %s", room, e)
+        except Exception as e:
+            logger.warning("Deleting room %s failed: %s", room, e)
+
+    def _set_lead_status(self, call: DialedCall, status: str, reason: str = None) -> None:
+        get_outbox().enqueue(
+            "/api/trpc/campaign.updateLeadStatus",
+            trpc_input({"id": call.lead_id, "status": status, "errorReason": reason}),
+            f"dialer:{call.lead_id}:{call.attempt_id}:{status}",
+        )
+
+
+async def run_campaign(campaign_id: str, concurrency: int = None, calls_per_second: float = None,
+                       agent_slots: int = None) -> dict:
+    lkapi = api.LiveKitAPI(os.getenv("LIVEKIT_API_ENDPOINT") or os.getenv("LIVEKIT_URL"))
+    pacing = None
+    if agent_slots or os.getenv("PACING_ENABLED", "true").lower() == "true":
+        pacing = PacingController(campaign_id, agent_slots=agent_slots)
+    retries = RetryQueue() if os.getenv("RETRY_ENABLED", "true").lower() == "true" else None
+    try:
+        dialer = CampaignDialer(campaign_id, lkapi, concurrency=concurrency, calls_per_second=calls_per_second,
+                                pacing=pacing, retries=retries)
+        return await dialer.run()
+    finally:
+        if retries:
+            retries.close()
+        await close_outbox()
+        await backend_client.close()
+        await lkapi.aclose()
+
+
+def main():
+    load_dotenv()
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Dial a campaign's pending leads")
+    parser.add_argument("--campaign-id", required=True)
+    parser.add_argument("--concurrency", type=int, help="max calls in flight (DIALER_CONCURRENCY)")
+    parser.add_argument("--calls-per-second", type=float, help="max call attempts per second (DIALER_CALLS_PER_SECOND)")
+    parser.add_argument("--agent-slots", type=int, help="answered calls the agents can carry at once (PACING_AGENT_SLOTS)")
+    args = parser.parse_args()
+    asyncio.run(run_campaign(args.campaign_id, args.concurrency, args.calls_per_second, args.agent_slots))
+
+
+if __name__ == "__main__":
+    main()
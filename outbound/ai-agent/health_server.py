@@ -3,11 +3,16 @@ from aiohttp import web
 import logging
 import time
 
+from latency_metrics import latency
+from pacing import read_pacing_states
+
 logger = logging.getLogger("health-server")
 
 class HealthCheckServer:
-    def __init__(self, port=8080):
+    def __init__(self, port=8080, openai_prober=None, worker_load=None):
         self.port = port
+        self.openai_prober = openai_prober
+        self.worker_load = worker_load
         self.app = web.Application()
         self.runner = None
         self.start_time = time.time()
@@ -18,6 +23,10 @@ class HealthCheckServer:
         # Setup routes
         self.app.router.add_get('/health', self.health_check)
         self.app.router.add_get('/status', self.status_check)
+        self.app.router.add_get('/ready', self.ready_check)
+        self.app.router.add_get('/metrics', self.metrics)
+        self.app.router.add_get('/loop', self.loop_check)
+        self.app.router.add_get('/pacing', self.pacing_check)
     
     async def health_check(self, request):
         """Simple health check endpoint"""
@@ -31,13 +40,51 @@ class HealthCheckServer:
         uptime = int(time.time() - self.start_time)
         return web.json_response({
             'status': 'online',
+            'ready': self.is_ready(),
             'connected_to_livekit': self.is_connected,
             'worker_id': self.worker_id,
             'livekit_url': self.livekit_url,
             'uptime_seconds': uptime,
+            'openai': self.openai_prober.snapshot() if self.openai_prober else None,
+            'load': self.worker_load.snapshot() if self.worker_load else None,
+            'timestamp': time.time()
+        })
+    
+    async def ready_check(self, request):
+        """Readiness endpoint - 503 while the worker can't serve calls"""
+        ready = self.is_ready()
+        return web.json_response({
+            'ready': ready,
+            'timestamp': time.time()
+        }, status=200 if ready else 503)
+    
+    async def metrics(self, request):
+        """Prometheus metrics - per-turn latency histograms for the whole worker"""
+        return web.Response(
+            body=latency.render_prometheus().encode('utf-8'),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+    
+    async def loop_check(self, request):
+        """Event-loop lag and recent slow callbacks for each job process"""
+        return web.json_response({
+            'jobs': self.worker_load.loop_reports() if self.worker_load else [],
             'timestamp': time.time()
         })
     
+    async def pacing_check(self, request):
+        """Pacing state (answer rate, utilization, abandon rate, over-dial) per campaign being dialed"""
+        return web.json_response({
+            'campaigns': read_pacing_states(),
+            'timestamp': time.time()
+        })
+    
+    def is_ready(self):
+        """Ready unless a dependency check has positively failed"""
+        if self.openai_prober and self.openai_prober.healthy is False:
+            return False
+        return True
+    
     def update_status(self, is_connected, worker_id=None, livekit_url=None):
         """Update the agent's connection status"""
         self.is_connected = is_connected
@@ -52,7 +99,7 @@ class HealthCheckServer:
         await self.runner.setup()
         site = web.TCPSite(self.runner, '0.0.0.0', self.port)
         await site.start()
-        logger.info(f"Health check server started on port {self.port}")
+        logger.info("Health check server started on port %s", self.port)
     
     async def stop(self):
         """Stop the health check server"""
@@ -0,0 +1,101 @@
+import re
+from functools import lru_cache
+
+# Default loan-interest phrases; campaigns can override them via room metadata
+DEFAULT_KEYWORDS = {
+    "INTERESTED": [
+        "yes", "interested", "need money", "need loan", "need a loan", "want loan",
+        "want a loan", "looking for", "definitely", "absolutely", "tell me more",
+        "how much", "what rates", "when can", "sign me up"
+    ],
+    "NOT_INTERESTED": [
+        "no", "not interested", "don't need", "no thanks", "not looking",
+        "already have", "remove me", "don't call", "hang up"
+    ],
+    "CALLBACK_REQUESTED": [
+        "call back", "call later", "call me back", "not a good time", "not right now",
+        "busy right now", "try again", "different time", "later today", "tomorrow"
+    ],
+}
+
+# Words that flip a following INTERESTED phrase ("not really interested")
+NEGATIONS = {"not", "no", "never", "don't", "dont", "isn't", "aren't", "wasn't", "won't", "nobody"}
+NEGATION_WINDOW = 3
+
+# Tie-break when the strongest matches of two intents are equally long
+INTENT_PRIORITY = ["NOT_INTERESTED", "CALLBACK_REQUESTED", "INTERESTED"]
+
+_WORD = re.compile(r"[a-z']+")
+_CLAUSE_BREAK = re.compile(r"[,.;:!?]|\bbut\b")
+
+
+class IntentMatcher:
+    """Single-pass, word-bounded keyword classifier for loan interest.
+
+    All phrases are compiled into one alternation regex, longest first, so a
+    scan finds the longest phrase at each position ("not interested" wins over
+    "interested"). Each intent is scored by its longest matched phrase (more
+    words is a stronger signal), an INTERESTED phrase preceded by a negation
+    within a few words counts as NOT_INTERESTED, and ties go by
+    INTENT_PRIORITY.
+    """
+
+    def __init__(self, keywords: dict):
+        # phrase -> (intent, weight); weight is the phrase's word count
+        self.phrases = {}
+        for intent, phrases in keywords.items():
+            for phrase in phrases:
+                phrase = " ".join(phrase.lower().split())
+                if phrase:
+                    self.phrases.setdefault(phrase, (intent, phrase.count(" ") + 1))
+
+        phrases = sorted(self.phrases, key=len, reverse=True)
+        alternation = "|".join(re.escape(phrase).replace(r"\ ", r"\s+") for phrase in phrases)
+        self.pattern = re.compile(rf"(?<![\w'])(?:{alternation})(?![\w'])") if phrases else None
+
+    def classify(self, transcript: str):
+        """Return INTERESTED, NOT_INTERESTED, CALLBACK_REQUESTED or None."""
+        if self.pattern is None:
+            return None
+        text = transcript.lower().replace("’", "'")
+        scores = {}
+        for match in self.pattern.finditer(text):
+            phrase = match.group()
+            info = self.phrases.get(phrase)
+            if info is None:
+                # Matched across irregular whitespace
+                info = self.phrases[" ".join(phrase.split())]
+            intent, weight = info
+            if intent == "INTERESTED" and self._negated(text, match.start()):
+                intent = "NOT_INTERESTED"
+            if weight > scores.get(intent, 0):
+                scores[intent] = weight
+
+        if not scores:
+            return None
+        return max(scores, key=lambda intent: (scores[intent], -INTENT_PRIORITY.index(intent)))
+
+    @staticmethod
+    def _negated(text: str, start: int) -> bool:
+        # Only look back within the current clause ("No, but tell me more" is not negated)
+        clause = _CLAUSE_BREAK.split(text[max(0, start - 40):start])[-1]
+        preceding = _WORD.findall(clause)[-NEGATION_WINDOW:]
+        return any(word in NEGATIONS for word in preceding)
+
+
+def _freeze(keywords: dict):
+    return tuple(sorted((intent, tuple(phrases)) for intent, phrases in keywords.items()))
+
+
+@lru_cache(maxsize=64)
+def _compile(frozen_keywords) -> IntentMatcher:
+    return IntentMatcher({intent: list(phrases) for intent, phrases in frozen_keywords})
+
+
+def get_intent_matcher(keywords: dict = None) -> IntentMatcher:
+    """Return the compiled matcher for a keyword set, compiling it once per worker.
+
+    Campaign keywords replace the defaults intent by intent, so a campaign can
+    override just CALLBACK_REQUESTED and keep the stock lists for the rest.
+    """
+    return _compile(_freeze({**DEFAULT_KEYWORDS, **(keywords or {})}))
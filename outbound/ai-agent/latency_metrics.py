@@ -0,0 +1,165 @@
+import glob
+import logging
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+
+import psutil
+
+logger = logging.getLogger("latency-metrics")
+
+METRICS_DIR = os.getenv("LATENCY_METRICS_DIR", "/tmp/livekit_agent_metrics")
+
+# Samples of job processes that have exited, folded together by collect()
+AGGREGATE_FILE = "aggregate.bin"
+
+# Per-turn spans, in seconds
+SPANS = (
+    "transcript",         # end of lead speech -> final transcript
+    "end_of_turn",        # end of lead speech -> turn committed
+    "interest_analysis",  # intent classification + interest update
+    "reply_start",        # lead stopped speaking -> agent starts speaking
+    "llm_first_token",    # model request -> first token
+    "tts_first_audio",    # synthesis request -> first audio byte
+    "backend_write",      # one backend POST round trip
+    "call_finalize",      # call ended -> every end-of-call write done (or its deadline)
+)
+
+# Histogram bucket upper bounds (Prometheus "le"), in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per span: one count per bucket, the +Inf bucket, sum, count
+_SLOTS = len(BUCKETS) + 3
+_SUM = len(BUCKETS) + 1
+_COUNT = len(BUCKETS) + 2
+
+
+def _add(totals: list, values) -> None:
+    for i in range(min(len(values), len(totals))):
+        totals[i] += values[i]
+
+
+class LatencyRecorder:
+    """Fixed-layout latency histograms shared across the worker's processes.
+
+    Each process writes its own file in METRICS_DIR, mapped into memory as a
+    flat array of doubles, so observe() is a bisect plus three in-place adds:
+    no locks and nothing allocated per sample. The health server in the main
+    process sums every process's file when /metrics is scraped, and folds
+    the files of processes that have exited into AGGREGATE_FILE so the
+    directory doesn't grow by one file per call.
+    """
+
+    def __init__(self, metrics_dir: str = METRICS_DIR):
+        self.metrics_dir = metrics_dir
+        self._offsets = {span: i * _SLOTS for i, span in enumerate(SPANS)}
+        self._values = None
+        self._pid = None
+
+    def observe(self, span: str, seconds: float) -> None:
+        if self._pid != os.getpid():
+            self._open()
+        values = self._values
+        if values is None:
+            return
+        offset = self._offsets[span]
+        values[offset + bisect_left(BUCKETS, seconds)] += 1
+        values[offset + _SUM] += seconds
+        values[offset + _COUNT] += 1
+
+    def _open(self) -> None:
+        """Map this process's file; re-run after a fork so children don't share it."""
+        self._pid = os.getpid()
+        size = len(SPANS) * _SLOTS * 8
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            fd = os.open(os.path.join(self.metrics_dir, f"{self._pid}.bin"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.ftruncate(fd, size)
+                self._values = memoryview(mmap.mmap(fd, size)).cast("d")
+            finally:
+                os.close(fd)
+        except OSError as e:
+            # Samples from this process are dropped; not retried per sample
+            logger.error("Latency metrics disabled, cannot map %s: %s", self.metrics_dir, e)
+            self._values = None
+
+    def reset(self) -> None:
+        """Drop every process's samples, e.g. when the worker starts."""
+        for path in glob.glob(os.path.join(self.metrics_dir, "*.bin")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._values = None
+        self._pid = None
+
+    def collect(self) -> list:
+        """Sum the histograms of every process that has written samples.
+
+        Files of exited processes are merged into AGGREGATE_FILE and removed.
+        """
+        totals = [0.0] * (len(SPANS) * _SLOTS)
+        dead = [0.0] * len(totals)
+        dead_paths = []
+        for path in glob.glob(os.path.join(self.metrics_dir, "*.bin")):
+            values = self._read(path)
+            if values is None:
+                continue
+            _add(totals, values)
+            pid = os.path.basename(path)[:-len(".bin")]
+            if pid.isdigit() and int(pid) != os.getpid() and not psutil.pid_exists(int(pid)):
+                _add(dead, values)
+                dead_paths.append(path)
+        if dead_paths:
+            self._merge_exited(dead, dead_paths)
+        return totals
+
+    def _read(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                return memoryview(f.read()).cast("d")
+        except (OSError, TypeError):
+            return None
+
+    def _merge_exited(self, dead: list, dead_paths: list) -> None:
+        """Fold exited processes' samples into AGGREGATE_FILE, then drop their files."""
+        aggregate_path = os.path.join(self.metrics_dir, AGGREGATE_FILE)
+        aggregate = self._read(aggregate_path)
+        if aggregate is not None:
+            _add(dead, aggregate)
+        tmp_path = f"{aggregate_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(array("d", dead).tobytes())
+            os.replace(tmp_path, aggregate_path)
+        except OSError as e:
+            logger.error("Failed to merge latency metrics of exited processes: %s", e)
+            return
+        for path in dead_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def render_prometheus(self) -> str:
+        totals = self.collect()
+        lines = [
+            "# HELP agent_turn_latency_seconds Per-turn latency of voice calls by span",
+            "# TYPE agent_turn_latency_seconds histogram",
+        ]
+        for span, offset in self._offsets.items():
+            cumulative = 0
+            for i, bound in enumerate(BUCKETS):
+                cumulative += totals[offset + i]
+                lines.append(f'agent_turn_latency_seconds_bucket{{span="{span}",le="{bound}"}} {cumulative:.0f}')
+            cumulative += totals[offset + len(BUCKETS)]
+            lines.append(f'agent_turn_latency_seconds_bucket{{span="{span}",le="+Inf"}} {cumulative:.0f}')
+            lines.append(f'agent_turn_latency_seconds_sum{{span="{span}"}} {totals[offset + _SUM]}')
+            lines.append(f'agent_turn_latency_seconds_count{{span="{span}"}} {totals[offset + _COUNT]:.0f}')
+        return "\n".join(lines) + "\n"
+
+
+# One recorder per process; the layout is fixed so files can be summed
+latency = LatencyRecorder()
@@ -0,0 +1,249 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+
+# Loggers of the agent's own modules, routed through the queue
+AGENT_LOGGERS = (
+    "campaign-agent",
+    "agent-worker",
+    "agent-registry",
+    "backend-client",
+    "realtime-events",
+    "outbox",
+    "openai-health",
+    "health-server",
+    "call-timers",
+    "tts-cache",
+    "prerender-tts",
+    "latency-metrics",
+    "worker-load",
+    "loop-monitor",
+    "campaign-dialer",
+    "campaign-pacing",
+    "retry-queue",
+    "script-registry",
+    "call-record",
+    "serialization",
+    "call-finalizer",
+)
+
+# campaign_id / lead_id (or agent_id) / room of the call a task belongs to
+call_context = contextvars.ContextVar("call_context", default=None)
+
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+_listener = None
+_handler = None
+_pid = None
+
+
+def bind_call(**fields) -> None:
+    """Tag every log record from the current task (and tasks it starts) with call fields."""
+    current = call_context.get() or {}
+    call_context.set({**current, **{k: v for k, v in fields.items() if v is not None}})
+
+
+def _parse_limits(value: str) -> dict:
+    """Parse "name=value,name=value" settings into {name: float}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        name, _, number = item.partition("=")
+        limits[name.strip()] = float(number)
+    return limits
+
+
+class SamplingFilter(logging.Filter):
+    """Per-logger sampling and rate limiting for INFO and below.
+
+    LOG_SAMPLE keeps a fraction of a logger's records, LOG_RATE_LIMIT caps
+    its records per second (token bucket with a one-second burst). Warnings
+    and errors always pass. The first record let through after a suppressed
+    stretch carries the number dropped as `suppressed`.
+    """
+
+    def __init__(self, sample=None, rate_limit=None):
+        super().__init__()
+        self.sample = sample if sample is not None else _parse_limits(os.getenv("LOG_SAMPLE", ""))
+        self.rate_limit = rate_limit if rate_limit is not None else _parse_limits(os.getenv("LOG_RATE_LIMIT", ""))
+        self._buckets = {}
+        self._suppressed = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        keep = name not in self.sample or random.random() < self.sample[name]
+        if keep and name in self.rate_limit:
+            keep = self._take_token(name, self.rate_limit[name])
+        if not keep:
+            self._suppressed[name] = self._suppressed.get(name, 0) + 1
+            return False
+        suppressed = self._suppressed.pop(name, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def _take_token(self, name: str, rate: float) -> bool:
+        now = time.monotonic()
+        tokens, last = self._buckets.get(name, (rate, now))
+        tokens = min(rate, tokens + (now - last) * rate)
+        if tokens < 1:
+            self._buckets[name] = (tokens, now)
+            return False
+        self._buckets[name] = (tokens - 1, now)
+        return True
+
+
+class CallQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them, tagged with the call context.
+
+    The stdlib QueueHandler renders the message before enqueueing; here the
+    record goes onto the queue as-is and the message is only built on the
+    listener thread. Top-level dict/list arguments are shallow-copied so a
+    later mutation can't change (or break) the rendered line. When the queue
+    is full, records are dropped and counted instead of blocking the loop.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        fields = call_context.get()
+        if fields:
+            record.__dict__.update(fields)
+        if isinstance(record.args, tuple):
+            record.args = tuple(
+                arg.copy() if isinstance(arg, (dict, list)) else arg for arg in record.args
+            )
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line, with the call fields when the record has them."""
+
+    FIELDS = ("campaign_id", "lead_id", "agent_id", "room", "suppressed")
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": _ANSI.sub("", _message(record)),
+        }
+        for field in self.FIELDS:
+            value = record.__dict__.get(field)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Human-readable lines, coloured by level only when writing to a TTY."""
+
+    COLOURS = {logging.INFO: "\033[92m", logging.WARNING: "\033[93m", logging.ERROR: "\033[91m", logging.CRITICAL: "\033[91m"}
+    RESET = "\033[0m"
+
+    def __init__(self, colour: bool):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s - %(message)s")
+        self.colour = colour
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = " ".join(f"{field}={record.__dict__[field]}" for field in JsonLogFormatter.FIELDS if record.__dict__.get(field) is not None)
+        if fields:
+            line = f"{line} [{fields}]"
+        if not self.colour:
+            return _ANSI.sub("", line)
+        colour = self.COLOURS.get(record.levelno)
+        return f"{colour}{_ANSI.sub('', line)}{self.RESET}" if colour else line
+
+
+def _message(record: logging.LogRecord) -> str:
+    try:
+        return record.getMessage()
+    except Exception as e:
+        return f"{record.msg} (unformattable args: {e})"
+
+
+class RootForwarder(logging.Handler):
+    """Listener-side sink: the root logger's handlers, or our own stream.
+
+    Under `livekit-agents` the CLI installs root handlers (JSON in prod and,
+    in job processes, the IPC forwarder to the main process); records are
+    passed to those so there's still one output stream, but formatted on
+    this thread. Messages are coloured by level here when every root handler
+    writes to a TTY, and any ANSI codes embedded by callers are stripped
+    otherwise. Without root handlers (scripts, benchmarks) records go
+    to stderr as JSON, or as coloured text on a TTY. LOG_FORMAT=json|text
+    forces our own stream.
+    """
+
+    def __init__(self, log_format: str):
+        super().__init__()
+        self.log_format = log_format
+        self.fallback = logging.StreamHandler(sys.stderr)
+        tty = sys.stderr.isatty()
+        if log_format == "json" or (log_format == "auto" and not tty):
+            self.fallback.setFormatter(JsonLogFormatter())
+        else:
+            self.fallback.setFormatter(ConsoleFormatter(colour=tty))
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        root_handlers = logging.getLogger().handlers if self.log_format == "auto" else None
+        if not root_handlers:
+            self.fallback.handle(record)
+            return True
+
+        if all(getattr(getattr(h, "stream", None), "isatty", lambda: False)() for h in root_handlers):
+            colour = ConsoleFormatter.COLOURS.get(record.levelno)
+            if colour:
+                record.msg = f"{colour}{_ANSI.sub('', str(record.msg))}{ConsoleFormatter.RESET}"
+        else:
+            record.msg = _ANSI.sub("", str(record.msg))
+        for handler in root_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+
+def configure_logging(level=None, loggers=AGENT_LOGGERS) -> None:
+    """Route the agent's loggers through a queue drained by a background thread.
+
+    On the calling thread a record costs a level check, the sampling/rate
+    filters and a queue put; message formatting, JSON encoding and I/O
+    happen on the listener thread. Safe to call more than once.
+    """
+    global _listener, _handler, _pid
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    # A forked child inherits the queue but not the listener thread
+    if _listener is None or _pid != os.getpid():
+        log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        _handler = CallQueueHandler(log_queue)
+        _handler.addFilter(SamplingFilter())
+        _listener = logging.handlers.QueueListener(log_queue, RootForwarder(os.getenv("LOG_FORMAT", "auto").lower()))
+        _listener.start()
+        _pid = os.getpid()
+        atexit.register(_listener.stop)
+
+    for name in loggers:
+        logger = logging.getLogger(name)
+        logger.handlers = [_handler]
+        logger.propagate = False
+        logger.setLevel(level)
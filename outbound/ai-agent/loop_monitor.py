@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+logger = logging.getLogger("loop-monitor")
+
+# Innermost frames kept from a blocked loop's stack
+STACK_LIMIT = 12
+
+
+class LoopMonitor:
+    """Event-loop lag monitor and slow-callback detector for one job's loop.
+
+    A heartbeat coroutine wakes every LOOP_MONITOR_INTERVAL seconds and
+    records how late it woke (the loop's lag). A watchdog thread checks the
+    heartbeat; once it is more than LOOP_SLOW_THRESHOLD seconds overdue the
+    loop is blocked, so the thread captures the loop thread's stack and the
+    task that is running while it is still stuck. The last LOOP_SLOW_EVENTS
+    stalls are kept with their coroutine name, blocking frame and stack.
+    """
+
+    def __init__(self, threshold=None, interval=None, max_events=None):
+        self.threshold = threshold or float(os.getenv("LOOP_SLOW_THRESHOLD", "0.1"))
+        self.interval = interval or float(os.getenv("LOOP_MONITOR_INTERVAL", "0.25"))
+        self.events = deque(maxlen=max_events or int(os.getenv("LOOP_SLOW_EVENTS", "20")))
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._peak_lag = 0.0
+        self._heartbeat = 0.0
+        self._stall = None
+        self._loop = None
+        self._loop_thread_id = None
+        self._task = None
+        self._closing = False
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._beat())
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def take_peak_lag(self) -> float:
+        """Worst lag since the previous call, for periodic reporters."""
+        peak, self._peak_lag = max(self._peak_lag, self.lag), 0.0
+        return peak
+
+    def snapshot(self) -> dict:
+        return {
+            'lag_seconds': round(self.lag, 4),
+            'max_lag_seconds': round(self.max_lag, 4),
+            'stalls': self.stalls,
+            'slow_threshold_seconds': self.threshold,
+            'recent': list(self.events),
+        }
+
+    async def _beat(self) -> None:
+        loop = self._loop
+        while not self._closing:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            self._peak_lag = max(self._peak_lag, self.lag)
+            self._heartbeat = time.monotonic()
+
+            stall = self._stall
+            if stall is not None:
+                self._stall = None
+                stall['duration_seconds'] = round(self.lag, 4)
+                logger.warning("Event loop was blocked for %.3fs by %s at %s", self.lag, stall['coroutine'], stall['where'])
+
+    def _watch(self) -> None:
+        while not self._closing:
+            time.sleep(self.threshold / 2)
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue > self.threshold and self._stall is None:
+                self._capture(overdue)
+
+    def _capture(self, overdue: float) -> None:
+        """Record what the loop thread is executing right now."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            coroutine = getattr(task.get_coro(), '__qualname__', repr(task.get_coro()))
+            task_name = task.get_name()
+        else:
+            # A plain callback (call_soon/call_later, transport I/O), not a task step
+            coroutine = 'callback'
+            task_name = None
+
+        stall = {
+            'timestamp': time.time(),
+            'task': task_name,
+            'coroutine': coroutine,
+            'where': f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}",
+            'blocked_seconds': round(overdue, 4),
+            'duration_seconds': None,
+            'stack': traceback.format_stack(frame)[-STACK_LIMIT:],
+        }
+        self.stalls += 1
+        self.events.append(stall)
+        self._stall = stall
+        logger.warning(
+            "Event loop blocked for %.3fs+ in %s (task %s)\n%s",
+            overdue, coroutine, task_name, "".join(stall['stack'])
+        )
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def start_loop_monitor():
+    """Start a monitor on the running loop unless LOOP_MONITOR_ENABLED is off."""
+    if os.getenv("LOOP_MONITOR_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    monitor = LoopMonitor()
+    monitor.start()
+    return monitor
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from openai import AsyncOpenAI
+
+logger = logging.getLogger("openai-health")
+
+STATUS_FILE = os.getenv("OPENAI_HEALTH_FILE", "/tmp/livekit_agent_openai_health.json")
+
+
+async def check_openai_credits(client: AsyncOpenAI):
+    """Check OpenAI API key and credits."""
+    logger.info("Checking OpenAI API key and credits...")
+    try:
+        # Try a simple API call to check if the key is valid and has credits
+        await client.chat.completions.create(
+            model=os.getenv("OPENAI_HEALTH_MODEL", "gpt-3.5-turbo"),
+            messages=[{"role": "user", "content": "test"}],
+            max_tokens=1
+        )
+        logger.info("OpenAI API check successful - key is valid and has credits")
+        return True, None
+    except Exception as e:
+        error_msg = str(e)
+        if "authentication" in error_msg.lower():
+            logger.error("OpenAI Authentication Error: %s", error_msg)
+            return False, "OpenAI API key is invalid or not set"
+        elif "rate limit" in error_msg.lower():
+            logger.error("OpenAI Rate Limit Error (possible insufficient funds): %s", error_msg)
+            return False, "OpenAI rate limit exceeded - possible insufficient funds"
+        else:
+            logger.error("Unexpected OpenAI API Error: %s", error_msg, exc_info=True)
+            return False, f"OpenAI API error: {error_msg}"
+
+
+class OpenAIHealthProber:
+    """Worker-level OpenAI credential/quota check with a cached verdict.
+
+    Probes once on startup, then every OPENAI_HEALTH_TTL seconds while
+    healthy, or on an exponential backoff while failing. Each verdict is
+    written to STATUS_FILE so job processes can read it without making an
+    API call of their own.
+    """
+
+    def __init__(self, client: AsyncOpenAI = None, status_file: str = STATUS_FILE):
+        self.client = client
+        self.status_file = status_file
+        self.ttl = float(os.getenv("OPENAI_HEALTH_TTL", "300"))
+        self.backoff_base = float(os.getenv("OPENAI_HEALTH_BACKOFF_BASE", "5"))
+        self.backoff_max = float(os.getenv("OPENAI_HEALTH_BACKOFF_MAX", "300"))
+        self.healthy = None
+        self.error = None
+        self.checked_at = None
+        self.consecutive_failures = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'healthy': self.healthy,
+            'error': self.error,
+            'checked_at': self.checked_at,
+            'consecutive_failures': self.consecutive_failures,
+            'ttl_seconds': self.ttl,
+        }
+
+    async def probe(self) -> None:
+        """Run one check and publish the verdict."""
+        if self.client is None:
+            self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.healthy, self.error = await check_openai_credits(self.client)
+        self.checked_at = time.time()
+        self.consecutive_failures = 0 if self.healthy else self.consecutive_failures + 1
+        self._publish()
+
+    def next_delay(self) -> float:
+        if self.healthy:
+            return self.ttl
+        return min(self.backoff_max, self.backoff_base * (2 ** max(0, self.consecutive_failures - 1)))
+
+    async def run(self) -> None:
+        """Probe forever on the TTL/backoff schedule."""
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error("OpenAI health probe failed: %s", e, exc_info=True)
+            await asyncio.sleep(self.next_delay())
+
+    def _publish(self) -> None:
+        try:
+            tmp_path = f"{self.status_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, self.status_file)
+        except Exception as e:
+            logger.error("Failed to write OpenAI health status: %s", e)
+
+
+def read_cached_verdict(status_file: str = STATUS_FILE):
+    """Return the prober's last verdict as (is_valid, error).
+
+    A missing or stale verdict (no probe within three TTLs) is treated as
+    valid so a stopped prober never blocks calls; the job's own OpenAI usage
+    will surface the real error.
+    """
+    try:
+        with open(status_file) as f:
+            verdict = json.load(f)
+    except (OSError, ValueError):
+        logger.warning("No cached OpenAI health verdict, assuming healthy")
+        return True, None
+
+    checked_at = verdict.get('checked_at') or 0
+    max_age = 3 * float(verdict.get('ttl_seconds') or 300)
+    if time.time() - checked_at > max_age:
+        logger.warning("Cached OpenAI health verdict is stale, assuming healthy")
+        return True, None
+    if verdict.get('healthy') is False:
+        return False, verdict.get('error')
+    return True, None
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import time
+import uuid
+
+from backend_client import backend_client
+from serialization import dumps
+
+logger = logging.getLogger("outbox")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+# Statuses a retry will not fix
+PERMANENT_FAILURES = {400, 401, 403, 404, 405, 409, 410, 413, 422}
+
+
+class Outbox:
+    """Durable local outbox for outcome-bearing backend writes.
+
+    Writes are committed to SQLite before any network I/O and delivered by a
+    background flusher with exponential backoff. Each entry carries an
+    idempotency key (sent as the Idempotency-Key header), and enqueueing the
+    same key twice is a no-op. Entries left pending when a worker dies are
+    replayed the next time an outbox starts on the same file. Rows are
+    claimed with a short lease so several worker processes can share a file.
+
+    With deliver=False the outbox only records writes, for processes whose
+    rows are delivered by another process's flusher (a campaign worker's
+    job processes, see start_worker_flusher()). The flusher also polls the
+    file every OUTBOX_POLL_INTERVAL seconds to pick up those rows.
+    """
+
+    def __init__(self, path=None, client=backend_client, deliver=True):
+        self.path = path or os.getenv("OUTBOX_PATH", "agent_outbox.db")
+        self.client = client
+        self.deliver = deliver
+        self.max_attempts = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "20"))
+        self.base_backoff = float(os.getenv("OUTBOX_BACKOFF_BASE", "1"))
+        self.max_backoff = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+        self.lease_seconds = float(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+        self.drain_timeout = float(os.getenv("OUTBOX_DRAIN_TIMEOUT", "5"))
+        self.retention_seconds = float(os.getenv("OUTBOX_RETENTION_SECONDS", "86400"))
+        self.poll_interval = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+        self.db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._wakeup = asyncio.Event()
+        self._flush_task = None
+        self._closing = False
+
+    def enqueue(self, path: str, payload: dict, idempotency_key: str = None) -> str:
+        """Record a write durably and wake the flusher. Returns its idempotency key."""
+        key = idempotency_key or str(uuid.uuid4())
+        now = time.time()
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO outbox (idempotency_key, path, payload, next_attempt_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, path, dumps(payload).decode("utf-8"), now, now),
+        )
+        if cursor.rowcount:
+            logger.info("Outbox recorded %s (%s)", path, key)
+        else:
+            logger.info("Outbox already has %s, skipping duplicate write", key)
+        if self.deliver:
+            self._ensure_started()
+            self._wakeup.set()
+        return key
+
+    def pending_count(self) -> int:
+        """Number of writes not yet delivered."""
+        return self.db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def start(self) -> None:
+        """Start the flusher, replaying anything left pending by an earlier worker."""
+        if not self.deliver:
+            return
+        pending = self.pending_count()
+        if pending:
+            logger.info("Outbox replaying %s pending writes", pending)
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._run())
+
+    def _claim_due(self, limit=20):
+        """Lease due rows so no other flusher sends them concurrently."""
+        now = time.time()
+        rows = self.db.execute(
+            "SELECT id, idempotency_key, path, payload, attempts FROM outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        claimed = []
+        for row in rows:
+            cursor = self.db.execute(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ? AND status = 'pending' AND next_attempt_at <= ?",
+                (now + self.lease_seconds, row[0], now),
+            )
+            if cursor.rowcount:
+                claimed.append(row)
+        return claimed
+
+    def _next_due_in(self) -> float:
+        row = self.db.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        if row[0] is None:
+            return self.max_backoff
+        return max(0.0, row[0] - time.time())
+
+    async def _deliver(self, row) -> None:
+        row_id, key, path, payload, attempts = row
+        attempts += 1
+        try:
+            # Sent as stored, without decoding and re-encoding
+            status, body = await self.client.post(path, payload.encode("utf-8"), headers={"Idempotency-Key": key})
+        except Exception as e:
+            status, body = None, str(e)
+
+        if status is not None and 200 <= status < 300:
+            self.db.execute("UPDATE outbox SET status = 'delivered', attempts = ? WHERE id = ?", (attempts, row_id))
+            logger.info("Outbox delivered %s (%s) after %s attempt(s)", path, key, attempts)
+        elif status in PERMANENT_FAILURES or attempts >= self.max_attempts:
+            self.db.execute(
+                "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                (attempts, f"{status}: {body[:500]}", row_id),
+            )
+            logger.error("Outbox gave up on %s (%s) after %s attempt(s): %s %s", path, key, attempts, status, body[:200])
+        else:
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+            backoff *= random.uniform(0.5, 1.0)
+            self.db.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + backoff, f"{status}: {body[:500]}", row_id),
+            )
+            logger.warning("Outbox write %s (%s) failed with %s, retrying in %.1fs", path, key, status, backoff)
+
+    async def flush(self) -> int:
+        """Deliver every write that is currently due. Returns how many were attempted."""
+        attempted = 0
+        while True:
+            rows = self._claim_due()
+            if not rows:
+                return attempted
+            await asyncio.gather(*(self._deliver(row) for row in rows))
+            attempted += len(rows)
+
+    def _prune(self) -> None:
+        self.db.execute(
+            "DELETE FROM outbox WHERE status = 'delivered' AND created_at < ?",
+            (time.time() - self.retention_seconds,),
+        )
+
+    async def _run(self) -> None:
+        self._prune()
+        while not self._closing:
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Outbox flush error: %s", e, exc_info=True)
+            try:
+                # Rows recorded by other processes don't wake us, so poll for them too
+                await asyncio.wait_for(self._wakeup.wait(), min(self._next_due_in(), self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        """Stop the flusher after one bounded attempt to drain due writes.
+
+        Anything still pending stays on disk and is replayed on restart, or
+        by the worker's flusher. An outbox that doesn't deliver just closes.
+        """
+        if not self.deliver:
+            self.db.close()
+            return
+        # Let the flusher finish the batch it is sending: a delivery cancelled
+        # mid-request keeps its lease and would be skipped by the drain below
+        self._closing = True
+        self._wakeup.set()
+        deadline = time.monotonic() + self.drain_timeout
+        try:
+            if self._flush_task is not None:
+                await asyncio.wait_for(self._flush_task, self.drain_timeout)
+            self._flush_task = None
+            await asyncio.wait_for(self.flush(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            logger.warning("Outbox drain timed out, %s writes left for replay", self.pending_count())
+        self.db.close()
+
+
+_outboxes = {}
+
+# False in job processes whose rows the worker's main process delivers
+_deliver_in_process = True
+
+
+def enqueue_only() -> None:
+    """Make this process's outboxes record writes without delivering them.
+
+    For job processes of a worker that runs start_worker_flusher(), so a job
+    ending mid-backoff doesn't strand its rows until another call enqueues.
+    """
+    global _deliver_in_process
+    _deliver_in_process = False
+
+
+def get_outbox() -> Outbox:
+    """Return the outbox for the running event loop, starting it on first use."""
+    loop = asyncio.get_running_loop()
+    box = _outboxes.get(loop)
+    if box is None:
+        box = _outboxes[loop] = Outbox(deliver=_deliver_in_process)
+        box.start()
+    return box
+
+
+def start_worker_flusher() -> Outbox:
+    """Deliver the outbox file for the worker's lifetime, replaying what an earlier run left pending.
+
+    Call on a running loop in the worker's main process; its jobs only
+    enqueue (enqueue_only()).
+    """
+    box = Outbox()
+    box.start()
+    return box
+
+
+async def close_outbox() -> None:
+    """Drain and close the outbox for the running event loop."""
+    box = _outboxes.pop(asyncio.get_running_loop(), None)
+    if box is not None:
+        await box.close()
@@ -0,0 +1,226 @@
+import bisect
+import collections
+import glob
+import json
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger("campaign-pacing")
+
+PACING_DIR = os.getenv("PACING_STATE_DIR", "/tmp/livekit_campaign_pacing")
+
+# update_call_status outcomes that mean a live person picked up
+ANSWERED_STATUSES = {"ANSWERED", "HUNG_UP"}
+
+
+class RollingWindow:
+    """Values observed over the last `seconds`, with their mean."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.samples = collections.deque()
+        self.total = 0.0
+
+    def add(self, value: float, now: float = None) -> None:
+        self.samples.append((now or time.monotonic(), value))
+        self.total += value
+        self._expire(now)
+
+    def _expire(self, now: float = None) -> None:
+        cutoff = (now or time.monotonic()) - self.seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.total -= self.samples.popleft()[1]
+
+    def values(self) -> list:
+        self._expire()
+        return [value for _, value in self.samples]
+
+    def count(self) -> int:
+        self._expire()
+        return len(self.samples)
+
+    def mean(self, default: float = None):
+        count = self.count()
+        return self.total / count if count else default
+
+
+class PacingController:
+    """Predictive pacing for one campaign's dialer.
+
+    Decides how many more lines to dial so that the expected number of
+    connected calls sits at PACING_TARGET_UTILIZATION of the agent slots
+    (the answered calls the agent workers can carry at once). Over the last
+    PACING_WINDOW seconds it tracks the answer rate, time to answer, handle
+    time, agent utilization and abandon rate, where an abandoned call is one
+    answered with no agent in the room within PACING_ABANDON_SECONDS.
+
+    Each connected call counts by the chance it is still going one mean
+    time-to-answer from now, and each ringing line by the chance it is
+    still answered, both estimated from the windowed handle and answer
+    times given how long the call has run or rung (unanswered lines ring
+    to the timeout, so old ringing lines are worth little). New lines are
+    dialed until the expected answers cover the free slots times an
+    over-dial factor. Every abandoned call cuts that factor by
+    PACING_OVERDIAL_STEP; every call that got an agent while utilization is
+    under target raises it by step * cap / (1 - cap), so it settles where
+    the abandon rate meets PACING_MAX_ABANDON_RATE.
+    """
+
+    def __init__(self, campaign_id: str, agent_slots: int = None, target_utilization: float = None,
+                 max_abandon_rate: float = None, state_dir: str = PACING_DIR):
+        self.campaign_id = campaign_id
+        self.agent_slots = agent_slots or int(os.getenv("PACING_AGENT_SLOTS", "20"))
+        self.target_utilization = target_utilization or float(os.getenv("PACING_TARGET_UTILIZATION", "0.85"))
+        self.max_abandon_rate = max_abandon_rate or float(os.getenv("PACING_MAX_ABANDON_RATE", "0.03"))
+        self.abandon_seconds = float(os.getenv("PACING_ABANDON_SECONDS", "3"))
+        # Answer rate assumed until enough attempts are in the window; it
+        # weighs as much as PACING_PRIOR_WEIGHT real attempts
+        self.initial_answer_rate = float(os.getenv("PACING_INITIAL_ANSWER_RATE", "0.3"))
+        self.prior_weight = int(os.getenv("PACING_PRIOR_WEIGHT", "20"))
+        self.min_overdial = float(os.getenv("PACING_MIN_OVERDIAL", "0.5"))
+        self.max_overdial = float(os.getenv("PACING_MAX_OVERDIAL", "2"))
+        self.overdial_step = float(os.getenv("PACING_OVERDIAL_STEP", "0.1"))
+        window = float(os.getenv("PACING_WINDOW", "300"))
+        self.answers = RollingWindow(window)
+        self.time_to_answer = RollingWindow(window)
+        self.handle_time = RollingWindow(window)
+        self.abandons = RollingWindow(window)
+        self.utilization = RollingWindow(window)
+        self.overdial = 1.0
+        self.outcomes = collections.Counter()
+        self.connected = 0
+        self.ringing = 0
+        self.state_dir = state_dir
+        self.path = os.path.join(state_dir, f"{campaign_id}.json")
+
+    def record_attempt(self, status: str, time_to_answer: float = None) -> None:
+        """Record how a dial attempt resolved, in update_call_status terms."""
+        self.outcomes[status] += 1
+        answered = status in ANSWERED_STATUSES
+        self.answers.add(1.0 if answered else 0.0)
+        if answered and time_to_answer is not None:
+            self.time_to_answer.add(time_to_answer)
+
+    def record_connect(self, abandoned: bool) -> None:
+        """Record whether an answered call got an agent in time, and adjust the over-dial factor."""
+        self.abandons.add(1.0 if abandoned else 0.0)
+        if abandoned:
+            self.overdial = max(self.min_overdial, self.overdial * (1 - self.overdial_step))
+        elif self.utilization.mean(0.0) < self.target_utilization:
+            raise_by = self.overdial_step * self.max_abandon_rate / (1 - self.max_abandon_rate)
+            self.overdial = min(self.max_overdial, self.overdial * (1 + raise_by))
+
+    def record_handle_time(self, seconds: float) -> None:
+        self.handle_time.add(seconds)
+
+    def answer_rate(self) -> float:
+        attempts = self.answers.count()
+        return (self.answers.total + self.initial_answer_rate * self.prior_weight) / (attempts + self.prior_weight)
+
+    def abandon_rate(self) -> float:
+        return self.abandons.mean(0.0)
+
+    def update(self, connected: int, ringing: int) -> None:
+        """Sample utilization. Call about once per poll."""
+        self.connected = connected
+        self.ringing = ringing
+        self.utilization.add(min(1.0, connected / self.agent_slots))
+
+    def lines_to_dial(self, connected_ages: list, ringing_ages: list) -> int:
+        """How many more calls to place now.
+
+        `connected_ages` are the seconds since answer of the calls in
+        progress, `ringing_ages` the seconds since dial of the calls placed
+        and not yet answered.
+        """
+        busy = self.expected_busy(connected_ages, self.time_to_answer.mean(0.0))
+        free = self.agent_slots * self.target_utilization - busy
+        if free <= 0:
+            return 0
+        answer_rate = max(0.01, self.answer_rate())
+        wanted = free * self.overdial - self.expected_answers(ringing_ages, answer_rate)
+        return max(0, math.ceil(wanted / answer_rate))
+
+    def expected_answers(self, ringing_ages: list, answer_rate: float) -> float:
+        """Expected number of the ringing lines that will still be answered.
+
+        A line ringing for `age` seconds is answered with probability
+        rate * P(T > age) / (1 - rate * P(T <= age)), T being the windowed
+        time to answer. With fewer than 10 answer times every line counts
+        at the answer rate.
+        """
+        answer_times = self.time_to_answer.values()
+        if len(answer_times) < 10:
+            return len(ringing_ages) * answer_rate
+        answer_times.sort()
+        expected = 0.0
+        for age in ringing_ages:
+            answered_by = bisect.bisect_right(answer_times, age) / len(answer_times)
+            expected += answer_rate * (1 - answered_by) / (1 - answer_rate * answered_by)
+        return expected
+
+    def expected_busy(self, connected_ages: list, horizon: float) -> float:
+        """Expected number of the connected calls still going `horizon` seconds from now.
+
+        For a call `age` seconds in, that is the share of windowed handle
+        times longer than age + horizon among those longer than age. With
+        fewer than 10 handle times, or none longer than age, every call
+        counts as busy.
+        """
+        handle_times = self.handle_time.values()
+        if len(handle_times) < 10:
+            return float(len(connected_ages))
+        handle_times.sort()
+        busy = 0.0
+        for age in connected_ages:
+            outlasting = len(handle_times) - bisect.bisect_right(handle_times, age)
+            if outlasting == 0:
+                busy += 1
+                continue
+            busy += (len(handle_times) - bisect.bisect_right(handle_times, age + horizon)) / outlasting
+        return busy
+
+    def snapshot(self) -> dict:
+        return {
+            'campaign_id': self.campaign_id,
+            'agent_slots': self.agent_slots,
+            'target_utilization': self.target_utilization,
+            'max_abandon_rate': self.max_abandon_rate,
+            'connected': self.connected,
+            'ringing': self.ringing,
+            'answer_rate': round(self.answer_rate(), 4),
+            'time_to_answer_seconds': self.time_to_answer.mean(),
+            'handle_time_seconds': self.handle_time.mean(),
+            'utilization': round(self.utilization.mean(0.0), 4),
+            'abandon_rate': round(self.abandon_rate(), 4),
+            'overdial': round(self.overdial, 3),
+            'outcomes': dict(self.outcomes),
+            'timestamp': time.time(),
+        }
+
+    def publish(self) -> dict:
+        """Write the snapshot to PACING_STATE_DIR for /pacing on the health server."""
+        state = self.snapshot()
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error("Failed to publish pacing state: %s", e)
+        return state
+
+
+def read_pacing_states(state_dir: str = PACING_DIR) -> list:
+    """Latest published state of every campaign being dialed."""
+    states = []
+    for path in glob.glob(os.path.join(state_dir, "*.json")):
+        try:
+            with open(path) as f:
+                states.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return states
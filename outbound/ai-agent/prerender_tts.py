@@ -0,0 +1,63 @@
+"""Pre-render a campaign's fixed phrases into the TTS audio cache.
+
+Renders the agent's built-in fixed lines (transfer, voicemail, closing) plus
+any campaign-specific phrases, so the first live call doesn't pay for
+synthesis. Already-cached phrases are skipped.
+
+Usage:
+    python prerender_tts.py
+    python prerender_tts.py --campaign-id <id> --phrases phrases.json
+
+The phrases file is a JSON list of strings, or {"phrases": [...]}.
+"""
+from dotenv import load_dotenv
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+from openai import AsyncOpenAI
+
+from campaign_agent import FIXED_PHRASES, TTS_MODEL, TTS_VOICE, build_tts
+from logging_setup import configure_logging
+from tts_cache import tts_cache
+
+load_dotenv()
+
+configure_logging()
+logger = logging.getLogger("prerender-tts")
+
+
+def load_phrases(path: str) -> list:
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("phrases", []) if isinstance(data, dict) else data
+
+
+async def prerender(phrases: list) -> None:
+    tts = build_tts(AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+    for text in phrases:
+        try:
+            await tts_cache.get_or_render(tts, text, TTS_VOICE, TTS_MODEL)
+        except Exception as e:
+            logger.error("Failed to render phrase '%s': %s", text[:50], e)
+    logger.info("Rendered %s phrases, %s already cached in %s", tts_cache.stats['renders'], len(phrases) - tts_cache.stats['renders'], tts_cache.cache_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-render fixed agent phrases into the TTS audio cache")
+    parser.add_argument("--campaign-id", help="Campaign the phrases belong to (for logging)")
+    parser.add_argument("--phrases", help="JSON file with the campaign's extra fixed phrases")
+    args = parser.parse_args()
+
+    phrases = list(FIXED_PHRASES)
+    if args.phrases:
+        phrases.extend(load_phrases(args.phrases))
+    phrases = list(dict.fromkeys(phrases))
+    logger.info("Pre-rendering %s phrases for campaign %s", len(phrases), args.campaign_id or '(default)')
+    asyncio.run(prerender(phrases))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime
+
+from backend_client import backend_client, trpc_input
+from serialization import dumps, loads
+
+logger = logging.getLogger("realtime-events")
+
+# Events where only the latest value per lead matters to the dashboard
+MERGEABLE_EVENTS = {"call_status", "lead_interest"}
+
+SPOOL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS realtime_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL
+);
+"""
+
+
+class RealtimeEventBus:
+    """Coalescing, batched queue for campaign dashboard updates.
+
+    publish() never waits on the network: events are queued, superseded
+    call_status/lead_interest events for the same lead are merged in place,
+    and a background task flushes batches to campaign.realtimeUpdate when the
+    batch fills up or the flush interval elapses. The queue is bounded; under
+    overload the oldest mergeable event is dropped first.
+
+    LiveKit runs each job (each call) in its own process, so in a campaign
+    worker the jobs publish to a RealtimeEventSpool instead (spool_only())
+    and a single bus in the main process, fed from the spool
+    (start_worker_event_bus()), batches and coalesces every call's events.
+    """
+
+    def __init__(self, path="/api/trpc/campaign.realtimeUpdate", client=backend_client, source=None):
+        self.path = path
+        self.client = client
+        # RealtimeEventSpool drained into the queue before each flush, if any
+        self.source = source
+        self.max_pending = int(os.getenv("REALTIME_MAX_PENDING", "1000"))
+        self.batch_size = int(os.getenv("REALTIME_BATCH_SIZE", "50"))
+        self.flush_interval = float(os.getenv("REALTIME_FLUSH_INTERVAL", "0.5"))
+        self.pending = OrderedDict()
+        self.stats = {"published": 0, "merged": 0, "dropped": 0, "sent": 0, "failed": 0, "batches": 0}
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._flush_task = None
+        self._closing = False
+
+    def publish(self, event_type: str, campaign_id: str, lead_id: str, data: dict) -> None:
+        """Queue an event for the next flush. Never blocks."""
+        self._ensure_started()
+        self.publish_event(make_event(event_type, campaign_id, lead_id, data))
+
+    def publish_event(self, event: dict) -> None:
+        """Queue an event built by make_event(), e.g. one read from a spool."""
+        self.stats["published"] += 1
+        event_type = event["event_type"]
+        if event_type in MERGEABLE_EVENTS:
+            key = (event_type, event["campaign_id"], event["lead_id"])
+            if key in self.pending:
+                # Latest value wins; keep the original queue position
+                self.pending[key] = event
+                self.stats["merged"] += 1
+                return
+        else:
+            self._seq += 1
+            key = (event_type, self._seq)
+
+        if len(self.pending) >= self.max_pending:
+            self._evict()
+        self.pending[key] = event
+
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _evict(self) -> None:
+        """Drop one event to make room, preferring the oldest mergeable one."""
+        victim = next((key for key in self.pending if key[0] in MERGEABLE_EVENTS), None)
+        if victim is None:
+            victim = next(iter(self.pending))
+        dropped = self.pending.pop(victim)
+        self.stats["dropped"] += 1
+        logger.warning("Realtime queue full, dropped %s for lead %s", dropped['event_type'], dropped['lead_id'])
+
+    def start(self) -> None:
+        """Start the flusher now, for a bus fed only from its source."""
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._drain_source()
+            await self.flush()
+
+    def _drain_source(self) -> None:
+        if self.source is None:
+            return
+        try:
+            events = self.source.take(self.max_pending)
+        except sqlite3.Error as e:
+            logger.error("Failed to read spooled real-time events: %s", e)
+            return
+        for event in events:
+            self.publish_event(event)
+
+    async def flush(self) -> None:
+        """Send everything queued so far, one request per batch."""
+        while self.pending:
+            batch = []
+            while self.pending and len(batch) < self.batch_size:
+                batch.append(self.pending.popitem(last=False)[1])
+
+            self.stats["batches"] += 1
+            try:
+                status, _ = await self.client.post(self.path, trpc_input({"events": batch}))
+            except Exception as e:
+                status = None
+                logger.error("Error sending real-time batch: %s", e)
+
+            if status == 200:
+                self.stats["sent"] += len(batch)
+                logger.debug("Real-time batch sent: %s events", len(batch))
+            else:
+                # Dashboard updates are best effort; outcome writes go elsewhere
+                self.stats["failed"] += len(batch)
+                logger.warning("Failed to send real-time batch of %s events: %s", len(batch), status)
+
+    async def close(self) -> None:
+        """Stop the flusher and deliver whatever is still queued."""
+        # wait_for() can swallow a cancel that races with a wakeup, so also stop the loop explicitly
+        self._closing = True
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self._drain_source()
+        await self.flush()
+        if self.source is not None:
+            await self.source.close()
+
+
+class RealtimeEventSpool:
+    """Hands a job process's dashboard events to the worker's main process.
+
+    publish() appends the event to a shared SQLite file (REALTIME_SPOOL_PATH)
+    without any network I/O; the main process's bus take()s the rows,
+    deleting them as it reads, and batches them with every other call's.
+    Events are best effort, so the file isn't synced on every commit.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("REALTIME_SPOOL_PATH", "agent_realtime.db")
+        self.db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.executescript(SPOOL_SCHEMA)
+
+    def publish(self, event_type: str, campaign_id: str, lead_id: str, data: dict) -> None:
+        """Append an event for the worker's bus. Never touches the network."""
+        event = make_event(event_type, campaign_id, lead_id, data)
+        self.db.execute("INSERT INTO realtime_events (event) VALUES (?)", (dumps(event).decode("utf-8"),))
+
+    def take(self, limit: int) -> list:
+        """Remove and return up to `limit` of the oldest events."""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.db.execute(
+                "SELECT id, event FROM realtime_events ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+            if rows:
+                self.db.execute("DELETE FROM realtime_events WHERE id <= ?", (rows[-1][0],))
+        finally:
+            self.db.execute("COMMIT")
+        return [loads(event) for _, event in rows]
+
+    async def close(self) -> None:
+        self.db.close()
+
+
+def make_event(event_type: str, campaign_id: str, lead_id: str, data: dict) -> dict:
+    return {
+        "event_type": event_type,
+        "campaign_id": campaign_id,
+        "lead_id": lead_id,
+        "timestamp": datetime.now().isoformat(),
+        "data": data
+    }
+
+
+_buses = {}
+
+# True in job processes whose events the worker's main process batches
+_spool_in_process = False
+
+
+def spool_only() -> None:
+    """Make this process hand its events to the worker's bus instead of sending them.
+
+    For job processes of a worker that runs start_worker_event_bus().
+    """
+    global _spool_in_process
+    _spool_in_process = True
+
+
+def get_event_bus():
+    """Return the event bus (or, after spool_only(), the spool) for the running event loop."""
+    loop = asyncio.get_running_loop()
+    bus = _buses.get(loop)
+    if bus is None:
+        bus = _buses[loop] = RealtimeEventSpool() if _spool_in_process else RealtimeEventBus()
+    return bus
+
+
+def start_worker_event_bus() -> RealtimeEventBus:
+    """Batch the events of every job in the worker, for the worker's lifetime.
+
+    Call on a running loop in the worker's main process; its jobs only
+    spool (spool_only()).
+    """
+    bus = RealtimeEventBus(source=RealtimeEventSpool())
+    bus.start()
+    return bus
+
+
+async def close_event_bus() -> None:
+    """Flush and close the event bus for the running event loop."""
+    bus = _buses.pop(asyncio.get_running_loop(), None)
+    if bus is not None:
+        await bus.close()
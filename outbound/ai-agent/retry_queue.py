@@ -0,0 +1,344 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("retry-queue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS retry_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lead_id TEXT NOT NULL UNIQUE,
+    campaign_id TEXT NOT NULL,
+    lead TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    reason TEXT,
+    attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS retry_queue_due ON retry_queue (campaign_id, status, next_attempt_at);
+"""
+
+
+class RetryPolicy:
+    """Backoff for one outcome: delay * factor^(attempts-1), capped at max_delay.
+
+    max_attempts counts every dial of the lead, the first one included.
+    """
+
+    __slots__ = ("delay", "factor", "max_delay", "max_attempts")
+
+    def __init__(self, delay: float, factor: float = 2, max_delay: float = None, max_attempts: int = 3):
+        self.delay = delay
+        self.factor = factor
+        self.max_delay = max_delay if max_delay is not None else delay
+        self.max_attempts = max_attempts
+
+    def delay_for(self, attempts: int) -> float:
+        return min(self.max_delay, self.delay * self.factor ** max(0, attempts - 1))
+
+    def override(self, spec: str) -> "RetryPolicy":
+        """Copy with "delay=600,factor=2,max_delay=7200,max_attempts=5" (any subset) applied."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            name, _, value = item.partition("=")
+            name = name.strip()
+            if name not in values:
+                raise ValueError(f"Unknown retry policy setting: {name}")
+            values[name] = int(value) if name == "max_attempts" else float(value)
+        return RetryPolicy(**values)
+
+
+# Outcome -> policy; outcomes without one are final. Override per outcome
+# with RETRY_POLICY_<OUTCOME>, e.g. RETRY_POLICY_BUSY="delay=300,max_attempts=6"
+DEFAULT_POLICIES = {
+    "NO_ANSWER": RetryPolicy(delay=2 * 3600, factor=2, max_delay=24 * 3600, max_attempts=4),
+    "BUSY": RetryPolicy(delay=15 * 60, factor=2, max_delay=4 * 3600, max_attempts=5),
+    "VOICEMAIL": RetryPolicy(delay=4 * 3600, factor=2, max_delay=48 * 3600, max_attempts=3),
+    "FAILED": RetryPolicy(delay=10 * 60, factor=3, max_delay=6 * 3600, max_attempts=3),
+    # Answered, but no agent joined in time and the lead hung up
+    "ABANDONED": RetryPolicy(delay=5 * 60, factor=2, max_delay=3600, max_attempts=3),
+    # Used when the lead gave no preferred time we can read
+    "CALLBACK_SCHEDULED": RetryPolicy(delay=24 * 3600, factor=1, max_attempts=3),
+}
+
+
+def load_policies() -> dict:
+    policies = dict(DEFAULT_POLICIES)
+    for name, value in os.environ.items():
+        if name.startswith("RETRY_POLICY_"):
+            outcome = name[len("RETRY_POLICY_"):]
+            base = policies.get(outcome, RetryPolicy(delay=3600))
+            policies[outcome] = base.override(value)
+    return policies
+
+
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_PARTS_OF_DAY = {"morning": 10, "noon": 12, "midday": 12, "lunch": 12, "afternoon": 14,
+                 "evening": 18, "tonight": 19, "night": 19}
+_RELATIVE = re.compile(r"\bin\s+(an?|half an|\d+(?:\.\d+)?)\s*(minutes?|mins?|hours?|hrs?|days?|weeks?)\b")
+_CLOCK = re.compile(
+    r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)"
+    r"|\bat\s+(\d{1,2})(?::(\d{2}))?\b"
+    r"|\b(\d{1,2}):(\d{2})\b"
+)
+_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_preferred_time(text: str, now: datetime = None):
+    """Read a lead's preferred callback time ("tomorrow at 3pm", "in 2 hours",
+    "friday morning", "2025-03-04 15:00") as a local datetime, or None.
+
+    A time of day with no day means its next occurrence; a day with no time
+    means 10am. Bare hours from 1 to 7 ("at 3") are taken as pm.
+    """
+    text = (text or "").strip().lower()
+    if not text:
+        return None
+    now = now or datetime.now()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+
+    relative = _RELATIVE.search(text)
+    if relative:
+        amount, unit = relative.groups()
+        count = 0.5 if amount == "half an" else 1 if amount in ("a", "an") else float(amount)
+        return now + timedelta(seconds=count * _UNITS[unit[0]])
+
+    day = None
+    weekday = False
+    if "day after tomorrow" in text:
+        day = 2
+    elif "tomorrow" in text:
+        day = 1
+    elif "today" in text or "tonight" in text:
+        day = 0
+    elif "next week" in text:
+        day = 7
+    else:
+        for index, name in enumerate(_WEEKDAYS):
+            if re.search(rf"\b{name[:3]}(?:{name[3:]})?\b", text):
+                day = (index - now.weekday()) % 7
+                weekday = True
+                break
+
+    hour = minute = None
+    clock = _CLOCK.search(text)
+    if clock:
+        if clock.group(1):
+            hour, minute = int(clock.group(1)) % 12, int(clock.group(2) or 0)
+            if clock.group(3).startswith("p"):
+                hour += 12
+        elif clock.group(4):
+            hour, minute = int(clock.group(4)), int(clock.group(5) or 0)
+            if 1 <= hour <= 7:
+                hour += 12
+        else:
+            hour, minute = int(clock.group(6)), int(clock.group(7))
+        if hour > 23 or minute > 59:
+            hour = minute = None
+    if hour is None:
+        for word, part_hour in _PARTS_OF_DAY.items():
+            if re.search(rf"\b{word}\b", text):
+                hour, minute = part_hour, 0
+                break
+
+    if day is None and hour is None:
+        return None
+    if hour is None:
+        hour, minute = 10, 0
+    when = now.replace(hour=hour, minute=minute, second=0, microsecond=0) + timedelta(days=day or 0)
+    if when <= now and (day is None or weekday):
+        when += timedelta(days=7 if weekday else 1)
+    return when
+
+
+class CallHours:
+    """Local hours retries may be placed in, from "9-20" (9:00 to 20:00)."""
+
+    def __init__(self, spec: str):
+        start, _, end = spec.partition("-")
+        self.start = int(start)
+        self.end = int(end or 24)
+
+    def next_open(self, when: datetime) -> datetime:
+        if when.hour < self.start:
+            return when.replace(hour=self.start, minute=0, second=0, microsecond=0)
+        if when.hour >= self.end:
+            return (when + timedelta(days=1)).replace(hour=self.start, minute=0, second=0, microsecond=0)
+        return when
+
+
+class RetryQueue:
+    """Persistent queue of leads to redial, ordered by next attempt time.
+
+    Rows live in SQLite (WAL, shared by the dialer and the agent's job
+    processes, like the outbox); each process keeps a heap per campaign of
+    (next_attempt_at, row id) so finding due leads is a heap peek, not a
+    query. Rescheduling a lead replaces its row under a new AUTOINCREMENT
+    id, so rows written by other processes are picked up by reading ids
+    above the last one seen, and stale heap entries fail their claim and are
+    dropped. Claiming a row leases it (status 'dialing') so two dialers
+    can't call the same lead; leases older than RETRY_LEASE_SECONDS are
+    returned to the queue on start.
+    """
+
+    def __init__(self, path=None, policies=None):
+        self.path = path or os.getenv("RETRY_QUEUE_PATH", "agent_retries.db")
+        self.policies = policies or load_policies()
+        self.call_hours = CallHours(os.getenv("RETRY_CALL_HOURS", "9-20"))
+        self.jitter = float(os.getenv("RETRY_JITTER", "0.1"))
+        self.sync_interval = float(os.getenv("RETRY_SYNC_INTERVAL", "5"))
+        self.lease_seconds = float(os.getenv("RETRY_LEASE_SECONDS", "3600"))
+        self.retention_seconds = float(os.getenv("RETRY_RETENTION_SECONDS", str(7 * 86400)))
+        self.db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._heaps = {}
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._recover()
+
+    def _recover(self) -> None:
+        now = time.time()
+        released = self.db.execute(
+            "UPDATE retry_queue SET status = 'pending', updated_at = ? WHERE status = 'dialing' AND updated_at < ?",
+            (now, now - self.lease_seconds),
+        ).rowcount
+        if released:
+            logger.info("Released %s stale retry leases", released)
+        self.db.execute(
+            "DELETE FROM retry_queue WHERE status IN ('done', 'exhausted') AND updated_at < ?",
+            (now - self.retention_seconds,),
+        )
+
+    def schedule(self, campaign_id: str, lead: dict, outcome: str, reason: str = None, preferred_time: str = None):
+        """Queue the lead's next attempt after `outcome`. Returns its epoch time, or None if it won't be retried."""
+        row = self.db.execute("SELECT attempts FROM retry_queue WHERE lead_id = ?", (lead["id"],)).fetchone()
+        attempts = row[0] if row else 1
+        policy = self.policies.get(outcome)
+        status = "pending"
+        if policy is None:
+            status = "done"
+        elif attempts >= policy.max_attempts:
+            status = "exhausted"
+
+        next_at = None
+        if status == "pending":
+            when = parse_preferred_time(preferred_time) if preferred_time else None
+            if when is None:
+                delay = policy.delay_for(attempts)
+                delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+                when = datetime.now() + timedelta(seconds=delay)
+            next_at = self.call_hours.next_open(when).timestamp()
+
+        cursor = self.db.execute(
+            "INSERT OR REPLACE INTO retry_queue "
+            "(lead_id, campaign_id, lead, outcome, reason, attempts, next_attempt_at, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (lead["id"], campaign_id, json.dumps(lead), outcome, reason, attempts, next_at or 0, status, time.time()),
+        )
+        if next_at is None:
+            logger.info("Lead %s not retried after %s (%s, %s attempt(s))", lead['id'], outcome, status, attempts)
+            return None
+        heapq.heappush(self._heaps.setdefault(campaign_id, []), (next_at, cursor.lastrowid))
+        logger.info(
+            "Lead %s retry after %s scheduled for %s (attempt %s)",
+            lead['id'], outcome, datetime.fromtimestamp(next_at).isoformat(timespec='minutes'), attempts + 1
+        )
+        return next_at
+
+    def sync(self, force: bool = False) -> int:
+        """Load rows scheduled by other processes since the last sync. Returns how many."""
+        if not force and time.monotonic() - self._synced_at < self.sync_interval:
+            return 0
+        self._synced_at = time.monotonic()
+        # One read transaction, so a row inserted by another process between
+        # the two reads can't be skipped by advancing _last_id past it
+        self.db.execute("BEGIN")
+        try:
+            rows = self.db.execute(
+                "SELECT id, campaign_id, next_attempt_at FROM retry_queue WHERE id > ? AND status = 'pending'",
+                (self._last_id,),
+            ).fetchall()
+            max_id = self.db.execute("SELECT MAX(id) FROM retry_queue").fetchone()[0]
+        finally:
+            self.db.execute("COMMIT")
+        for row_id, campaign_id, next_at in rows:
+            heapq.heappush(self._heaps.setdefault(campaign_id, []), (next_at, row_id))
+        self._last_id = max(self._last_id, max_id or 0)
+        return len(rows)
+
+    def next_due_at(self, campaign_id: str):
+        heap = self._heaps.get(campaign_id)
+        return heap[0][0] if heap else None
+
+    def claim_due(self, campaign_id: str, limit: int = 1) -> list:
+        """Lease up to `limit` due leads of the campaign for dialing.
+
+        Each lead dict gains retryId (pass it to complete()) and attempt.
+        """
+        self.sync()
+        heap = self._heaps.get(campaign_id)
+        now = time.time()
+        claimed = []
+        while heap and heap[0][0] <= now and len(claimed) < limit:
+            _, row_id = heapq.heappop(heap)
+            cursor = self.db.execute(
+                "UPDATE retry_queue SET status = 'dialing', attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ? AND status = 'pending'",
+                (now, row_id),
+            )
+            if not cursor.rowcount:
+                continue
+            lead_json, attempts = self.db.execute(
+                "SELECT lead, attempts FROM retry_queue WHERE id = ?", (row_id,)
+            ).fetchone()
+            claimed.append({**json.loads(lead_json), "retryId": row_id, "attempt": attempts})
+        return claimed
+
+    def complete(self, lead_id: str, retry_id: int) -> None:
+        """Mark a claimed retry finished, unless the lead was rescheduled meanwhile."""
+        self.db.execute(
+            "UPDATE retry_queue SET status = 'done', updated_at = ? WHERE id = ? AND lead_id = ? AND status = 'dialing'",
+            (time.time(), retry_id, lead_id),
+        )
+
+    def pending_count(self, campaign_id: str) -> int:
+        """Retries of the campaign still waiting or being dialed."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM retry_queue WHERE campaign_id = ? AND status IN ('pending', 'dialing')",
+            (campaign_id,),
+        ).fetchone()[0]
+
+    async def wait_due(self, campaign_id: str, timeout: float) -> None:
+        """Sleep until the campaign's next retry is due, at most `timeout` seconds."""
+        self.sync()
+        next_at = self.next_due_at(campaign_id)
+        delay = timeout if next_at is None else min(timeout, max(0.0, next_at - time.time()))
+        await asyncio.sleep(delay)
+
+    def close(self) -> None:
+        self.db.close()
+
+
+_retry_queue = None
+
+
+def get_retry_queue() -> RetryQueue:
+    """Return this process's retry queue, opening it on first use."""
+    global _retry_queue
+    if _retry_queue is None:
+        _retry_queue = RetryQueue()
+    return _retry_queue
@@ -0,0 +1,96 @@
+import asyncio
+import collections
+import hashlib
+import logging
+import os
+
+from backend_client import backend_client, trpc_query, trpc_result
+
+logger = logging.getLogger("script-registry")
+
+
+def script_hash(script: str) -> str:
+    """Content hash rooms carry as scriptHash; must match scriptHash() in the web UI's campaign router."""
+    return hashlib.sha256(script.encode("utf-8")).hexdigest()[:16]
+
+
+class CampaignScript:
+    """A campaign script and the agent instructions built from it."""
+
+    __slots__ = ("id", "hash", "script", "instructions")
+
+    def __init__(self, script_id: str, content_hash: str, script: str, instructions: str):
+        self.id = script_id
+        self.hash = content_hash
+        self.script = script
+        self.instructions = instructions
+
+
+class ScriptRegistry:
+    """Worker-wide LRU of campaign scripts and their prebuilt instructions, keyed by content hash.
+
+    Rooms carry only scriptId and scriptHash in their metadata; the first
+    call of a campaign on this worker fetches the script from the backend's
+    campaign.getScript procedure and builds the instructions once, and every
+    later call reuses the same string, so the model also sees a byte-identical
+    prompt prefix. Concurrent misses on one hash share a single fetch. Rooms
+    that still carry the full script inline skip the fetch.
+    """
+
+    def __init__(self, build_instructions, client=backend_client, path="/api/trpc/campaign.getScript"):
+        self.build_instructions = build_instructions
+        self.client = client
+        self.path = path
+        self.size = int(os.getenv("SCRIPT_CACHE_SIZE", "128"))
+        self.scripts = collections.OrderedDict()
+        self._fetching = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, script_id: str, content_hash: str = None, script: str = None) -> CampaignScript:
+        """Return the script for a room, from the cache, the inline script or the backend."""
+        if content_hash is None:
+            if not script:
+                raise ValueError("Room metadata has neither scriptHash nor script")
+            content_hash = script_hash(script)
+        cached = self.scripts.get(content_hash)
+        if cached is not None:
+            self.scripts.move_to_end(content_hash)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        if script:
+            return self._store(script_id, content_hash, script)
+        pending = self._fetching.get(content_hash)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(script_id, content_hash))
+            self._fetching[content_hash] = pending
+            pending.add_done_callback(lambda _: self._fetching.pop(content_hash, None))
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, script_id: str, content_hash: str) -> CampaignScript:
+        status, body = await self.client.get(self.path, params=trpc_query({"id": script_id}))
+        if status != 200:
+            raise RuntimeError(f"Script {script_id} request failed with {status}: {body[:200]}")
+        script = trpc_result(body).get("script")
+        if not script:
+            raise ValueError(f"Campaign {script_id} has no script")
+        fetched_hash = script_hash(script)
+        entry = self.scripts.get(fetched_hash) or self._store(script_id, fetched_hash, script)
+        if fetched_hash != content_hash:
+            # Edited after the room was created; calls go out with the current script
+            logger.warning("Script %s changed since the room was created (%s -> %s)", script_id, content_hash, fetched_hash)
+            self._remember(content_hash, entry)
+        logger.info("Loaded script %s (%s, %s chars)", script_id, fetched_hash, len(script))
+        return entry
+
+    def _store(self, script_id: str, content_hash: str, script: str) -> CampaignScript:
+        entry = CampaignScript(script_id, content_hash, script, self.build_instructions(script))
+        self._remember(content_hash, entry)
+        return entry
+
+    def _remember(self, content_hash: str, entry: CampaignScript) -> None:
+        self.scripts[content_hash] = entry
+        self.scripts.move_to_end(content_hash)
+        while len(self.scripts) > self.size:
+            self.scripts.popitem(last=False)
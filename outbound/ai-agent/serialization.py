@@ -0,0 +1,92 @@
+"""One encoder for every payload the agent sends to the backend.
+
+Bodies are encoded with orjson when it is installed (stdlib json
+otherwise, with the same compact output) and optionally compressed. The
+backend has to accept the encoding first: a response carrying
+Accept-Encoding (RFC 7694) turns compression on, and a 415 to a compressed
+body turns it off again, so a backend that never negotiates keeps getting
+plain JSON. BACKEND_COMPRESSION picks the codec (gzip, or zstd with the
+zstandard package) and "off" disables it; bodies under
+BACKEND_COMPRESSION_MIN_BYTES are always sent plain.
+"""
+import gzip
+import json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("serialization")
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+def dumps(value) -> bytes:
+    """Compact UTF-8 JSON for a payload."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def loads(data):
+    """Parse a JSON body (bytes or str)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compress(body: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+class Codec:
+    """Request body encoding for one backend, negotiated from its responses."""
+
+    def __init__(self):
+        preferred = os.getenv("BACKEND_COMPRESSION", "auto").lower()
+        if preferred == "zstd" and zstandard is None:
+            logger.warning("BACKEND_COMPRESSION=zstd but zstandard is not installed, using gzip")
+            preferred = "gzip"
+        self.preferred = preferred
+        self.min_bytes = int(os.getenv("BACKEND_COMPRESSION_MIN_BYTES", "1024"))
+        # Set once the backend advertises an encoding we can produce
+        self.encoding = None
+
+    def encode(self, payload) -> tuple:
+        """Return (body, headers) for a payload or an already serialized body."""
+        body = payload if isinstance(payload, bytes) else dumps(payload)
+        headers = {"Content-Type": JSON_CONTENT_TYPE}
+        if self.encoding and len(body) >= self.min_bytes:
+            body = compress(body, self.encoding)
+            headers["Content-Encoding"] = self.encoding
+        return body, headers
+
+    def negotiate(self, accept_encoding: str) -> None:
+        """Pick up the encodings a response says the backend accepts."""
+        if self.preferred == "off" or not accept_encoding:
+            return
+        offered = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        candidates = [self.preferred] if self.preferred in ("gzip", "zstd") else ["zstd", "gzip"]
+        for codec in candidates:
+            if codec in offered and (codec != "zstd" or zstandard is not None):
+                if codec != self.encoding:
+                    logger.info("Backend accepts %s request bodies, compressing", codec)
+                self.encoding = codec
+                return
+
+    def rejected(self) -> None:
+        """The backend refused a compressed body; send plain JSON from now on."""
+        if self.encoding:
+            logger.warning("Backend rejected %s request body, sending uncompressed", self.encoding)
+        self.encoding = None
+        self.preferred = "off"
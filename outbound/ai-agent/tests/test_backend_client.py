@@ -0,0 +1,84 @@
+"""Request body shape of the agent's tRPC writes.
+
+The web UI's tRPC router uses the superjson transformer, which reads a
+procedure's input from {"json": ...}; a bare payload deserializes to
+undefined and fails the zod schema with a 400.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend_client import BackendClient, trpc_input, trpc_query, trpc_result  # noqa: E402
+
+
+def test_trpc_input_wraps_payload():
+    assert trpc_input({"id": "lead-1"}) == {"json": {"id": "lead-1"}}
+
+
+def test_trpc_query_wraps_input():
+    assert json.loads(trpc_query({"id": "c-1"})["input"]) == {"json": {"id": "c-1"}}
+
+
+def test_trpc_result_unwraps_superjson():
+    assert trpc_result('{"result": {"data": {"json": {"nextSeq": 3}}}}') == {"nextSeq": 3}
+
+
+@pytest.fixture
+def agent_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("OUTBOX_PATH", str(tmp_path / "outbox.db"))
+    monkeypatch.setenv("LATENCY_METRICS_DIR", str(tmp_path / "metrics"))
+    monkeypatch.setenv("WORKER_LOAD_DIR", str(tmp_path / "load"))
+    monkeypatch.setenv("TTS_CACHE_DIR", str(tmp_path / "tts_cache"))
+
+
+def test_append_transcript_body_is_superjson(agent_env, monkeypatch):
+    import campaign_agent
+
+    received = []
+
+    async def append_transcript(request):
+        body = await request.json()
+        received.append(body)
+        data = body["json"]
+        return web.json_response({"result": {"data": {"json": {
+            "success": True, "nextSeq": data["fromSeq"] + len(data["entries"]),
+        }}}})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/api/trpc/campaign.appendTranscript", append_transcript)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        client = BackendClient(f"http://127.0.0.1:{port}")
+        monkeypatch.setattr(campaign_agent, "backend_client", client)
+        try:
+            agent = campaign_agent.CampaignAgent("campaign-1", "lead-1", "Test script", {"name": "Lead"})
+            await agent.save_conversation_transcript("Customer", "Hello?")
+            await agent.save_agent_response("Hi, this is a test call.")
+            return agent
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    agent = asyncio.run(run())
+
+    assert len(received) == 2
+    first, second = received
+    assert set(first) == {"json"}
+    assert first["json"]["campaignId"] == "campaign-1"
+    assert first["json"]["leadId"] == "lead-1"
+    assert first["json"]["fromSeq"] == 0
+    assert [entry["text"] for entry in first["json"]["entries"]] == ["Hello?"]
+    assert set(first["json"]["state"]) == {"conversation_state", "interest_status", "call_status"}
+    # The ack in the superjson response advanced the sequence, so only the delta is sent
+    assert second["json"]["fromSeq"] == 1
+    assert agent.transcript_acked_seq == 2
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+
+from livekit import rtc
+
+logger = logging.getLogger("tts-cache")
+
+# Playback frame size for cached audio
+FRAME_MS = 20
+
+
+class CachedAudio:
+    """Raw 16-bit PCM for one phrase plus its format."""
+
+    __slots__ = ("pcm", "sample_rate", "num_channels")
+
+    def __init__(self, pcm: bytes, sample_rate: int, num_channels: int):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+
+    async def frames(self):
+        """Yield the audio as FRAME_MS rtc.AudioFrames for AgentSession.say(audio=...)."""
+        samples_per_frame = self.sample_rate * FRAME_MS // 1000
+        frame_bytes = samples_per_frame * self.num_channels * 2
+        for offset in range(0, len(self.pcm), frame_bytes):
+            chunk = self.pcm[offset:offset + frame_bytes]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            )
+
+
+class TTSAudioCache:
+    """Content-addressed cache of synthesized audio for fixed phrases.
+
+    Entries are keyed by a hash of (text, voice, model, sample rate, channels)
+    and stored as raw PCM files in TTS_CACHE_DIR, with an in-memory LRU
+    bounded by TTS_CACHE_MEMORY_MB in front. A phrase missing from both is
+    synthesized once (concurrent requests for it share the render) and
+    written back.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=None):
+        self.cache_dir = cache_dir or os.getenv("TTS_CACHE_DIR", "tts_cache")
+        self.max_memory_bytes = max_memory_bytes or int(float(os.getenv("TTS_CACHE_MEMORY_MB", "64")) * 1024 * 1024)
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0}
+        self._rendering = {}
+
+    @staticmethod
+    def key(text: str, voice: str, model: str, sample_rate: int, num_channels: int = 1) -> str:
+        content = "\0".join([model, voice, str(sample_rate), str(num_channels), text])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def get(self, key: str, sample_rate: int, num_channels: int = 1):
+        """Return cached audio from memory or disk, or None."""
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return audio
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = CachedAudio(f.read(), sample_rate, num_channels)
+        except FileNotFoundError:
+            return None
+        self.stats["disk_hits"] += 1
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: CachedAudio) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio.pcm)
+        os.replace(tmp_path, self._path(key))
+        self._remember(key, audio)
+
+    def _remember(self, key: str, audio: CachedAudio) -> None:
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key).pcm)
+        self.memory[key] = audio
+        self.memory_bytes += len(audio.pcm)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted.pcm)
+
+    async def get_or_render(self, tts, text: str, voice: str, model: str) -> CachedAudio:
+        """Return the phrase's audio, synthesizing it with the TTS plugin on a miss."""
+        key = self.key(text, voice, model, tts.sample_rate, tts.num_channels)
+        audio = self.get(key, tts.sample_rate, tts.num_channels)
+        if audio is not None:
+            return audio
+
+        pending = self._rendering.get(key)
+        if pending is None:
+            pending = self._rendering[key] = asyncio.ensure_future(self._render(tts, text))
+            pending.add_done_callback(lambda _: self._rendering.pop(key, None))
+        audio = await asyncio.shield(pending)
+        if key not in self.memory:
+            self.put(key, audio)
+        return audio
+
+    async def _render(self, tts, text: str) -> CachedAudio:
+        self.stats["renders"] += 1
+        logger.info("Synthesizing phrase for cache: %s...", text[:50])
+        chunks = []
+        sample_rate, num_channels = tts.sample_rate, tts.num_channels
+        async with tts.synthesize(text) as stream:
+            async for synthesized in stream:
+                frame = synthesized.frame
+                sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                chunks.append(frame.data.tobytes())
+        return CachedAudio(b"".join(chunks), sample_rate, num_channels)
+
+
+# Shared by every call in this worker process
+tts_cache = TTSAudioCache()
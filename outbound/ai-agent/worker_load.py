@@ -0,0 +1,210 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import psutil
+
+logger = logging.getLogger("worker-load")
+
+LOAD_DIR = os.getenv("WORKER_LOAD_DIR", "/tmp/livekit_agent_load")
+
+
+class JobLoadReporter:
+    """Publishes one job process's capacity signals for the worker to aggregate.
+
+    Runs on the job's event loop and every WORKER_LOAD_INTERVAL seconds writes
+    {pid}.json to LOAD_DIR with the loop's pending tasks and lag (how late the
+    reporter's own sleep woke up, or the LoopMonitor's peak when one is
+    given), plus the process's RSS and CPU. The file is removed when the job
+    ends so an idle pooled process isn't counted.
+    """
+
+    def __init__(self, loop_monitor=None, load_dir: str = LOAD_DIR):
+        self.loop_monitor = loop_monitor
+        self.load_dir = load_dir
+        self.interval = float(os.getenv("WORKER_LOAD_INTERVAL", "1"))
+        self.path = os.path.join(load_dir, f"{os.getpid()}.json")
+        self.process = psutil.Process()
+        self.loop_lag = 0.0
+        self._task = None
+        self._closing = False
+
+    def start(self) -> None:
+        os.makedirs(self.load_dir, exist_ok=True)
+        # Prime cpu_percent(); its first reading is always 0
+        self.process.cpu_percent()
+        self._task = asyncio.create_task(self._run())
+
+    def snapshot(self) -> dict:
+        report = {
+            'pid': os.getpid(),
+            'pending_tasks': len(asyncio.all_tasks()),
+            'loop_lag_seconds': self.loop_lag,
+            'rss_bytes': self.process.memory_info().rss,
+            'cpu_percent': self.process.cpu_percent(),
+            'timestamp': time.time(),
+        }
+        if self.loop_monitor is not None:
+            report['loop_lag_seconds'] = max(self.loop_lag, self.loop_monitor.take_peak_lag())
+            report['loop_monitor'] = self.loop_monitor.snapshot()
+        return report
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._closing:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.loop_lag = max(0.0, loop.time() - expected)
+            try:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error("Failed to publish job load: %s", e)
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class WorkerLoad:
+    """Worker-wide load, computed in the main process from the job reports.
+
+    The load factor is the most saturated of: CPU, active calls against
+    WORKER_MAX_CALLS, the worst job loop lag against WORKER_LAG_BUDGET, and
+    (when WORKER_MAX_RSS_MB is set) total RSS. It is passed to LiveKit as
+    the worker's load via load_fnc, so the dispatcher stops assigning rooms
+    once it crosses the worker's load_threshold. While an attached OpenAI
+    prober reports the credentials as failing the load is 1.0: every job
+    would fail at session start, so none should be dispatched here.
+
+    snapshot() is called from LiveKit's executor thread and from the /status
+    thread, so the system CPU is sampled at most once per
+    WORKER_LOAD_INTERVAL and both read the cached value; each
+    psutil.cpu_percent() call would otherwise reset the other's window.
+    """
+
+    def __init__(self, load_dir: str = LOAD_DIR):
+        self.load_dir = load_dir
+        self.max_calls = int(os.getenv("WORKER_MAX_CALLS", "20"))
+        self.lag_budget = float(os.getenv("WORKER_LAG_BUDGET", "0.2"))
+        self.max_rss = float(os.getenv("WORKER_MAX_RSS_MB", "0")) * 1024 * 1024
+        self.interval = float(os.getenv("WORKER_LOAD_INTERVAL", "1"))
+        self.stale_after = 3 * self.interval
+        self.outbox_path = os.getenv("OUTBOX_PATH", "agent_outbox.db")
+        self.process = psutil.Process()
+        self.worker = None
+        self._lock = threading.Lock()
+        self._outbox_db = None
+        self._cpu = 0.0
+        self._cpu_sampled_at = time.monotonic()
+        # OpenAIHealthProber of this worker, when it runs one
+        self.openai_prober = None
+        # Prime the system-wide cpu_percent() baseline
+        psutil.cpu_percent()
+
+    def reset(self) -> None:
+        """Forget reports left behind by an earlier worker run."""
+        for path in glob.glob(os.path.join(self.load_dir, "*.json")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def job_reports(self) -> list:
+        reports = []
+        now = time.time()
+        for path in glob.glob(os.path.join(self.load_dir, "*.json")):
+            try:
+                with open(path) as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now - report.get('timestamp', 0) <= self.stale_after:
+                reports.append(report)
+        return reports
+
+    def loop_reports(self) -> list:
+        """LoopMonitor stats (lag, stalls, recent slow callbacks) per job process."""
+        return [{'pid': r['pid'], **r['loop_monitor']} for r in self.job_reports() if 'loop_monitor' in r]
+
+    def cpu_percent(self) -> float:
+        """System CPU over the last completed interval, sampled once per interval."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._cpu_sampled_at >= self.interval:
+                self._cpu = psutil.cpu_percent()
+                self._cpu_sampled_at = now
+            return self._cpu
+
+    def outbox_depth(self):
+        """Pending outbox rows, counted over a read-only connection."""
+        with self._lock:
+            try:
+                if self._outbox_db is None:
+                    if not os.path.exists(self.outbox_path):
+                        return 0
+                    self._outbox_db = sqlite3.connect(
+                        f"file:{self.outbox_path}?mode=ro", uri=True, timeout=5, check_same_thread=False
+                    )
+                return self._outbox_db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+            except sqlite3.Error as e:
+                logger.error("Failed to read outbox depth: %s", e)
+                return None
+
+    def snapshot(self) -> dict:
+        reports = self.job_reports()
+        if self.worker is not None:
+            active_calls = len(self.worker.active_jobs)
+        else:
+            active_calls = len(reports)
+        loop_lag = max((r['loop_lag_seconds'] for r in reports), default=0.0)
+        rss = self.process.memory_info().rss + sum(r['rss_bytes'] for r in reports)
+        cpu = self.cpu_percent()
+
+        factors = [
+            cpu / 100,
+            active_calls / self.max_calls if self.max_calls else 0.0,
+            loop_lag / self.lag_budget if self.lag_budget else 0.0,
+        ]
+        if self.max_rss:
+            factors.append(rss / self.max_rss)
+        openai_healthy = self.openai_prober.healthy if self.openai_prober is not None else None
+        if openai_healthy is False:
+            factors.append(1.0)
+
+        return {
+            'active_calls': active_calls,
+            'pending_tasks': sum(r['pending_tasks'] for r in reports),
+            'loop_lag_seconds': loop_lag,
+            'loop_stalls': sum(r.get('loop_monitor', {}).get('stalls', 0) for r in reports),
+            'outbox_depth': self.outbox_depth(),
+            'rss_bytes': rss,
+            'cpu_percent': cpu,
+            'openai_healthy': openai_healthy,
+            'load_factor': round(min(1.0, max(factors)), 3),
+        }
+
+    def load_fnc(self, worker) -> float:
+        """WorkerOptions.load_fnc: LiveKit polls this from an executor thread."""
+        self.worker = worker
+        return self.snapshot()['load_factor']
+
+
+# Aggregated in the main process, shared by /status and the LiveKit load report
+worker_load = WorkerLoad()
@@ -1,296 +1,95 @@
 import { z } from "zod";
 import { createTRPCRouter, publicProcedure } from "@/server/api/trpc";
 import { spawn, ChildProcess } from "child_process";
-import { writeFileSync, existsSync, mkdirSync } from "fs";
 import { join } from "path";
 import { env } from "@/env";
 
-// Store running agent processes
+// Agents currently served, all hosted by one shared multi-agent worker process
 const runningAgents = new Map<string, ChildProcess>();
+let sharedWorker: ChildProcess | null = null;
 
-// Function to create agent-specific Python script
-function createAgentScript(agent: any): string {
-  const scriptContent = `
-from dotenv import load_dotenv
-import aiohttp
-import logging
-import json
-import os
-from typing import Any, Dict
-from datetime import datetime
-
-from livekit import agents
-from livekit.agents import AgentSession, Agent, RoomInputOptions, function_tool, RunContext
-from livekit.plugins import openai
-
-load_dotenv()
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("agent-${agent.id}")
-
-# Agent Configuration
-AGENT_ID = "${agent.id}"
-AGENT_NAME = "${agent.name}"
-AGENT_PROMPT = """${agent.prompt}"""
-MODEL = "${agent.model}"
-VOICE = "${agent.voice}"
-TEMPERATURE = ${agent.temperature}
-MAX_TOKENS = ${agent.maxTokens}
-
-# Get API URL from environment variable
-API_URL = os.getenv("NEXT_PUBLIC_API_URL", "http://localhost:3025")
-
-class Assistant(Agent):
-    def __init__(self) -> None:
-        super().__init__(
-            instructions=AGENT_PROMPT
-        )
-        self.conversation_data = {}
-        self.agent_id = AGENT_ID
-        self.agent_name = AGENT_NAME
-        self.ctx = None  # Will be set by entrypoint
-
-    @function_tool()
-    async def save_conversation_data(
-        self,
-        context: RunContext,
-        key: str,
-        value: str,
-    ) -> str:
-        """Save important data from the conversation."""
-        self.conversation_data[key] = value
-        logger.info(f"Agent {self.agent_name} - Saved conversation data - {key}: {value}")
-        return f"Saved {key}: {value}"
-
-    @function_tool()
-    async def book_slot(
-        self,
-        context: RunContext,
-        name: str,
-        place: str,
-        date: str,
-    ) -> str:
-        """Book a slot for the user's vacation visit."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{API_URL}/api/book-slot",
-                    json={
-                        "name": name,
-                        "place": place,
-                        "date": date,
-                        "agentId": self.agent_id,
-                    },
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"Agent {self.agent_name} - Booking successful: {result}")
-                        return f"Booking confirmed! Your slot for {place} on {date} has been booked successfully."
-                    else:
-                        logger.error(f"Agent {self.agent_name} - Booking failed: {response.status}")
-                        return "Sorry, there was an issue with booking your slot. Please try again."
-        except Exception as e:
-            logger.error(f"Agent {self.agent_name} - Booking error: {e}")
-            return "Sorry, there was an issue with booking your slot. Please try again."
-
-    async def on_data_received(self, data: bytes, participant, kind):
-        """Handle incoming data messages (chat)."""
-        try:
-            logger.info(f"Agent {self.agent_name} - Raw data received: {data}")
-            message = json.loads(data.decode('utf-8'))
-            logger.info(f"Agent {self.agent_name} - Parsed message: {message}")
-            
-            if message.get('type') == 'chat' and message.get('text'):
-                user_message = message['text']
-                logger.info(f"Agent {self.agent_name} - Received chat message: {user_message}")
-                
-                # Process the message and generate response
-                response = await self.process_chat_message(user_message)
-                logger.info(f"Agent {self.agent_name} - Generated response: {response}")
-                
-                # Send response back
-                response_data = {
-                    'type': 'chat',
-                    'text': response,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Send response to the participant
-                await self.ctx.room.local_participant.publish_data(
-                    json.dumps(response_data).encode('utf-8'),
-                    kind=kind
-                )
-                
-                logger.info(f"Agent {self.agent_name} - Sent chat response: {response}")
-            else:
-                logger.info(f"Agent {self.agent_name} - Message not a chat message: {message}")
-        except Exception as e:
-            logger.error(f"Agent {self.agent_name} - Error processing chat message: {e}", exc_info=True)
-
-    async def process_chat_message(self, message: str) -> str:
-        """Process chat message and generate response."""
-        # Enhanced response logic for better chat experience
-        message_lower = message.lower()
-        
-        if any(greeting in message_lower for greeting in ["hello", "hi", "hey", "good morning", "good afternoon", "good evening"]):
-            return f"Hello! I'm {self.agent_name}, your AI assistant. I'm currently running in chat mode. How can I help you today?"
-        elif "help" in message_lower:
-            return "I can help you with various tasks including: Answering questions, Providing information, Booking appointments, General assistance. What would you like to know?"
-        elif any(word in message_lower for word in ["book", "appointment", "schedule", "reserve"]):
-            return "I can help you book appointments! Please provide: Your name, The place you'd like to visit, Your preferred date and time. What would you like to book?"
-        elif "status" in message_lower or "how are you" in message_lower:
-            return f"I'm {self.agent_name} and I'm running perfectly! I'm connected to LiveKit and ready to assist you. What can I do for you?"
-        elif "test" in message_lower:
-            return "Test successful! I'm responding to your messages in real-time. The chat system is working properly."
-        elif "time" in message_lower:
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            return f"The current time is {current_time}. How else can I assist you?"
-        else:
-            return f"Thank you for your message: '{message}'. I'm {self.agent_name} and I'm here to help! I can assist with questions, bookings, or general information. What would you like to know?"
-
-
-async def entrypoint(ctx: agents.JobContext):
-    try:
-        # Connect to the room
-        await ctx.connect()
-        logger.info(f"Agent {AGENT_NAME} connected to room: {ctx.room.name if ctx.room else 'Unknown'}")
-
-        # Initialize the agent
-        assistant = Assistant()
-        assistant.ctx = ctx  # Set context for data handling
-
-        # Set up data event listener for chat messages
-        def handle_data_received(data, participant, kind):
-            import asyncio
-            logger.info(f"Agent {AGENT_NAME} - Data received event triggered")
-            asyncio.create_task(assistant.on_data_received(data, participant, kind))
-        
-        ctx.room.on("dataReceived", handle_data_received)
-        logger.info(f"Agent {AGENT_NAME} - Data event listener registered")
-
-        # Initialize agent session (only if OpenAI API key is available)
-        try:
-            session = AgentSession(
-                llm=openai.realtime.RealtimeModel(),
-            )
-            logger.info(f"Agent {AGENT_NAME} - OpenAI realtime model initialized")
-            
-            # Start the agent session with OpenAI
-            await session.start(ctx.room, assistant)
-            logger.info(f"Agent {AGENT_NAME} session started successfully with OpenAI")
-        except Exception as e:
-            logger.warning(f"Agent {AGENT_NAME} - OpenAI not available: {e}")
-            logger.info(f"Agent {AGENT_NAME} running in chat-only mode (no OpenAI)")
-            
-            # Keep the agent running for chat-only mode
-            import asyncio
-            while True:
-                await asyncio.sleep(1)
-
-    except Exception as e:
-        logger.error(f"Error in agent {AGENT_NAME}: {e}", exc_info=True)
-        raise
-
-if __name__ == "__main__":
-    import random
-    # Use a random port to avoid conflicts
-    port = random.randint(8083, 8999)
-    agents.cli.run_app(agents.WorkerOptions(
-        entrypoint_fnc=entrypoint,
-        port=port
-    ))
-`;
-
-  return scriptContent;
-}
+// Directory containing agent_worker.py
+const AGENT_WORKER_DIR = process.env.AGENT_WORKER_DIR ?? join(process.cwd(), "..", "ai-agent");
+
+// Function to start the shared worker if it isn't already running
+function ensureSharedWorker(): Promise<ChildProcess> {
+  if (sharedWorker && sharedWorker.exitCode === null) {
+    return Promise.resolve(sharedWorker);
+  }
 
-// Function to start agent process
-function startAgentProcess(agent: any): Promise<ChildProcess> {
   return new Promise((resolve, reject) => {
     try {
-      // Create agents directory if it doesn't exist
-      const agentsDir = join(process.cwd(), "agents");
-      if (!existsSync(agentsDir)) {
-        mkdirSync(agentsDir, { recursive: true });
-      }
-
-      // Create agent-specific script
-      const scriptPath = join(agentsDir, `agent-${agent.id}.py`);
-      const scriptContent = createAgentScript(agent);
-      writeFileSync(scriptPath, scriptContent);
-
-      // Set environment variables for this agent
       const envVars = {
         ...process.env,
         LIVEKIT_URL: env.LIVEKIT_API_ENDPOINT,
         LIVEKIT_API_KEY: env.LIVEKIT_API_KEY,
         LIVEKIT_API_SECRET: env.LIVEKIT_API_SECRET,
-        LIVEKIT_ROOM: `agent-${agent.id}`,
         NEXT_PUBLIC_API_URL: env.NEXT_PUBLIC_API_URL || "http://localhost:3025",
         OPENAI_API_KEY: process.env.OPENAI_API_KEY,
       };
 
-      // Spawn Python process with dev command
-      const pythonProcess = spawn("python", [scriptPath, "dev"], {
+      // One worker process loads agent definitions from agents.getRegistry
+      const pythonProcess = spawn("python", ["agent_worker.py", "dev"], {
         env: envVars,
-        cwd: process.cwd(), // Run from web-ui directory where the script is
+        cwd: AGENT_WORKER_DIR,
         stdio: ["pipe", "pipe", "pipe"],
       });
 
-      // Handle process events
       pythonProcess.on("spawn", () => {
-        console.log(`✅ Agent ${agent.name} (${agent.id}) started successfully`);
+        console.log(`✅ Multi-agent worker started (pid ${pythonProcess.pid})`);
+        sharedWorker = pythonProcess;
         resolve(pythonProcess);
       });
 
       pythonProcess.on("error", (error) => {
-        console.error(`❌ Failed to start agent ${agent.name}:`, error);
+        console.error("❌ Failed to start multi-agent worker:", error);
         reject(error);
       });
 
       pythonProcess.on("exit", (code, signal) => {
-        console.log(`🔄 Agent ${agent.name} (${agent.id}) exited with code ${code}, signal ${signal}`);
-        runningAgents.delete(agent.id);
-        
-        // Update agent status to INACTIVE if it exited with error
-        if (code !== 0) {
-          console.log(`❌ Agent ${agent.name} crashed, updating status to INACTIVE`);
-          // Note: We can't access ctx.prisma here, so we'll handle this in the UI
+        console.log(`🔄 Multi-agent worker exited with code ${code}, signal ${signal}`);
+        if (sharedWorker === pythonProcess) {
+          sharedWorker = null;
+          runningAgents.clear();
         }
       });
 
       // Log stdout and stderr for debugging
       pythonProcess.stdout?.on('data', (data) => {
-        console.log(`[${agent.name}] stdout:`, data.toString());
+        console.log(`[agent-worker] stdout:`, data.toString());
       });
 
       pythonProcess.stderr?.on('data', (data) => {
-        console.error(`[${agent.name}] stderr:`, data.toString());
+        console.error(`[agent-worker] stderr:`, data.toString());
       });
 
-      // Store the process
-      runningAgents.set(agent.id, pythonProcess);
-
     } catch (error) {
       reject(error);
     }
   });
 }
 
-// Function to stop agent process
+// Function to start serving an agent (the worker picks up its definition from the registry)
+async function startAgentProcess(agent: any): Promise<ChildProcess> {
+  const worker = await ensureSharedWorker();
+  runningAgents.set(agent.id, worker);
+  console.log(`✅ Agent ${agent.name} (${agent.id}) is served by the shared worker`);
+  return worker;
+}
+
+// Function to stop serving an agent; the worker exits once no agents are left
 function stopAgentProcess(agentId: string): Promise<void> {
-  return new Promise((resolve, reject) => {
-    const process = runningAgents.get(agentId);
-    if (process) {
-      process.kill("SIGTERM");
-      runningAgents.delete(agentId);
-      console.log(`Agent ${agentId} stopped successfully`);
-      resolve();
-    } else {
-      console.log(`Agent ${agentId} was not running`);
-      resolve();
-    }
-  });
+  if (!runningAgents.delete(agentId)) {
+    console.log(`Agent ${agentId} was not running`);
+    return Promise.resolve();
+  }
+
+  console.log(`Agent ${agentId} stopped successfully`);
+  if (runningAgents.size === 0 && sharedWorker) {
+    sharedWorker.kill("SIGTERM");
+    sharedWorker = null;
+  }
+  return Promise.resolve();
 }
 
 export const agentsRouter = createTRPCRouter({
@@ -327,6 +126,23 @@ export const agentsRouter = createTRPCRouter({
     });
   }),
 
+  // Agent definitions loaded at runtime by the shared multi-agent worker
+  getRegistry: publicProcedure.query(async ({ ctx }) => {
+    const agents = await ctx.prisma.agent.findMany({
+      where: { status: { in: ["ACTIVE", "DEPLOYING"] } },
+      select: {
+        id: true,
+        name: true,
+        prompt: true,
+        model: true,
+        voice: true,
+        temperature: true,
+      },
+    });
+
+    return { agents };
+  }),
+
   // Get agent by ID
   getById: publicProcedure
     .input(z.object({ id: z.string() }))
@@ -1,6 +1,7 @@
 import { z } from "zod";
 import { createTRPCRouter, publicProcedure } from "@/server/api/trpc";
 import { parse } from "csv-parse/sync";
+import { createHash } from "crypto";
 import { AccessToken, SipClient, ParticipantInfo, Room, RoomServiceClient } from "livekit-server-sdk";
 import { env } from "@/env";
 import { type PrismaClient } from "@prisma/client";
@@ -40,6 +41,13 @@ const roomService = new RoomServiceClient(
   env.LIVEKIT_API_SECRET
 );
 
+// Content hash rooms carry instead of the full script; agent workers fetch
+// the script with getScript on a cache miss. Must match script_hash() in
+// ai-agent/script_registry.py.
+function scriptHash(script: string) {
+  return createHash("sha256").update(script, "utf8").digest("hex").slice(0, 16);
+}
+
 // Helper function to make real Twilio calls
 async function makeTwilioCall(to: string, from: string, roomName: string) {
   const twilio = require('twilio');
@@ -366,6 +374,30 @@ export const campaignRouter = createTRPCRouter({
       });
     }),
 
+  // Campaign script by id, for agent workers resolving a room's scriptHash
+  getScript: publicProcedure
+    .input(
+      z.object({
+        id: z.string(),
+      })
+    )
+    .query(async ({ ctx, input }) => {
+      const campaign = await ctx.prisma.campaign.findUnique({
+        where: { id: input.id },
+        select: { id: true, script: true },
+      });
+
+      if (!campaign?.script) {
+        throw new Error("Campaign script not found");
+      }
+
+      return {
+        id: campaign.id,
+        script: campaign.script,
+        hash: scriptHash(campaign.script),
+      };
+    }),
+
   // Update lead status
   updateLeadStatus: publicProcedure
     .input(
@@ -424,6 +456,7 @@ export const campaignRouter = createTRPCRouter({
       if (!campaign.script) {
         throw new Error("Campaign script is required");
       }
+      const campaignScriptHash = scriptHash(campaign.script);
 
       // Update campaign status to ACTIVE
       await ctx.prisma.campaign.update({
@@ -450,7 +483,9 @@ export const campaignRouter = createTRPCRouter({
           const agentMetadata = {
             campaignId: campaign.id,
             leadId: lead.id,
-            script: campaign.script,
+            scriptId: campaign.id,
+            scriptHash: campaignScriptHash,
+            attemptId: conversation.id,
           };
 
           // Create LiveKit token for the AI agent
@@ -545,11 +580,26 @@ export const campaignRouter = createTRPCRouter({
         throw new Error("Conversation not found");
       }
 
+      // Keep the transcript appendTranscript stored; the agent only sends the
+      // entries we hadn't acknowledged, from transcriptFromSeq on
+      const existing = (conversation.results as Record<string, any> | null) ?? {};
+      const { transcriptTail, transcriptFromSeq, ...results } = input.results;
+      let transcript: Record<string, any>[] = Array.isArray(existing.transcript)
+        ? existing.transcript
+        : [];
+      if (
+        Array.isArray(transcriptTail) &&
+        typeof transcriptFromSeq === "number" &&
+        transcriptFromSeq <= transcript.length
+      ) {
+        transcript = transcript.concat(transcriptTail.slice(transcript.length - transcriptFromSeq));
+      }
+
       const updatedConversation = await ctx.prisma.conversation.update({
         where: { id: conversation.id },
         data: {
           status: input.status,
-          results: input.results,
+          results: { ...existing, ...results, transcript },
           callEndTime: new Date(),
         },
       });
@@ -557,6 +607,61 @@ export const campaignRouter = createTRPCRouter({
       return updatedConversation;
     }),
 
+  // Append new transcript entries (delta sync from the agent)
+  appendTranscript: publicProcedure
+    .input(
+      z.object({
+        campaignId: z.string(),
+        leadId: z.string(),
+        fromSeq: z.number().int().min(0),
+        entries: z.array(z.record(z.any())),
+        state: z.record(z.any()).optional(),
+      })
+    )
+    .mutation(async ({ ctx, input }) => {
+      const conversation = await ctx.prisma.conversation.findFirst({
+        where: {
+          leadId: input.leadId,
+          campaignId: input.campaignId,
+        },
+        orderBy: {
+          callStartTime: 'desc',
+        },
+      });
+
+      if (!conversation) {
+        throw new Error("Conversation not found");
+      }
+
+      const results = (conversation.results as Record<string, any> | null) ?? {};
+      const transcript: Record<string, any>[] = Array.isArray(results.transcript)
+        ? results.transcript
+        : [];
+
+      // The agent is ahead of us (an earlier delta was lost): ask it to resend from our tail
+      if (input.fromSeq > transcript.length) {
+        return { success: false, nextSeq: transcript.length };
+      }
+
+      // Skip entries we already stored so retried deltas are idempotent
+      const newEntries = input.entries.slice(transcript.length - input.fromSeq);
+      const updatedTranscript = transcript.concat(newEntries);
+
+      await ctx.prisma.conversation.update({
+        where: { id: conversation.id },
+        data: {
+          results: {
+            ...results,
+            ...input.state,
+            transcript: updatedTranscript,
+            last_updated: new Date().toISOString(),
+          },
+        },
+      });
+
+      return { success: true, nextSeq: updatedTranscript.length };
+    }),
+
   // Get campaign statistics
   getStats: publicProcedure
     .input(
@@ -750,7 +855,9 @@ export const campaignRouter = createTRPCRouter({
       const agentMetadata = {
         campaignId: campaign.id,
         leadId: lead.id,
-        script: campaign.script,
+        scriptId: campaign.id,
+        scriptHash: scriptHash(input.script),
+        attemptId: conversation.id,
       };
 
       // Create LiveKit token for the AI agent